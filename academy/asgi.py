@@ -16,15 +16,18 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'academy.settings')
 # is populated before importing code that may import ORM models.
 django_asgi_app = get_asgi_application()
 
+from academy.template_warmup import warm_templates_on_startup
+warm_templates_on_startup()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from channels.security.websocket import AllowedHostsOriginValidator
 from academy.routing import websocket_urlpatterns
+from academy.ws_auth import WebSocketAuthMiddlewareStack
 
 application = ProtocolTypeRouter({
     "http": django_asgi_app,
     "websocket": AllowedHostsOriginValidator(
-        AuthMiddlewareStack(
+        WebSocketAuthMiddlewareStack(
             URLRouter(websocket_urlpatterns)
         )
     ),
@@ -0,0 +1,91 @@
+"""
+Response compression helpers (Brotli when available, gzip otherwise).
+
+Used by ``academy.middleware.CompressionMiddleware`` for dynamic responses and
+by the anonymous page cache, which stores its bodies pre-compressed. Static
+files are handled by WhiteNoise, which writes ``.br`` next to ``.gz`` during
+``collectstatic`` whenever the ``brotli`` package is installed.
+
+HTML may carry secrets (CSRF tokens) next to reflected input, so it is only
+gzip-compressed with Django's random-length padding (the BREACH mitigation of
+``GZipMiddleware``); other content types prefer Brotli.
+"""
+from __future__ import annotations
+
+import re
+import zlib
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+GZIP_RANDOM_BYTES = 100
+BROTLI_QUALITY = 5  # fast enough per request; collectstatic uses the maximum
+
+_coding = re.compile(r'\s*([A-Za-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings the client accepts with a non-zero quality."""
+    accepted = set()
+    for part in (header or '').split(','):
+        match = _coding.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) is not None else 1.0
+        except ValueError:
+            continue
+        if quality > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def choose_encoding(header: str, *, allow_brotli: bool = True) -> Optional[str]:
+    accepted = accepted_encodings(header)
+    if allow_brotli and brotli is not None and ('br' in accepted or '*' in accepted):
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str, *, pad: bool = False) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return compress_string(body, max_random_bytes=GZIP_RANDOM_BYTES if pad else None)
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str, *, pad: bool = False) -> Iterator[bytes]:
+    """Compress a sync iterator, flushing after every chunk so data keeps moving."""
+    if encoding == 'gzip':
+        yield from compress_sequence(chunks, max_random_bytes=GZIP_RANDOM_BYTES if pad else None)
+        return
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for chunk in chunks:
+        out = compressor.process(chunk) + compressor.flush()
+        if out:
+            yield out
+    yield compressor.finish()
+
+
+async def compress_async_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        async for chunk in chunks:
+            out = compressor.process(chunk) + compressor.flush()
+            if out:
+                yield out
+        yield compressor.finish()
+        return
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        out = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if out:
+            yield out
+    yield compressor.flush()
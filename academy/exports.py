@@ -0,0 +1,195 @@
+"""
+Streaming data exports (CSV or JSON lines, gzip-compressed on the fly).
+
+Rows are read in primary-key order through ``QuerySet.iterator(chunk_size=...)``
+(a server-side cursor on PostgreSQL), encoded one at a time and pushed through
+an incremental gzip compressor, so memory stays flat however many rows are
+exported. Because the order is by id, an interrupted export resumes from the
+last id it wrote (the *watermark*) with ``after_id``.
+
+The registered datasets are what finance and support need; admin actions
+(``export_csv_action`` / ``export_jsonl_action``) and the ``export_data``
+management command both build on them. Admins that use the actions set
+``action_form = ExportActionForm``, which adds an "after id" box to the
+actions bar. A download cut short is resumed by exporting again after the
+last id it contains.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, Optional
+
+from django import forms
+from django.apps import apps
+from django.contrib.admin.helpers import ActionForm
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+
+CHUNK_SIZE = 2000
+FORMATS = ("csv", "jsonl")
+
+
+@dataclass(frozen=True)
+class Dataset:
+    model_label: str
+    fields: tuple[str, ...]
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def queryset(self):
+        return self.model._default_manager.all()
+
+
+DATASETS = {
+    "audit": Dataset("academy_audit.AuditLog", (
+        "id", "created_at", "action", "actor_id", "actor__email", "subject_type", "subject_id", "message", "metadata",
+    )),
+    "enrollments": Dataset("academy_learning.Enrollment", (
+        "id", "user_id", "user__email", "course_id", "course__slug", "status", "started_at", "completed_at", "expires_at",
+    )),
+    "payments": Dataset("academy_payments.PaymentProofSubmission", (
+        "id", "submitted_at", "user_id", "user__email", "product_type", "course_id", "course__slug", "project_id",
+        "amount", "status", "proof_sha256", "proof_url", "reviewed_by__email", "reviewed_at", "admin_notes",
+    )),
+    "entitlements": Dataset("academy_payments.Entitlement", (
+        "id", "granted_at", "user_id", "user__email", "product_type", "course_id", "course__slug", "project_id",
+        "source", "granted_by__email",
+    )),
+}
+
+
+def dataset_for_model(model) -> Optional[Dataset]:
+    for dataset in DATASETS.values():
+        if dataset.model is model:
+            return dataset
+    return None
+
+
+def iter_rows(queryset, fields: Iterable[str], *, after_id: Optional[int] = None, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """Rows as tuples in id order, starting after the ``after_id`` watermark."""
+    if after_id is not None:
+        queryset = queryset.filter(pk__gt=after_id)
+    return queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return (timezone.localtime(value) if timezone.is_aware(value) else value).isoformat()
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    return value
+
+
+class _Echo:
+    """File-like object whose write() returns the text, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(rows: Iterable[tuple], fields: Iterable[str], *, header: bool = True) -> Iterator[bytes]:
+    writer = csv.writer(_Echo())
+    if header:
+        yield writer.writerow(list(fields)).encode()
+    for row in rows:
+        yield writer.writerow([
+            json.dumps(value) if isinstance(value, (dict, list)) else _plain(value)
+            for value in row
+        ]).encode()
+
+
+def encode_jsonl(rows: Iterable[tuple], fields: Iterable[str], **kwargs) -> Iterator[bytes]:
+    fields = list(fields)
+    for row in rows:
+        record = {field: _plain(value) for field, value in zip(fields, row)}
+        yield json.dumps(record, ensure_ascii=False, default=str).encode() + b"\n"
+
+
+ENCODERS: dict[str, Callable[..., Iterator[bytes]]] = {"csv": encode_csv, "jsonl": encode_jsonl}
+
+
+def gzip_stream(chunks: Iterable[bytes], *, flush_every: int = 256 * 1024) -> Iterator[bytes]:
+    """Compress ``chunks`` incrementally into one gzip member."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    pending = 0
+    for chunk in chunks:
+        out = compressor.compress(chunk)
+        pending += len(chunk)
+        if out:
+            yield out
+        if pending >= flush_every:
+            # Keep data moving to the client on highly compressible exports.
+            yield compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+    yield compressor.flush()
+
+
+def export_stream(queryset, fields, *, fmt: str = "csv", after_id: Optional[int] = None, header: bool = True, compress: bool = True, on_row: Optional[Callable[[tuple], None]] = None) -> Iterator[bytes]:
+    """Encoded (and by default gzipped) export; ``on_row`` sees each row, e.g. to track the watermark."""
+    if fmt not in ENCODERS:
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    rows = iter_rows(queryset, fields, after_id=after_id)
+    if on_row is not None:
+        rows = _observe(rows, on_row)
+    chunks = ENCODERS[fmt](rows, fields, header=header)
+    return gzip_stream(chunks) if compress else chunks
+
+
+def _observe(rows, callback):
+    for row in rows:
+        callback(row)
+        yield row
+
+
+def streaming_export_response(queryset, fields, *, name: str, fmt: str = "csv", after_id: Optional[int] = None) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        export_stream(queryset, fields, fmt=fmt, after_id=after_id),
+        content_type="application/gzip",
+    )
+    stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+    if after_id is not None:
+        name = f"{name}-after-{after_id}"
+    response["Content-Disposition"] = f'attachment; filename="{name}-{stamp}.{fmt}.gz"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+class ExportActionForm(ActionForm):
+    after_id = forms.IntegerField(
+        required=False,
+        min_value=0,
+        label="Export after id:",
+        widget=forms.NumberInput(attrs={"style": "width: 8em;"}),
+    )
+
+
+def _export_action(fmt: str):
+    def action(modeladmin, request, queryset):
+        dataset = dataset_for_model(queryset.model)
+        fields = dataset.fields if dataset else tuple(f.attname for f in queryset.model._meta.concrete_fields)
+        # Already validated by ExportActionForm; empty means from the start.
+        after_id = request.POST.get("after_id") or None
+        return streaming_export_response(
+            queryset,
+            fields,
+            name=queryset.model._meta.model_name,
+            fmt=fmt,
+            after_id=int(after_id) if after_id is not None else None,
+        )
+
+    action.__name__ = f"export_{fmt}"
+    action.short_description = f"⬇️ Export selected as {fmt.upper()} (gzip)"
+    action.allowed_permissions = ("view",)
+    return action
+
+
+export_csv_action = _export_action("csv")
+export_jsonl_action = _export_action("jsonl")
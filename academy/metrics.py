@@ -0,0 +1,87 @@
+"""
+Process-local counters aggregated through the default cache.
+
+Hot paths (WebSocket writers, middleware) call ``incr()``, which only touches
+an in-memory Counter. A daemon thread, started by the first ``incr()`` in each
+process, pushes pending increments to the shared cache every FLUSH_INTERVAL
+seconds, so every process (Daphne, Gunicorn, Celery) contributes to the same
+totals even when it goes idle, and ``snapshot()`` can read them from anywhere.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from typing import Iterable
+
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'metrics'
+FLUSH_INTERVAL = 5.0
+
+_pending: Counter = Counter()
+_lock = threading.Lock()
+_last_flush = time.monotonic()
+# pid that owns the flusher thread; threads don't survive a fork (prefork workers).
+_flusher_pid = None
+
+
+def _key(name: str) -> str:
+    return f'{KEY_PREFIX}:{name}'
+
+
+def incr(name: str, amount: int = 1) -> None:
+    if amount:
+        with _lock:
+            _pending[name] += amount
+        if _flusher_pid != os.getpid():
+            _start_flusher()
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            if _pending:
+                flush()
+        except Exception as exc:  # pragma: no cover - keep flushing after cache outages
+            logger.warning('Metrics could not be flushed', exc_info=exc)
+
+
+def _start_flusher() -> None:
+    global _flusher_pid
+    with _lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def flush() -> None:
+    """Push pending increments to the shared cache."""
+    global _last_flush
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _last_flush = time.monotonic()
+    for name, amount in pending.items():
+        key = _key(name)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Key evicted between add() and incr(); start over from this batch.
+            cache.set(key, amount, timeout=None)
+
+
+def snapshot(names: Iterable[str]) -> dict[str, int]:
+    """Current totals for ``names``, including this process's unflushed increments."""
+    names = list(names)
+    stored = cache.get_many([_key(name) for name in names])
+    with _lock:
+        return {name: stored.get(_key(name), 0) + _pending.get(name, 0) for name in names}
@@ -136,3 +136,78 @@ class RateLimitMiddleware:
             return x_forwarded_for.split(',')[0].strip()
 
         return (request.META.get('REMOTE_ADDR') or '').strip()
+
+
+class AccessContextMiddleware:
+    """Attach a lazy, per-request ``request.access`` (see academy_web.access)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.utils.functional import SimpleLazyObject
+        from academy_web.access import get_access_context
+
+        request.access = SimpleLazyObject(lambda: get_access_context(request.user))
+        return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Compress dynamic responses with Brotli or gzip (see academy.compression).
+
+    Only content types in ``COMPRESSION_CONTENT_TYPES`` are touched, and
+    non-streaming bodies below ``COMPRESSION_MIN_SIZE`` bytes are left alone.
+    Responses that already carry a Content-Encoding (pre-compressed pages,
+    gzip exports, images such as payment proofs) pass through unchanged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', 860)
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', ()))
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.compress(request, response)
+
+    def _compressible(self, request, response):
+        if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type not in self.content_types:
+            return False
+        return response.streaming or len(response.content) >= self.min_size
+
+    def compress(self, request, response):
+        from django.utils.cache import patch_vary_headers
+        from academy import compression
+
+        if not self._compressible(request, response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        is_html = response.get('Content-Type', '').startswith('text/html')
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), allow_brotli=not is_html)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.compress_async_stream(response.streaming_content, encoding)
+            else:
+                response.streaming_content = compression.compress_stream(response.streaming_content, encoding, pad=is_html)
+            del response.headers['Content-Length']
+        else:
+            body = compression.compress(response.content, encoding, pad=is_html)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,112 @@
+"""
+Paginators for very large tables.
+
+Django's Paginator runs an exact ``SELECT COUNT(*)`` for every page, which on a
+table with millions of rows costs a full scan. ``EstimatedCountPaginator``
+only counts exactly when that is cheap:
+
+* unfiltered querysets on big tables use the planner's row estimate
+  (``pg_class.reltuples``, summed over partitions) on PostgreSQL, or a cached
+  count elsewhere;
+* filtered querysets are counted with a ``LIMIT``, so the count is exact up to
+  ``ADMIN_EXACT_COUNT_LIMIT`` rows and an estimate beyond it.
+
+Estimated counts may overshoot; the trailing pages are then empty rather than
+missing. ``paginator.estimated`` tells templates the count is approximate.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+
+
+COUNT_CACHE_TIMEOUT = 5 * 60
+
+
+def _threshold() -> int:
+    return getattr(settings, "ADMIN_ESTIMATED_COUNT_THRESHOLD", 100_000)
+
+
+def _exact_limit() -> int:
+    return getattr(settings, "ADMIN_EXACT_COUNT_LIMIT", 10_000)
+
+
+def planner_estimate(model, using: str = "default") -> Optional[int]:
+    """Row estimate from PostgreSQL statistics; None elsewhere or before the first ANALYZE."""
+    connection = connections[using]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.reltuples, (SELECT SUM(GREATEST(p.reltuples, 0)) FROM pg_inherits i "
+            "JOIN pg_class p ON p.oid = i.inhrelid WHERE i.inhparent = c.oid) "
+            "FROM pg_class c WHERE c.oid = to_regclass(%s)",
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    own, partitions = row
+    if partitions is not None:
+        # Partitioned parents carry no rows of their own.
+        return int(partitions)
+    return int(own) if own is not None and own >= 0 else None
+
+
+def _count_key(model) -> str:
+    return f"table_count_{model._meta.db_table}"
+
+
+def table_count(queryset: QuerySet) -> tuple[int, bool]:
+    """(count, estimated) for the model's whole table."""
+    model = queryset.model
+    estimate = planner_estimate(model, queryset.db)
+    if estimate is not None and estimate >= _threshold():
+        return estimate, True
+
+    cached = cache.get(_count_key(model))
+    if cached is not None and cached >= _threshold():
+        return cached, True
+    exact = queryset.order_by().count()
+    cache.set(_count_key(model), exact, timeout=COUNT_CACHE_TIMEOUT)
+    return exact, False
+
+
+class EstimatedCountPaginator(Paginator):
+    _estimated = False
+
+    @property
+    def estimated(self) -> bool:
+        self.count
+        return self._estimated
+
+    @cached_property
+    def count(self) -> int:
+        queryset = self.object_list
+        if not isinstance(queryset, QuerySet) or queryset.query.is_sliced:
+            return super().count
+
+        if not queryset.query.where and not queryset.query.distinct:
+            count, self._estimated = table_count(queryset)
+            return count
+
+        limit = _exact_limit()
+        capped = queryset.order_by()[: limit + 1].count()
+        if capped <= limit:
+            return capped
+        self._estimated = True
+        total, _ = table_count(queryset.model._default_manager.using(queryset.db).all())
+        return max(capped, total)
+
+
+class EstimatedCountAdminMixin:
+    """ModelAdmin mixin for large tables: estimated page counts, no second unfiltered COUNT."""
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
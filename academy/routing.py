@@ -6,10 +6,13 @@ from academy_learning.consumers import (
     ProgressConsumer,
     NotificationConsumer,
     CourseUpdateConsumer,
+    RealtimeGatewayConsumer,
 )
 from academy_courses.consumers import CourseUpdatesConsumer
 
 websocket_urlpatterns = [
+    path('ws/realtime/', RealtimeGatewayConsumer.as_asgi()),  # Multiplexed topics on one socket
+    # Single-topic routes kept for existing clients; thin shims over the gateway.
     path('ws/progress/<int:course_id>/', ProgressConsumer.as_asgi()),
     path('ws/notifications/', NotificationConsumer.as_asgi()),
     path('ws/course-updates/<int:course_id>/', CourseUpdateConsumer.as_asgi()),
@@ -86,12 +86,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'academy.middleware.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'academy.middleware.AccessContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'academy.middleware.SecurityHeadersMiddleware',
@@ -110,7 +112,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [str(BASE_DIR / 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -118,10 +119,22 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Explicitly cached: compiled templates live for the life of the
+            # worker (the dev autoreloader resets them on change).
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
 
+# Compile every template under templates/ when a worker starts
+# (academy/template_warmup.py).
+TEMPLATE_WARMUP = env.bool('TEMPLATE_WARMUP', default=not DEBUG)
+
 WSGI_APPLICATION = 'academy.wsgi.application'
 ASGI_APPLICATION = 'academy.asgi.application'
 
@@ -192,7 +205,8 @@ STATICFILES_DIRS = [str(BASE_DIR / 'static')]
 
 STATIC_ROOT = env('DJANGO_STATIC_ROOT', default=str(BASE_DIR / 'staticfiles'))
 
-# Whitenoise compression + manifest for long-term caching
+# Whitenoise compression + manifest for long-term caching. With the `brotli`
+# package installed, collectstatic writes .br files next to the .gz ones.
 STORAGES = {
     'default': {
         'BACKEND': 'django.core.files.storage.FileSystemStorage',
@@ -205,6 +219,49 @@ STORAGES = {
 MEDIA_URL = env('DJANGO_MEDIA_URL', default='/media/')
 MEDIA_ROOT = env('DJANGO_MEDIA_ROOT', default=str(BASE_DIR / 'media'))
 
+# Audit sink (academy_audit/sink.py): non-durable events are buffered per
+# process and bulk-written, or handed to Celery when AUDIT_SINK_MODE=celery.
+AUDIT_SINK_MODE = env('AUDIT_SINK_MODE', default='buffer')
+AUDIT_BUFFER_SIZE = env.int('AUDIT_BUFFER_SIZE', default=100)
+AUDIT_FLUSH_INTERVAL = env.float('AUDIT_FLUSH_INTERVAL', default=5.0)
+
+# Months of audit history kept in the database; older months are moved to
+# compressed JSONL files by `manage.py archive_audit_logs`.
+AUDIT_RETENTION_MONTHS = env.int('AUDIT_RETENTION_MONTHS', default=12)
+AUDIT_ARCHIVE_DIR = env('AUDIT_ARCHIVE_DIR', default=str(BASE_DIR / 'var' / 'audit_archive'))
+
+# Admin changelists on large tables (academy/paginators.py): above the
+# threshold an unfiltered table count is estimated; filtered results are
+# counted exactly up to the limit.
+ADMIN_ESTIMATED_COUNT_THRESHOLD = env.int('ADMIN_ESTIMATED_COUNT_THRESHOLD', default=100_000)
+ADMIN_EXACT_COUNT_LIMIT = env.int('ADMIN_EXACT_COUNT_LIMIT', default=10_000)
+
+# Dynamic response compression (academy.middleware.CompressionMiddleware).
+# Images, PDFs and archives are already compressed and not listed.
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=860)
+COMPRESSION_CONTENT_TYPES = [
+    'text/html',
+    'text/plain',
+    'text/css',
+    'text/csv',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+]
+
+# Anonymous catalog/marketing pages are served from the cache for this long
+# (academy_web/page_cache.py); catalog edits invalidate them immediately.
+PAGE_CACHE_TIMEOUT = env.int('PAGE_CACHE_TIMEOUT', default=10 * 60)
+
+# Payment proofs larger than this are rejected while they stream in.
+PAYMENT_PROOF_MAX_UPLOAD_SIZE = env.int('PAYMENT_PROOF_MAX_UPLOAD_SIZE', default=10 * 1024 * 1024)
+
+# Local cache of WebP proof thumbnails (academy_payments.previews); kept on
+# disk even when media lives in S3.
+PROOF_PREVIEW_ROOT = env('PROOF_PREVIEW_ROOT', default=str(Path(MEDIA_ROOT) / 'proof_previews'))
+
 # Optional S3-compatible media storage (Cloudflare R2 / MinIO / Supabase S3)
 # This is intentionally opt-in: set DJANGO_USE_S3_MEDIA=true + credentials.
 DJANGO_USE_S3_MEDIA = env.bool('DJANGO_USE_S3_MEDIA', default=False)
@@ -394,8 +451,8 @@ if redis_available:
             'BACKEND': 'channels_redis.core.RedisChannelLayer',
             'CONFIG': {
                 'hosts': [REDIS_URL],
-                'capacity': 1500,
-                'expiry': 10,
+                'capacity': env.int('CHANNEL_LAYER_CAPACITY', default=1500),
+                'expiry': env.int('CHANNEL_LAYER_EXPIRY', default=10),
             },
         }
     }
@@ -407,6 +464,23 @@ else:
         }
     }
 
+# Per-connection outbound queue for WebSocket consumers. Snapshot events are
+# coalesced, the oldest event is dropped when full, and a connection that
+# drops more than REALTIME_MAX_DROPS events within REALTIME_DROP_WINDOW seconds
+# is closed so the client resyncs.
+REALTIME_OUTBOX_SIZE = env.int('REALTIME_OUTBOX_SIZE', default=200)
+REALTIME_MAX_DROPS = env.int('REALTIME_MAX_DROPS', default=1000)
+REALTIME_DROP_WINDOW = env.float('REALTIME_DROP_WINDOW', default=10.0)
+
+# Lifetime of the signed tokens minted by /api/realtime/token/ for WebSocket
+# handshakes (see academy/ws_auth.py).
+WS_CONNECTION_TOKEN_MAX_AGE = env.int('WS_CONNECTION_TOKEN_MAX_AGE', default=60)
+
+# Presence tracking for learners connected to course sockets.
+# Members expire unless the client heartbeats within PRESENCE_TTL seconds.
+PRESENCE_BACKEND = 'redis' if redis_available else 'memory'
+PRESENCE_TTL = env.int('PRESENCE_TTL', default=60)
+
 # Development fallback: use in-memory channel layer when Redis isn't available
 # or when explicitly requested via DJANGO_USE_INMEMORY_CHANNELS. This makes it
 # possible to run and test WebSocket consumers locally without a Redis server.
@@ -429,6 +503,29 @@ CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 minutes
 CELERY_TASK_SOFT_TIME_LIMIT = 25 * 60  # 25 minutes
 CELERY_WORKER_PREFETCH_MULTIPLIER = 4
 CELERY_WORKER_MAX_TASKS_PER_CHILD = 1000
+CELERY_BEAT_SCHEDULE = {
+    'sweep-presence': {
+        'task': 'academy_learning.tasks.sweep_presence',
+        'schedule': 60.0,
+    },
+    'ensure-audit-partitions': {
+        'task': 'academy_audit.tasks.ensure_audit_partitions',
+        'schedule': 60.0 * 60 * 24,
+    },
+    'refresh-dashboard-snapshot': {
+        'task': 'academy_api.tasks.refresh_dashboard_snapshot',
+        'schedule': 60.0,
+    },
+    'rebuild-dashboard-snapshot': {
+        'task': 'academy_api.tasks.refresh_dashboard_snapshot',
+        'schedule': 60.0 * 60 * 24,
+        'kwargs': {'rebuild': True},
+    },
+    'render-stale-lessons': {
+        'task': 'academy_courses.tasks.render_stale_lessons',
+        'schedule': 60.0 * 60,
+    },
+}
 
 # Session configuration for better security with Redis
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
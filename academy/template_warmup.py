@@ -0,0 +1,73 @@
+"""
+Template warm-up.
+
+Every template under the project ``templates/`` directory is compiled into
+the cached template loader once, when a worker starts (see wsgi.py/asgi.py),
+so the first requests after a deploy don't pay for parsing the large page
+templates. ``manage.py check_templates`` reuses the same discovery to validate
+and time each template.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.template import engines
+
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_SUFFIXES = ('.html', '.txt', '.xml')
+
+
+@dataclass
+class WarmResult:
+    name: str
+    seconds: float
+    error: Optional[Exception] = None
+
+
+def _engine():
+    return engines['django'].engine
+
+
+def project_templates() -> Iterator[str]:
+    """Template names (relative paths) under the engine's DIRS, sorted."""
+    for directory in _engine().dirs:
+        directory = str(directory)
+        names = []
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(TEMPLATE_SUFFIXES):
+                    names.append(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+        yield from sorted(names)
+
+
+def warm_template_cache() -> list[WarmResult]:
+    """Compile every project template through the engine's (cached) loaders."""
+    engine = _engine()
+    results = []
+    for name in project_templates():
+        started = time.perf_counter()
+        try:
+            engine.get_template(name)
+        except Exception as exc:
+            results.append(WarmResult(name, time.perf_counter() - started, exc))
+        else:
+            results.append(WarmResult(name, time.perf_counter() - started))
+    return results
+
+
+def warm_templates_on_startup() -> None:
+    if not getattr(settings, 'TEMPLATE_WARMUP', False):
+        return
+    started = time.perf_counter()
+    results = warm_template_cache()
+    for result in results:
+        if result.error is not None:
+            logger.warning('Template %s failed to compile: %s', result.name, result.error)
+    logger.info('Warmed %d template(s) in %.0f ms', len(results), (time.perf_counter() - started) * 1000)
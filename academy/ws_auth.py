@@ -0,0 +1,98 @@
+"""
+Lightweight authentication for WebSocket handshakes.
+
+After a deploy thousands of clients reconnect at once; the session-based
+``AuthMiddlewareStack`` turns every handshake into a session read plus a users
+table query. Clients can instead present either
+
+* a short-lived signed connection token from ``/api/realtime/token/``, or
+* the JWT access token issued by ``/api/auth/token/``,
+
+as ``?token=`` / ``?jwt=`` query parameters or an ``Authorization: Bearer``
+header. Both are verified from their signature alone and the user is resolved
+through ``academy_users.services.get_cached_user``, so a reconnect storm is
+served from memory. Handshakes without credentials fall back to the session.
+"""
+from __future__ import annotations
+
+from typing import Optional
+from urllib.parse import parse_qs
+
+from channels.auth import AuthMiddlewareStack
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core import signing
+
+
+TOKEN_SALT = 'academy.ws-connection'
+
+
+def make_connection_token(user) -> str:
+    return signing.dumps({'uid': user.id}, salt=TOKEN_SALT, compress=False)
+
+
+def _user_id_from_connection_token(token: str) -> Optional[int]:
+    max_age = getattr(settings, 'WS_CONNECTION_TOKEN_MAX_AGE', 60)
+    try:
+        return int(signing.loads(token, salt=TOKEN_SALT, max_age=max_age)['uid'])
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        return None
+
+
+def _user_id_from_jwt(raw: str) -> Optional[int]:
+    from rest_framework_simplejwt.exceptions import TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    try:
+        return int(AccessToken(raw)[api_settings.USER_ID_CLAIM])
+    except (TokenError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _credentials(scope) -> tuple[Optional[str], Optional[str]]:
+    """Return (connection_token, jwt) found in the handshake, if any."""
+    query = parse_qs(scope.get('query_string', b'').decode())
+    token = (query.get('token') or [None])[0]
+    jwt = (query.get('jwt') or [None])[0]
+    if jwt is None:
+        for name, value in scope.get('headers', []):
+            if name == b'authorization' and value.lower().startswith(b'bearer '):
+                jwt = value[7:].decode().strip()
+                break
+    return token, jwt
+
+
+async def resolve_user(user_id: Optional[int]):
+    from academy_users.services import get_cached_user, get_local_user
+
+    if user_id is None:
+        return AnonymousUser()
+    user = get_local_user(user_id)
+    if user is None:
+        user = await database_sync_to_async(get_cached_user)(user_id)
+    if user is None or not user.is_active:
+        return AnonymousUser()
+    return user
+
+
+class WebSocketAuthMiddleware:
+    """Authenticate from signed tokens when present, else via the session stack."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.session_stack = AuthMiddlewareStack(inner)
+
+    async def __call__(self, scope, receive, send):
+        token, jwt = _credentials(scope)
+        if token is None and jwt is None:
+            return await self.session_stack(scope, receive, send)
+
+        user_id = _user_id_from_connection_token(token) if token else _user_id_from_jwt(jwt)
+        scope = dict(scope, user=await resolve_user(user_id))
+        return await self.inner(scope, receive, send)
+
+
+def WebSocketAuthMiddlewareStack(inner):
+    return WebSocketAuthMiddleware(inner)
@@ -0,0 +1,160 @@
+"""
+Admin dashboard KPIs.
+
+``refresh_snapshot()`` (run every minute by Celery beat) folds new rows into a
+running state and publishes the result as one cached document, so the admin
+index renders from a single cache read.
+
+Each source is read incrementally with a keyset watermark on (timestamp, id):
+
+* enrollments by ``started_at``  -> enrollments today / per course;
+* enrollments by ``completed_at`` -> completions per course;
+* payment proofs by ``reviewed_at`` (approved only) -> revenue per course;
+* course progress by ``updated_at`` -> learners active in the last 7 days.
+
+Rows newer than ``SETTLE_DELAY`` are left for the next run, so a transaction
+that commits a little late is not skipped. Cancellations and reversed
+approvals are not subtracted; the nightly ``rebuild=True`` run recomputes the
+state from scratch. Pending proofs come from the review queue counters.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from academy_courses.models import Course
+from academy_learning.models import CourseProgress, Enrollment
+from academy_payments import review_queue
+from academy_payments.models import PaymentProofSubmission, ProductType, ProofStatus
+
+
+SNAPSHOT_KEY = 'dashboard_snapshot'
+STATE_KEY = 'dashboard_state'
+LOCK_KEY = 'dashboard_refresh_lock'
+LOCK_TIMEOUT = 10 * 60
+STATE_VERSION = 1
+
+SETTLE_DELAY = timedelta(seconds=30)
+ACTIVE_WINDOW = timedelta(days=7)
+BATCH_SIZE = 2000
+TOP_COURSES = 10
+
+
+def get_snapshot() -> Optional[dict]:
+    return cache.get(SNAPSHOT_KEY)
+
+
+def _empty_state() -> dict:
+    return {
+        'version': STATE_VERSION,
+        'day': None,
+        'enrollments_today': 0,
+        'enrollments_total': 0,
+        'revenue_total': 0.0,
+        # course id -> [revenue, enrolled, completed]
+        'courses': {},
+        # user id -> last activity
+        'last_seen': {},
+        'watermarks': {'enrolled': None, 'completed': None, 'approved': None, 'progress': None},
+    }
+
+
+def _after(queryset, field: str, watermark, until: datetime):
+    """Rows past ``watermark`` (a (timestamp, id) pair) and settled by ``until``, oldest first."""
+    queryset = queryset.filter(**{f'{field}__isnull': False, f'{field}__lte': until})
+    if watermark is not None:
+        stamp, pk = watermark
+        queryset = queryset.filter(Q(**{f'{field}__gt': stamp}) | Q(**{field: stamp, 'id__gt': pk}))
+    return queryset.order_by(field, 'id')
+
+
+def _scan(state: dict, name: str, queryset, field: str, until: datetime, *values):
+    """Yield new rows as value tuples and advance the ``name`` watermark past them."""
+    rows = _after(queryset, field, state['watermarks'][name], until).values_list('id', field, *values)
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        state['watermarks'][name] = (row[1], row[0])
+        yield row[1:]
+
+
+def _course(state: dict, course_id) -> list:
+    return state['courses'].setdefault(course_id, [0.0, 0, 0])
+
+
+def _fold(state: dict, now: datetime) -> None:
+    until = now - SETTLE_DELAY
+    today = timezone.localdate(now)
+    if state['day'] != today:
+        state['day'] = today
+        state['enrollments_today'] = 0
+
+    for started_at, course_id in _scan(state, 'enrolled', Enrollment.objects.all(), 'started_at', until, 'course_id'):
+        state['enrollments_total'] += 1
+        _course(state, course_id)[1] += 1
+        if timezone.localdate(started_at) == today:
+            state['enrollments_today'] += 1
+
+    for _, course_id in _scan(state, 'completed', Enrollment.objects.all(), 'completed_at', until, 'course_id'):
+        _course(state, course_id)[2] += 1
+
+    approved = PaymentProofSubmission.objects.filter(status=ProofStatus.APPROVED)
+    for _, amount, product_type, course_id in _scan(state, 'approved', approved, 'reviewed_at', until, 'amount', 'product_type', 'course_id'):
+        state['revenue_total'] += amount or 0
+        if product_type == ProductType.COURSE and course_id:
+            _course(state, course_id)[0] += amount or 0
+
+    last_seen = state['last_seen']
+    for updated_at, user_id in _scan(state, 'progress', CourseProgress.objects.all(), 'updated_at', until, 'user_id'):
+        last_seen[user_id] = updated_at
+    cutoff = now - ACTIVE_WINDOW
+    for user_id in [uid for uid, seen in last_seen.items() if seen < cutoff]:
+        del last_seen[user_id]
+
+
+def _document(state: dict, now: datetime) -> dict:
+    ranked = sorted(state['courses'].items(), key=lambda item: (item[1][0], item[1][1]), reverse=True)[:TOP_COURSES]
+    titles = dict(Course.objects.filter(id__in=[cid for cid, _ in ranked]).values_list('id', 'title'))
+    courses = [
+        {
+            'id': course_id,
+            'title': titles.get(course_id, f'#{course_id}'),
+            'revenue': round(revenue, 2),
+            'enrolled': enrolled,
+            'completed': completed,
+            'completion_rate': round(100 * completed / enrolled, 1) if enrolled else 0.0,
+        }
+        for course_id, (revenue, enrolled, completed) in ranked
+    ]
+    return {
+        'computed_at': now,
+        'enrollments_today': state['enrollments_today'],
+        'enrollments_total': state['enrollments_total'],
+        'pending_proofs': review_queue.status_counts().get(ProofStatus.PENDING, 0),
+        'revenue_total': round(state['revenue_total'], 2),
+        'active_learners': len(state['last_seen']),
+        'courses': courses,
+    }
+
+
+def refresh_snapshot(*, rebuild: bool = False) -> Optional[dict]:
+    """Fold rows added since the last run into the state and publish a new snapshot.
+
+    Returns None without doing anything while another refresh is running, so
+    overlapping beat runs cannot count the same rows twice.
+    """
+    if not cache.add(LOCK_KEY, 1, timeout=LOCK_TIMEOUT):
+        return None
+    try:
+        now = timezone.now()
+        state = None if rebuild else cache.get(STATE_KEY)
+        if state is None or state.get('version') != STATE_VERSION:
+            state = _empty_state()
+        _fold(state, now)
+        snapshot = _document(state, now)
+        cache.set_many({STATE_KEY: state, SNAPSHOT_KEY: snapshot}, timeout=None)
+        return snapshot
+    finally:
+        cache.delete(LOCK_KEY)
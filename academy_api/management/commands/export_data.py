@@ -0,0 +1,166 @@
+import codecs
+import csv
+import gzip
+import json
+import os
+import sys
+import tempfile
+import zlib
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academy import exports
+
+
+class Command(BaseCommand):
+    help = "Stream a dataset (audit, enrollments, payments, entitlements) to a gzipped CSV/JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=sorted(exports.DATASETS))
+        parser.add_argument("--format", dest="fmt", choices=exports.FORMATS, default="csv")
+        parser.add_argument("--output", "-o", default="-", help="File to write, or - for stdout (default).")
+        parser.add_argument("--after-id", type=int, help="Start after this id (watermark of a previous run).")
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Append to --output, continuing after the last id it already contains.",
+        )
+        parser.add_argument("--no-gzip", action="store_true", help="Write plain text instead of gzip.")
+
+    def handle(self, *args, **options):
+        dataset = exports.DATASETS[options["dataset"]]
+        fmt, output = options["fmt"], options["output"]
+        after_id = options["after_id"]
+        header = True
+
+        if options["resume"]:
+            if output == "-" or options["no_gzip"]:
+                raise CommandError("--resume needs a gzip --output file")
+            if os.path.exists(output):
+                after_id, started = self._recover(output, fmt)
+                header = not started
+
+        watermark = {"id": after_id, "rows": 0}
+
+        def track(row):
+            watermark["id"] = row[0]
+            watermark["rows"] += 1
+
+        chunks = exports.export_stream(
+            dataset.queryset(),
+            dataset.fields,
+            fmt=fmt,
+            after_id=after_id,
+            header=header,
+            compress=not options["no_gzip"],
+            on_row=track,
+        )
+
+        if output == "-":
+            target = sys.stdout.buffer
+            for chunk in chunks:
+                target.write(chunk)
+            target.flush()
+        else:
+            # Appending adds a new gzip member; readers treat the file as one stream.
+            with open(output, "ab" if options["resume"] else "wb") as target:
+                for chunk in chunks:
+                    target.write(chunk)
+
+        self.stderr.write(f"Exported {watermark['rows']} row(s); watermark id={watermark['id']}")
+
+    def _recover(self, path, fmt):
+        """Last complete id in an existing export, and whether it holds any records.
+
+        An export killed mid-write ends in a gzip member without its end-of-stream
+        marker, usually halfway through a record. gzip.open() refuses such a file and
+        a member appended after it would be unreadable, so the file is decompressed
+        by hand and, if anything follows the last complete record, rewritten to end
+        there.
+        """
+        scan = {"damaged": False}
+        last, started = None, False
+        for _text, record_id in self._records(path, fmt, scan):
+            started = True
+            last = record_id
+        if scan["damaged"]:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as out:
+                    for text, _record_id in self._records(path, fmt, {"damaged": False}):
+                        out.write(text.encode())
+                os.replace(tmp, path)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+                raise
+            self.stderr.write(f"{path} was cut short; kept it up to id={last}")
+        try:
+            return (int(last) if last is not None else None), started
+        except ValueError:
+            # Only the CSV header so far.
+            return None, started
+
+    def _records(self, path, fmt, scan):
+        """(text, id) of each complete record; sets scan["damaged"] if anything follows them."""
+        if fmt == "jsonl":
+            for line in self._lines(path, scan):
+                if not line.endswith("\n"):
+                    scan["damaged"] = True
+                    break
+                yield line, json.loads(line)["id"]
+            return
+
+        consumed = []
+
+        def lines():
+            for line in self._lines(path, scan):
+                consumed.append(line)
+                yield line
+
+        try:
+            # CSV fields (messages, notes) may span lines inside quotes; strict
+            # mode rejects a quoted field left open by the end of the data.
+            for record in csv.reader(lines(), strict=True):
+                text = "".join(consumed)
+                consumed.clear()
+                if not text.endswith("\n"):
+                    break
+                yield text, record[0]
+        except csv.Error:
+            pass
+        if consumed:
+            scan["damaged"] = True
+
+    def _lines(self, path, scan):
+        """Decompressed lines, newline included; an unterminated tail comes last."""
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        tail = ""
+        for chunk in self._decompressed(path, scan):
+            lines = (tail + decoder.decode(chunk)).split("\n")
+            tail = lines.pop()
+            for line in lines:
+                yield line + "\n"
+        if tail:
+            yield tail
+
+    def _decompressed(self, path, scan):
+        decompressor, fed = zlib.decompressobj(31), False
+        with open(path, "rb") as source:
+            for data in iter(lambda: source.read(64 * 1024), b""):
+                while data:
+                    try:
+                        chunk = decompressor.decompress(data)
+                    except zlib.error:
+                        scan["damaged"] = True
+                        return
+                    fed = True
+                    yield chunk
+                    if decompressor.eof:
+                        # Each resumed run appended its own gzip member.
+                        data, decompressor, fed = decompressor.unused_data, zlib.decompressobj(31), False
+                    else:
+                        data = b""
+        if fed:
+            # The last member never reached its end-of-stream marker.
+            scan["damaged"] = True
@@ -0,0 +1,14 @@
+"""
+Celery tasks for the admin dashboard.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def refresh_dashboard_snapshot(rebuild=False):
+    """Fold new rows into the admin dashboard KPIs (see academy_api.dashboard)."""
+    from .dashboard import refresh_snapshot
+    snapshot = refresh_snapshot(rebuild=rebuild)
+    if snapshot is None:
+        return 'Dashboard refresh already running'
+    return f"Dashboard snapshot computed at {snapshot['computed_at']:%H:%M:%S}"
@@ -0,0 +1,12 @@
+from django import template
+
+from academy_api.dashboard import get_snapshot
+
+
+register = template.Library()
+
+
+@register.simple_tag
+def dashboard_snapshot():
+    """The cached KPI document, or None until the first refresh has run."""
+    return get_snapshot()
@@ -18,3 +18,132 @@ class ApiSmokeTests(TestCase):
 		resp = self.client.get("/api/health/", secure=True)
 		self.assertEqual(resp.status_code, 200)
 		self.assertEqual(resp.json().get("ok"), True)
+
+	def test_metrics_endpoint_is_staff_only(self):
+		from django.contrib.auth import get_user_model
+		from academy import metrics
+
+		resp = self.client.get("/api/metrics/", secure=True)
+		self.assertIn(resp.status_code, (401, 403))
+
+		staff = get_user_model().objects.create_user(email="ops@example.com", password="pw", is_staff=True)
+		self.client.force_login(staff)
+		metrics.incr("realtime.dropped", 3)
+		metrics.flush()
+		resp = self.client.get("/api/metrics/", secure=True)
+		self.assertEqual(resp.status_code, 200)
+		self.assertGreaterEqual(resp.json()["realtime"]["realtime.dropped"], 3)
+
+	def test_metrics_are_flushed_without_further_traffic(self):
+		import time
+		from django.core.cache import cache
+		from academy import metrics
+
+		cache.delete("metrics:test.idle")
+		with patch.object(metrics, "FLUSH_INTERVAL", 0.01), patch.object(metrics, "_flusher_pid", None):
+			metrics.incr("test.idle", 2)
+			deadline = time.monotonic() + 2
+			while cache.get("metrics:test.idle") is None and time.monotonic() < deadline:
+				time.sleep(0.01)
+		self.assertEqual(cache.get("metrics:test.idle"), 2)
+
+	def test_payment_review_queue_pages_and_claims(self):
+		from django.contrib.auth import get_user_model
+		from django.core.cache import cache
+		from academy_courses.models import Course
+		from academy_payments.models import PaymentProofSubmission, ProductType
+
+		cache.clear()
+		User = get_user_model()
+		course = Course.objects.create(slug="queue-course", title="Queue Course", price=500)
+		learner = User.objects.create_user(email="learner@example.com", password="pw")
+		for _ in range(3):
+			PaymentProofSubmission.objects.create(user=learner, product_type=ProductType.COURSE, course=course)
+		first = User.objects.create_user(email="rev1@example.com", password="pw", is_staff=True)
+		second = User.objects.create_user(email="rev2@example.com", password="pw", is_staff=True)
+
+		self.client.force_login(first)
+		page = self.client.get("/api/payments/review-queue/?limit=2", secure=True).json()
+		self.assertEqual(page["counts"]["PENDING"], 3)
+		self.assertEqual(len(page["results"]), 2)
+		rest = self.client.get(f"/api/payments/review-queue/?limit=2&cursor={page['next_cursor']}", secure=True).json()
+		self.assertEqual(len(rest["results"]), 1)
+		self.assertIsNone(rest["next_cursor"])
+
+		mine = self.client.post("/api/payments/review-queue/claim/", {"limit": 2}, secure=True).json()["results"]
+		self.client.force_login(second)
+		theirs = self.client.post("/api/payments/review-queue/claim/", {"limit": 2}, secure=True).json()["results"]
+		self.assertEqual(len(theirs), 1)
+		self.assertFalse({row["id"] for row in mine} & {row["id"] for row in theirs})
+
+		resp = self.client.post(f"/api/payments/review-queue/{mine[0]['id']}/reject/", secure=True)
+		self.assertEqual(resp.status_code, 409)
+		with self.captureOnCommitCallbacks(execute=True):
+			resp = self.client.post(f"/api/payments/review-queue/{theirs[0]['id']}/reject/", secure=True)
+		self.assertEqual(resp.status_code, 200)
+		resp = self.client.post(f"/api/payments/review-queue/{theirs[0]['id']}/approve/", secure=True)
+		self.assertEqual((resp.status_code, resp.json()["detail"]), (409, "Already reviewed."))
+		counts = self.client.get("/api/payments/review-queue/", secure=True).json()["counts"]
+		self.assertEqual((counts["PENDING"], counts["REJECTED"]), (2, 1))
+
+	def test_dashboard_snapshot_folds_in_new_rows(self):
+		from datetime import timedelta
+		from django.contrib.auth import get_user_model
+		from django.core.cache import cache
+		from django.utils import timezone
+		from academy_api import dashboard
+		from academy_courses.models import Course
+		from academy_learning.models import Enrollment, EnrollmentStatus
+		from academy_payments.models import PaymentProofSubmission, ProductType, ProofStatus
+
+		cache.clear()
+		User = get_user_model()
+		course = Course.objects.create(slug="kpi-course", title="KPI Course", price=500)
+		learners = [User.objects.create_user(email=f"kpi{n}@example.com", password="pw") for n in range(3)]
+		Enrollment.objects.create(user=learners[0], course=course)
+		PaymentProofSubmission.objects.create(
+			user=learners[0], product_type=ProductType.COURSE, course=course, amount=500,
+			status=ProofStatus.APPROVED, reviewed_at=timezone.now(),
+		)
+		PaymentProofSubmission.objects.create(user=learners[1], product_type=ProductType.COURSE, course=course, amount=500)
+
+		with patch.object(dashboard, "SETTLE_DELAY", timedelta(0)):
+			first = dashboard.refresh_snapshot()
+			Enrollment.objects.create(user=learners[1], course=course)
+			Enrollment.objects.filter(user=learners[0]).update(status=EnrollmentStatus.COMPLETED, completed_at=timezone.now())
+			second = dashboard.refresh_snapshot()
+
+		self.assertEqual((first["enrollments_today"], first["pending_proofs"], first["revenue_total"]), (1, 1, 500))
+		self.assertEqual((second["enrollments_today"], second["revenue_total"]), (2, 500))
+		self.assertEqual(second["courses"][0]["completion_rate"], 50.0)
+
+		staff = User.objects.create_user(email="kpi-admin@example.com", password="pw", is_staff=True, is_superuser=True)
+		self.client.force_login(staff)
+		resp = self.client.get("/admin/", secure=True)
+		self.assertContains(resp, "Enrollments today")
+		self.assertContains(resp, "KPI Course")
+
+	def test_api_json_is_compressed_for_capable_clients(self):
+		import gzip
+		import json
+		from academy import compression
+		from academy_courses.models import ContentStatus, Course
+
+		for n in range(12):
+			Course.objects.create(slug=f"compressed-{n}", title=f"Compressed course {n}", status=ContentStatus.PUBLISHED, description="x" * 100)
+
+		plain = self.client.get("/api/courses/", secure=True)
+		self.assertFalse(plain.has_header("Content-Encoding"))
+
+		resp = self.client.get("/api/courses/", secure=True, HTTP_ACCEPT_ENCODING="gzip, br;q=0.9")
+		self.assertIn("Accept-Encoding", resp["Vary"])
+		if compression.brotli is not None:
+			self.assertEqual(resp["Content-Encoding"], "br")
+			body = compression.brotli.decompress(resp.content)
+		else:
+			self.assertEqual(resp["Content-Encoding"], "gzip")
+			body = gzip.decompress(resp.content)
+		self.assertEqual(json.loads(body), plain.json())
+
+		refused = self.client.get("/api/courses/", secure=True, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+		self.assertFalse(refused.has_header("Content-Encoding"))
@@ -4,9 +4,10 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from academy_courses.views import CourseCategoryViewSet, CourseViewSet, LessonViewSet, ModuleViewSet
 from academy_learning.views import EnrollmentViewSet, CourseProgressViewSet, LessonProgressViewSet
+from academy_payments.views import review_queue_claim, review_queue_decide, review_queue_list, review_queue_release
 from academy_projects.views import ProjectViewSet
 
-from .views import health
+from .views import health, metrics_view, realtime_token
 
 router = DefaultRouter()
 router.register('course-categories', CourseCategoryViewSet, basename='course-category')
@@ -20,7 +21,14 @@ router.register('lesson-progress', LessonProgressViewSet, basename='lesson-progr
 
 urlpatterns = [
     path('health/', health),
+    path('metrics/', metrics_view, name='metrics'),
     path('auth/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('realtime/token/', realtime_token, name='realtime_token'),
+    path('payments/review-queue/', review_queue_list, name='payment_review_queue'),
+    path('payments/review-queue/claim/', review_queue_claim, name='payment_review_claim'),
+    path('payments/review-queue/release/', review_queue_release, name='payment_review_release'),
+    path('payments/review-queue/<int:pk>/approve/', review_queue_decide, {'decision': 'approve'}, name='payment_review_approve'),
+    path('payments/review-queue/<int:pk>/reject/', review_queue_decide, {'decision': 'reject'}, name='payment_review_reject'),
     path('', include(router.urls)),
 ]
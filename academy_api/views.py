@@ -1,7 +1,12 @@
 from django.conf import settings
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 
+from academy import metrics
+from academy.ws_auth import make_connection_token
+from academy_learning.protocol import REALTIME_METRICS
+
 
 @api_view(['GET'])
 def health(request):
@@ -13,3 +18,26 @@ def health(request):
         payload['debug'] = True
     return Response(payload)
 
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics_view(request):
+    """Operational counters aggregated across processes (staff only)."""
+    layer_config = settings.CHANNEL_LAYERS['default'].get('CONFIG', {})
+    return Response({
+        'realtime': metrics.snapshot(REALTIME_METRICS),
+        'channel_layer': {
+            'capacity': layer_config.get('capacity'),
+            'expiry': layer_config.get('expiry'),
+        },
+    })
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def realtime_token(request):
+    """Short-lived token for authenticating a WebSocket handshake without a session lookup."""
+    return Response({
+        'token': make_connection_token(request.user),
+        'expires_in': settings.WS_CONNECTION_TOKEN_MAX_AGE,
+    })
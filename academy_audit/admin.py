@@ -1,11 +1,14 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
+from academy.exports import ExportActionForm, export_csv_action, export_jsonl_action
+from academy.paginators import EstimatedCountAdminMixin
+
 from .models import AuditLog
 
 
 @admin.register(AuditLog)
-class AuditLogAdmin(admin.ModelAdmin):
+class AuditLogAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ("created_at", "action_badge", "actor_display", "subject_type", "subject_id", "message_preview")
     list_filter = ("action", "subject_type", "created_at")
     search_fields = ("action", "subject_type", "subject_id", "message", "actor__email")
@@ -13,6 +16,9 @@ class AuditLogAdmin(admin.ModelAdmin):
     list_per_page = 50
     date_hierarchy = 'created_at'
     ordering = ['-created_at']
+    list_select_related = ['actor']
+    actions = [export_csv_action, export_jsonl_action]
+    action_form = ExportActionForm
     
     def has_add_permission(self, request):
         return False  # Audit logs should not be manually created
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from academy_audit import retention
+
+
+class Command(BaseCommand):
+    help = "Create upcoming audit partitions and move old months to compressed JSONL archives."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            help="Archive months strictly before YYYY-MM (default: keep AUDIT_RETENTION_MONTHS months).",
+        )
+        parser.add_argument("--dir", dest="directory", help="Archive directory (default: AUDIT_ARCHIVE_DIR).")
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived.")
+
+    def handle(self, *args, **options):
+        created = retention.ensure_partitions()
+        for name in created:
+            self.stdout.write(f"Created partition {name}")
+
+        if options["before"]:
+            try:
+                before = retention.parse_month(options["before"])
+            except ValueError:
+                raise CommandError("--before must look like YYYY-MM")
+        else:
+            keep = getattr(settings, "AUDIT_RETENTION_MONTHS", 12)
+            before = retention.add_months(retention.month_start(timezone.localdate()), -keep)
+
+        months = retention.months_with_rows(before)
+        if not months:
+            self.stdout.write("Nothing to archive.")
+            return
+
+        total = 0
+        for month in months:
+            count = retention.archive_month(month, options["directory"], dry_run=options["dry_run"])
+            total += count
+            verb = "Would archive" if options["dry_run"] else "Archived"
+            self.stdout.write(f"{verb} {count} event(s) from {month:%Y-%m}")
+        self.stdout.write(self.style.SUCCESS(f"{total} event(s) in {len(months)} month(s)."))
@@ -0,0 +1,41 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academy_audit import retention
+
+
+class Command(BaseCommand):
+    help = "Print archived audit events as JSON lines without restoring them."
+
+    def add_arguments(self, parser):
+        parser.add_argument("month", nargs="?", help="Month to read (YYYY-MM); omit to list archived months.")
+        parser.add_argument("--dir", dest="directory", help="Archive directory (default: AUDIT_ARCHIVE_DIR).")
+        parser.add_argument("--action")
+        parser.add_argument("--actor", dest="actor_id", type=int)
+        parser.add_argument("--subject-type")
+        parser.add_argument("--subject-id")
+        parser.add_argument("--limit", type=int, default=0)
+
+    def handle(self, *args, **options):
+        if not options["month"]:
+            for month in retention.archived_months(options["directory"]):
+                self.stdout.write(f"{month:%Y-%m}")
+            return
+        try:
+            month = retention.parse_month(options["month"])
+        except ValueError:
+            raise CommandError("month must look like YYYY-MM")
+
+        events = retention.read_archive(
+            month,
+            options["directory"],
+            action=options["action"],
+            actor_id=options["actor_id"],
+            subject_type=options["subject_type"],
+            subject_id=options["subject_id"],
+        )
+        for count, event in enumerate(events, start=1):
+            self.stdout.write(json.dumps(event, ensure_ascii=False))
+            if options["limit"] and count >= options["limit"]:
+                break
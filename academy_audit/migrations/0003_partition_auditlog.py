@@ -0,0 +1,99 @@
+"""
+Turn the audit log into a table partitioned by month on PostgreSQL.
+
+The existing table is renamed, a partitioned table with the same columns is
+created (the primary key must include the partition key, so it becomes
+(id, created_at)), rows are copied across and the old table is dropped. Rows
+older than the first monthly partition land in the default partition and are
+archived by range (see academy_audit.retention).
+
+Other databases keep the plain table; the operation is a no-op there.
+"""
+from datetime import date, datetime, time
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+
+TABLE = "academy_audit_auditlog"
+OLD = f"{TABLE}_unpartitioned"
+MONTHS_AHEAD = 3
+
+INDEXES = {
+    "academy_aud_action_1e4aae_idx": "(action, created_at)",
+    "academy_aud_subject_f255a4_idx": "(subject_type, subject_id)",
+    "academy_aud_actor_i_438a98_idx": "(actor_id, created_at)",
+    "academy_audit_auditlog_actor_id_idx": "(actor_id)",
+}
+
+
+def _month(offset):
+    today = timezone.localdate()
+    index = today.year * 12 + today.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month):
+    value = datetime.combine(month, time.min)
+    return timezone.make_aware(value) if settings.USE_TZ else value
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    execute = schema_editor.execute
+
+    execute(f'LOCK TABLE "{TABLE}" IN ACCESS EXCLUSIVE MODE')
+    execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD}"')
+    execute(f"""
+        CREATE TABLE "{TABLE}" (
+            "id" bigint GENERATED BY DEFAULT AS IDENTITY,
+            "action" varchar(128) NOT NULL,
+            "subject_type" varchar(64) NOT NULL,
+            "subject_id" varchar(64) NOT NULL,
+            "message" text NOT NULL,
+            "metadata" jsonb NULL,
+            "created_at" timestamp with time zone NOT NULL,
+            "actor_id" bigint NULL,
+            PRIMARY KEY ("id", "created_at")
+        ) PARTITION BY RANGE ("created_at")
+    """)
+    execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+    for offset in range(MONTHS_AHEAD + 1):
+        month = _month(offset)
+        execute(
+            f'CREATE TABLE "{TABLE}_p{month:%Y%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+            [_bound(month), _bound(_month(offset + 1))],
+        )
+
+    columns = '"id", "action", "subject_type", "subject_id", "message", "metadata", "created_at", "actor_id"'
+    execute(f'INSERT INTO "{TABLE}" ({columns}) OVERRIDING SYSTEM VALUE SELECT {columns} FROM "{OLD}"')
+    execute(
+        f"SELECT setval(pg_get_serial_sequence('\"{TABLE}\"', 'id'), "
+        f'COALESCE((SELECT MAX("id") FROM "{TABLE}"), 0) + 1, false)'
+    )
+    execute(f'DROP TABLE "{OLD}"')
+
+    execute(
+        f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_actor_id_fk" FOREIGN KEY ("actor_id") '
+        f'REFERENCES "{user_table}" ("id") ON DELETE SET NULL DEFERRABLE INITIALLY DEFERRED'
+    )
+    for name, columns in INDEXES.items():
+        execute(f'CREATE INDEX "{name}" ON "{TABLE}" {columns}')
+
+
+class Migration(migrations.Migration):
+    # The table is locked and rewritten in one transaction.
+    atomic = True
+
+    dependencies = [
+        ("academy_audit", "0002_created_at_default"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # Not reversible in place: restore from a dump or re-create the plain table.
+        migrations.RunPython(partition, migrations.RunPython.noop),
+    ]
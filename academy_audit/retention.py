@@ -0,0 +1,300 @@
+"""
+Audit log retention: monthly partitions and cold archives.
+
+On PostgreSQL ``academy_audit_auditlog`` is a table partitioned by month on
+``created_at`` (see migration 0003): ``academy_audit_auditlog_p202601`` holds
+January 2026 and ``academy_audit_auditlog_default`` catches anything without a
+partition (rows from before partitioning). ``ensure_partitions()`` creates the
+upcoming months ahead of time.
+
+``archive_month()`` moves one month out of the database into
+``AUDIT_ARCHIVE_DIR/audit-YYYY-MM.jsonl.gz``. On PostgreSQL the month's
+partition is detached first, so late inserts cannot slip between export and
+drop, then exported and dropped. A failed export re-attaches the partition.
+A run that died before the drop leaves a detached ``..._pYYYYMM`` table
+behind, and the next run finds it and resumes from it. On other databases, or
+for rows that live in the default partition, the month is exported by range
+and deleted.
+
+``read_archive()`` streams archived months back with simple filters, without
+restoring anything into the database.
+"""
+from __future__ import annotations
+
+import glob
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import date, datetime, time
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+TABLE = AuditLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+COLUMNS = ("id", "actor_id", "action", "subject_type", "subject_id", "message", "metadata", "created_at")
+
+_PARTITION = re.compile(rf"^{re.escape(TABLE)}_p(\d{{4}})(\d{{2}})$")
+_ARCHIVE_FILE = re.compile(r"^audit-(\d{4})-(\d{2})(?:\.(\d+))?\.jsonl\.gz$")
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_month(value: str) -> date:
+    """``"2026-01"`` -> date(2026, 1, 1); raise ValueError otherwise."""
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bounds(month: date) -> tuple[datetime, datetime]:
+    tz = timezone.get_current_timezone() if settings.USE_TZ else None
+    start = datetime.combine(month, time.min)
+    end = datetime.combine(add_months(month, 1), time.min)
+    if tz is not None:
+        start, end = timezone.make_aware(start, tz), timezone.make_aware(end, tz)
+    return start, end
+
+
+def archive_dir() -> str:
+    return getattr(settings, "AUDIT_ARCHIVE_DIR", os.path.join(settings.BASE_DIR, "var", "audit_archive"))
+
+
+# --- Partitions (PostgreSQL) ---------------------------------------------
+
+def is_partitioned() -> bool:
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions() -> set[str]:
+    if not is_partitioned():
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s",
+            [TABLE],
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def detached_partitions() -> set[str]:
+    """Monthly partition tables that are no longer attached (an archive run died after DETACH)."""
+    if not is_partitioned():
+        return set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_class c WHERE c.relkind = 'r' AND c.relname LIKE %s "
+            "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)",
+            [f"{TABLE}_p%"],
+        )
+        return {row[0] for row in cursor.fetchall() if _PARTITION.match(row[0])}
+
+
+def partition_month(name: str) -> date:
+    match = _PARTITION.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def ensure_partitions(months_ahead: int = 3) -> list[str]:
+    """Create partitions from this month to ``months_ahead`` months out; return the new ones."""
+    if not is_partitioned():
+        return []
+    existing = existing_partitions()
+    created = []
+    current = month_start(timezone.localdate())
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        start, end = _bounds(month)
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                    [start, end],
+                )
+        except Exception:
+            # Usually rows for that month already sit in the default partition.
+            logger.exception("Could not create audit partition %s", name)
+            continue
+        created.append(name)
+    return created
+
+
+# --- Archiving -----------------------------------------------------------
+
+def months_with_rows(before: date) -> list[date]:
+    """Months older than ``before`` with rows still in the database, detached partitions included."""
+    months = {month for month in map(partition_month, detached_partitions()) if month < before}
+    first = AuditLog.objects.order_by("created_at").values_list("created_at", flat=True).first()
+    if first is not None:
+        month = month_start(timezone.localtime(first) if settings.USE_TZ else first)
+        while month < before:
+            start, end = _bounds(month)
+            if AuditLog.objects.filter(created_at__gte=start, created_at__lt=end).exists():
+                months.add(month)
+            month = add_months(month, 1)
+    return sorted(months)
+
+
+def _archive_target(month: date, directory: str) -> str:
+    base = os.path.join(directory, f"audit-{month:%Y-%m}")
+    path, part = f"{base}.jsonl.gz", 1
+    # A month archived twice (e.g. late rows in the default partition) gets a numbered part.
+    while os.path.exists(path):
+        part += 1
+        path = f"{base}.{part}.jsonl.gz"
+    return path
+
+
+def _normalise(row: tuple) -> dict:
+    record = dict(zip(COLUMNS, row))
+    if isinstance(record["metadata"], str):
+        try:
+            record["metadata"] = json.loads(record["metadata"])
+        except ValueError:
+            pass
+    created_at = record["created_at"]
+    if isinstance(created_at, datetime):
+        record["created_at"] = created_at.isoformat()
+    return record
+
+
+def _export(sql: str, params: list, path: str) -> int:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    count = 0
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as out, connection.chunked_cursor() as cursor:
+                cursor.execute(sql, params)
+                while True:
+                    rows = cursor.fetchmany(2000)
+                    if not rows:
+                        break
+                    for row in rows:
+                        out.write(json.dumps(_normalise(row), separators=(",", ":"), default=str).encode())
+                        out.write(b"\n")
+                    count += len(rows)
+            # The file must be on disk before the rows are dropped.
+            raw.flush()
+            os.fsync(raw.fileno())
+        if count:
+            os.replace(tmp, path)
+        else:
+            os.unlink(tmp)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    return count
+
+
+def _reattach(name: str, start: datetime, end: datetime) -> None:
+    try:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'ALTER TABLE "{TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+                [start, end],
+            )
+    except Exception:
+        # Left detached; the next archive run picks it up from detached_partitions().
+        logger.exception("Could not re-attach audit partition %s", name)
+
+
+def archive_month(month: date, directory: Optional[str] = None, dry_run: bool = False) -> int:
+    """Move one month of audit rows into a compressed JSONL file; return rows archived."""
+    directory = directory or archive_dir()
+    start, end = _bounds(month)
+    columns = ", ".join(COLUMNS)
+    in_range = AuditLog.objects.filter(created_at__gte=start, created_at__lt=end)
+    name = partition_name(month)
+    attached = name in existing_partitions()
+    detached = not attached and name in detached_partitions()
+    if dry_run:
+        count = in_range.count()
+        if detached:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM "{name}"')
+                count += cursor.fetchone()[0]
+        return count
+    archived = 0
+
+    if attached or detached:
+        if attached:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"')
+        try:
+            archived += _export(f'SELECT {columns} FROM "{name}" ORDER BY id', [], _archive_target(month, directory))
+        except BaseException:
+            if attached:
+                _reattach(name, start, end)
+            raise
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE "{name}"')
+
+    # Rows outside any monthly partition (default partition, or no partitioning).
+    max_id = in_range.order_by("-id").values_list("id", flat=True).first()
+    if max_id is not None:
+        archived += _export(
+            f'SELECT {columns} FROM "{TABLE}" WHERE created_at >= %s AND created_at < %s AND id <= %s ORDER BY id',
+            [connection.ops.adapt_datetimefield_value(start), connection.ops.adapt_datetimefield_value(end), max_id],
+            _archive_target(month, directory),
+        )
+        in_range.filter(id__lte=max_id).delete()
+    return archived
+
+
+# --- Reading archives ------------------------------------------------------
+
+def archived_months(directory: Optional[str] = None) -> list[date]:
+    months = set()
+    for path in glob.glob(os.path.join(directory or archive_dir(), "audit-*.jsonl.gz")):
+        match = _ARCHIVE_FILE.match(os.path.basename(path))
+        if match:
+            months.add(date(int(match.group(1)), int(match.group(2)), 1))
+    return sorted(months)
+
+
+def archive_files(month: date, directory: Optional[str] = None) -> list[str]:
+    paths = glob.glob(os.path.join(directory or archive_dir(), f"audit-{month:%Y-%m}*.jsonl.gz"))
+    return sorted(p for p in paths if _ARCHIVE_FILE.match(os.path.basename(p)))
+
+
+def read_archive(month: date, directory: Optional[str] = None, **filters) -> Iterator[dict]:
+    """Stream archived events for ``month``; ``filters`` match fields exactly (e.g. ``action=...``)."""
+    wanted = {key: (str(value) if key == "subject_id" else value) for key, value in filters.items() if value is not None}
+    for path in archive_files(month, directory):
+        with gzip.open(path, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                record = json.loads(line)
+                if all(record.get(key) == value for key, value in wanted.items()):
+                    yield record
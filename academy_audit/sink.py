@@ -0,0 +1,132 @@
+"""
+Audit sink.
+
+``record()`` is the single entry point for writing audit events.
+
+* ``durable=True`` inserts the row immediately, inside the caller's
+  transaction, so the audit trail commits or rolls back with the action.
+  Use it for anything financial: payment approvals and rejections, which are
+  today's only callers, always pass it.
+* Otherwise the event joins a per-process buffer once the caller's transaction
+  commits (rolled-back actions are never audited). The buffer is written with
+  one ``bulk_create`` when it reaches AUDIT_BUFFER_SIZE events, or by a timer
+  thread AUDIT_FLUSH_INTERVAL seconds after its first event, so a quiet
+  process does not sit on events. With ``AUDIT_SINK_MODE = "celery"`` the
+  batch is handed to a Celery task instead of being written by the web process.
+  The buffered path is for high-volume, non-financial events such as
+  enrollments, lesson completions and content edits, where losing a few
+  seconds of history is acceptable.
+
+Buffered events are flushed at interpreter exit, but a hard crash can lose up
+to one buffer's worth of them; that is the trade-off for hot paths.
+"""
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import AuditLog
+
+
+logger = logging.getLogger(__name__)
+
+_buffer: list[dict] = []
+_lock = threading.Lock()
+_timer: Optional[threading.Timer] = None
+
+
+def event(action: str, *, actor=None, subject_type: str = "", subject_id=None, message: str = "", metadata: Optional[dict] = None) -> dict:
+    """Build an event for ``record_many()``; the timestamp is taken now."""
+    return {
+        "actor_id": getattr(actor, "pk", actor),
+        "action": action,
+        "subject_type": subject_type or "",
+        "subject_id": str(subject_id) if subject_id is not None else "",
+        "message": message or "",
+        "metadata": metadata,
+        "created_at": timezone.now().isoformat(),
+    }
+
+
+def _to_row(event: dict) -> AuditLog:
+    return AuditLog(**{**event, "created_at": parse_datetime(event["created_at"])})
+
+
+def record(action: str, *, durable: bool = False, **fields) -> None:
+    record_many([event(action, **fields)], durable=durable)
+
+
+def record_many(events: list[dict], *, durable: bool = False) -> None:
+    if not events:
+        return
+    if durable:
+        AuditLog.objects.bulk_create([_to_row(e) for e in events])
+        return
+    transaction.on_commit(lambda: _enqueue(events))
+
+
+def _enqueue(events: list[dict]) -> None:
+    global _timer
+    with _lock:
+        _buffer.extend(events)
+        due = len(_buffer) >= getattr(settings, "AUDIT_BUFFER_SIZE", 100)
+        # Timers don't survive a fork, so a dead one is replaced too.
+        if not due and (_timer is None or not _timer.is_alive()):
+            _timer = threading.Timer(getattr(settings, "AUDIT_FLUSH_INTERVAL", 5.0), _flush_on_timer)
+            _timer.daemon = True
+            _timer.start()
+    if due:
+        flush()
+
+
+def _flush_on_timer() -> None:
+    try:
+        flush()
+    finally:
+        # The timer thread's own connection; request threads manage theirs.
+        connections.close_all()
+
+
+def pending() -> int:
+    return len(_buffer)
+
+
+def flush() -> int:
+    """Write (or hand off) everything buffered in this process; return the count."""
+    global _timer
+    with _lock:
+        batch = list(_buffer)
+        _buffer.clear()
+        if _timer is not None:
+            # The next event starts a new interval.
+            _timer.cancel()
+            _timer = None
+    if not batch:
+        return 0
+
+    if getattr(settings, "AUDIT_SINK_MODE", "buffer") == "celery":
+        try:
+            from .tasks import write_audit_events
+            write_audit_events.apply_async(args=[batch], ignore_result=True)
+            return len(batch)
+        except Exception as exc:  # pragma: no cover - defensive guard for runtime outages
+            logger.warning("Audit batch could not be queued; writing inline", exc_info=exc)
+    write_events(batch)
+    return len(batch)
+
+
+def write_events(events: list[dict]) -> None:
+    try:
+        AuditLog.objects.bulk_create([_to_row(e) for e in events], batch_size=500)
+    except Exception:
+        logger.exception("Dropped %d audit event(s)", len(events))
+
+
+atexit.register(flush)
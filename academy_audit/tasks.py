@@ -0,0 +1,20 @@
+"""
+Celery tasks for the audit sink.
+"""
+from celery import shared_task
+
+
+@shared_task
+def write_audit_events(events):
+    """Persist a batch of buffered audit events (see academy_audit.sink)."""
+    from .sink import write_events
+    write_events(events)
+    return f'Wrote {len(events)} audit event(s)'
+
+
+@shared_task
+def ensure_audit_partitions():
+    """Keep monthly audit partitions created ahead of time (PostgreSQL only)."""
+    from .retention import ensure_partitions
+    created = ensure_partitions()
+    return f'Created {len(created)} audit partition(s)'
@@ -0,0 +1,194 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from academy import exports
+from academy.paginators import EstimatedCountPaginator
+
+from academy_audit import sink
+from academy_audit.models import AuditLog
+
+
+class AuditSinkTests(TestCase):
+    def tearDown(self):
+        sink.flush()
+
+    def test_durable_events_are_written_in_the_transaction(self):
+        sink.record("payment_proof.approved", durable=True, subject_type="course", subject_id=7)
+        self.assertEqual(AuditLog.objects.get().subject_id, "7")
+
+    @override_settings(AUDIT_BUFFER_SIZE=3, AUDIT_FLUSH_INTERVAL=3600)
+    def test_buffered_events_flush_in_bulk_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            sink.record("enrollment.created", subject_id=1)
+            sink.record("enrollment.created", subject_id=2)
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(sink.pending(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sink.record("enrollment.created", subject_id=3)
+        self.assertEqual(sink.pending(), 0)
+        self.assertEqual(sorted(AuditLog.objects.values_list("subject_id", flat=True)), ["1", "2", "3"])
+
+    @override_settings(AUDIT_BUFFER_SIZE=100, AUDIT_FLUSH_INTERVAL=0.01)
+    def test_buffered_events_flush_on_a_timer(self):
+        import threading
+        from unittest.mock import patch
+
+        flushed = threading.Event()
+        with patch.object(sink, "flush", side_effect=flushed.set):
+            with self.captureOnCommitCallbacks(execute=True):
+                sink.record("enrollment.created", subject_id=1)
+            # Nothing else is recorded; the timer alone has to flush the buffer.
+            self.assertTrue(flushed.wait(2))
+        self.assertEqual(sink.pending(), 1)
+
+    def test_rolled_back_events_are_not_buffered(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            sink.record("enrollment.created", subject_id=1)
+        self.assertEqual(sink.pending(), 0)
+
+
+class AuditArchiveTests(TestCase):
+    def test_old_months_move_to_archives_that_stay_queryable(self):
+        from datetime import date, datetime
+
+        from django.utils import timezone
+
+        from academy_audit import retention
+
+        old = timezone.make_aware(datetime(2024, 1, 15, 12, 0))
+        AuditLog.objects.create(action="payment_proof.approved", subject_id="1", created_at=old, metadata={"n": 1})
+        AuditLog.objects.create(action="payment_proof.rejected", subject_id="2", created_at=old)
+        AuditLog.objects.create(action="payment_proof.approved", subject_id="3")
+
+        with tempfile.TemporaryDirectory() as directory:
+            call_command("archive_audit_logs", before="2024-02", directory=directory, stdout=io.StringIO())
+
+            self.assertEqual(list(AuditLog.objects.values_list("subject_id", flat=True)), ["3"])
+            self.assertEqual(retention.archived_months(directory), [date(2024, 1, 1)])
+            approved = list(retention.read_archive(date(2024, 1, 1), directory, action="payment_proof.approved"))
+            self.assertEqual([(e["subject_id"], e["metadata"]) for e in approved], [("1", {"n": 1})])
+
+    def test_detached_partitions_left_by_a_failed_run_are_resumed(self):
+        from datetime import date
+        from unittest.mock import patch
+
+        from academy_audit import retention
+
+        leftover = retention.partition_name(date(2023, 5, 1))
+        with patch.object(retention, "detached_partitions", return_value={leftover}):
+            self.assertEqual(retention.months_with_rows(date(2024, 1, 1)), [date(2023, 5, 1)])
+            self.assertEqual(retention.months_with_rows(date(2023, 5, 1)), [])
+
+
+class AuditExportTests(TestCase):
+    def test_gzip_export_resumes_from_the_watermark(self):
+        for n in range(5):
+            AuditLog.objects.create(action="enrollment.created", subject_type="course", subject_id=str(n))
+        ids = list(AuditLog.objects.order_by("id").values_list("id", flat=True))
+
+        body = b"".join(exports.export_stream(AuditLog.objects.all(), ("id", "action"), fmt="jsonl", after_id=ids[2]))
+        rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], ids[3:])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.csv.gz")
+            call_command("export_data", "audit", output=path, after_id=ids[1], stderr=io.StringIO())
+            late = AuditLog.objects.create(action="enrollment.created", subject_id="5")
+            call_command("export_data", "audit", output=path, resume=True, stderr=io.StringIO())
+            with gzip.open(path, "rt") as lines:
+                exported = [line.split(",", 1)[0] for line in lines]
+        self.assertEqual(exported[0], "id")
+        self.assertEqual([int(i) for i in exported[1:]], ids[2:] + [late.id])
+
+    def test_csv_resume_reads_the_last_record_not_the_last_line(self):
+        import csv
+
+        first = AuditLog.objects.create(action="course.updated", message="line one\nline two\n3,4")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "audit.csv.gz")
+            call_command("export_data", "audit", output=path, stderr=io.StringIO())
+            second = AuditLog.objects.create(action="course.updated", message="after")
+            call_command("export_data", "audit", output=path, resume=True, stderr=io.StringIO())
+            with gzip.open(path, "rt", newline="") as lines:
+                records = list(csv.reader(lines))
+        self.assertEqual([int(record[0]) for record in records[1:]], [first.id, second.id])
+        self.assertEqual(records[1][7], "line one\nline two\n3,4")
+
+    def test_resume_cuts_a_truncated_export_back_to_its_last_complete_record(self):
+        import csv
+
+        rows = [
+            AuditLog.objects.create(action="course.updated", message=f"note {n}\n{os.urandom(40).hex()}")
+            for n in range(30)
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            for fmt in ("csv", "jsonl"):
+                path = os.path.join(tmp, f"audit.{fmt}.gz")
+                call_command("export_data", "audit", format=fmt, output=path, stderr=io.StringIO())
+                with open(path, "r+b") as raw:
+                    raw.truncate(os.path.getsize(path) // 2)
+                with self.assertRaises(EOFError):
+                    with gzip.open(path, "rb") as lines:
+                        lines.read()
+
+                err = io.StringIO()
+                call_command("export_data", "audit", format=fmt, output=path, resume=True, stderr=err)
+                self.assertIn("cut short", err.getvalue())
+                with gzip.open(path, "rt", newline="") as lines:
+                    if fmt == "csv":
+                        records = list(csv.reader(lines))
+                        self.assertEqual(records[0][0], "id")
+                        ids = [int(record[0]) for record in records[1:]]
+                    else:
+                        ids = [json.loads(line)["id"] for line in lines]
+                self.assertEqual(ids, [row.id for row in rows], fmt)
+
+    def test_admin_export_action_resumes_after_an_id(self):
+        from django.contrib.auth import get_user_model
+        from django.urls import reverse
+
+        rows = [AuditLog.objects.create(action="enrollment.created", subject_id=str(n)) for n in range(3)]
+        admin = get_user_model().objects.create_superuser(email="auditor@example.com", password="pw")
+        self.client.force_login(admin)
+        resp = self.client.post(
+            reverse("admin:academy_audit_auditlog_changelist"),
+            {"action": "export_jsonl", "_selected_action": [row.pk for row in rows], "after_id": rows[0].pk},
+            secure=True,
+        )
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(f"-after-{rows[0].pk}-", resp["Content-Disposition"])
+        body = gzip.decompress(b"".join(resp.streaming_content)).decode()
+        self.assertEqual([json.loads(line)["id"] for line in body.splitlines()], [rows[1].pk, rows[2].pk])
+
+
+@override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=3, ADMIN_EXACT_COUNT_LIMIT=2)
+class EstimatedCountPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        AuditLog.objects.bulk_create(AuditLog(action="login") for _ in range(5))
+
+    def test_large_tables_reuse_a_cached_count(self):
+        first = EstimatedCountPaginator(AuditLog.objects.all(), 2)
+        self.assertEqual((first.count, first.estimated), (5, False))
+
+        AuditLog.objects.create(action="login")
+        with self.assertNumQueries(0):
+            second = EstimatedCountPaginator(AuditLog.objects.all(), 2)
+            self.assertEqual((second.count, second.estimated), (5, True))
+
+    def test_filtered_counts_are_exact_up_to_the_limit(self):
+        AuditLog.objects.create(action="logout")
+        small = EstimatedCountPaginator(AuditLog.objects.filter(action="logout"), 2)
+        self.assertEqual((small.count, small.estimated), (1, False))
+
+        large = EstimatedCountPaginator(AuditLog.objects.filter(action="login"), 2)
+        self.assertTrue(large.estimated)
+        self.assertGreaterEqual(large.count, 5)
@@ -1,9 +1,34 @@
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.html import format_html
 
+from . import archive
 from .models import Course, CourseCategory, Lesson, Module, ContentStatus
 
 
+def _count_of(queryset, outer_field):
+    """Correlated COUNT subquery; unlike Count() joins, several can sit side by side."""
+    counted = (
+        queryset.filter(**{outer_field: OuterRef('pk')})
+        .order_by()
+        .values(outer_field)
+        .annotate(n=Count('pk'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+class ModuleListFilter(admin.RelatedFieldListFilter):
+    """Module filter whose choice labels (course slug + module slug) load in one query."""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or ['course', 'order']
+        return [(module.pk, str(module)) for module in Module.objects.select_related('course').order_by(*ordering)]
+
+
 class LessonInline(admin.TabularInline):
     model = Lesson
     extra = 0
@@ -39,10 +64,13 @@ class CourseCategoryAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(course_total=Count('courses'))
+    
     def course_count(self, obj):
-        count = obj.courses.count()
-        return format_html('<span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px;">{}</span>', count)
+        return format_html('<span style="background: #e3f2fd; padding: 2px 6px; border-radius: 3px;">{}</span>', obj.course_total)
     course_count.short_description = 'Courses'
+    course_count.admin_order_field = 'course_total'
 
 
 @admin.register(Course)
@@ -54,8 +82,10 @@ class CourseAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ['order']
     list_per_page = 20
+    list_select_related = ['category']
     inlines = [ModuleInline]
     date_hierarchy = 'created_at'
+    actions = ['export_archive']
     
     fieldsets = (
         ('Basic Information', {
@@ -90,13 +120,32 @@ class CourseAdmin(admin.ModelAdmin):
         return format_html('<span style="color: #10b981; font-weight: bold;">FREE</span>')
     price_display.short_description = 'Price'
     
+    @admin.action(description="⬇️ Export selected as course archive", permissions=["view"])
+    def export_archive(self, request, queryset):
+        response = StreamingHttpResponse(
+            archive.export_archive(Course.objects.filter(pk__in=queryset.values('pk'))),
+            content_type="application/gzip",
+        )
+        stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+        response["Content-Disposition"] = f'attachment; filename="courses-{stamp}.jsonl.gz"'
+        response["Cache-Control"] = "no-store"
+        return response
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            module_total=_count_of(Module.objects.all(), 'course'),
+            lesson_total=_count_of(Lesson.objects.all(), 'module__course'),
+        )
+    
     def module_count(self, obj):
-        return obj.modules.count()
+        return obj.module_total
     module_count.short_description = 'Modules'
+    module_count.admin_order_field = 'module_total'
     
     def lesson_count(self, obj):
-        return Lesson.objects.filter(module__course=obj).count()
+        return obj.lesson_total
     lesson_count.short_description = 'Lessons'
+    lesson_count.admin_order_field = 'lesson_total'
 
 
 @admin.register(Module)
@@ -110,21 +159,25 @@ class ModuleAdmin(admin.ModelAdmin):
     list_select_related = ['course']
     inlines = [LessonInline]
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(lesson_total=Count('lessons'))
+    
     def lesson_count(self, obj):
-        return obj.lessons.count()
+        return obj.lesson_total
     lesson_count.short_description = 'Lessons'
+    lesson_count.admin_order_field = 'lesson_total'
 
 
 @admin.register(Lesson)
 class LessonAdmin(admin.ModelAdmin):
     list_display = ['title', 'status_badge', 'module', 'has_video', 'estimated_minutes', 'order']
-    list_filter = ['status', 'module']
+    list_filter = ['status', ('module', ModuleListFilter)]
     search_fields = ['title', 'slug', 'module__title']
     ordering = ['module', 'order']
     prepopulated_fields = {'slug': ('title',)}
     list_editable = ['order']
     list_per_page = 30
-    list_select_related = ['module']
+    list_select_related = ['module__course']
     
     def status_badge(self, obj):
         colors = {
@@ -8,3 +8,4 @@ class AcademyCoursesConfig(AppConfig):
     def ready(self):
         # Enable real-time course sync signals
         import academy_courses.signals_realtime  # noqa: F401
+        import academy_courses.signals  # noqa: F401
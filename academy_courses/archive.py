@@ -0,0 +1,381 @@
+"""
+Course archives: a course tree (category, course, modules, lessons) as one
+versioned, gzip-compressed JSON-lines file, for moving content between
+environments.
+
+The first line is a header naming the format and version; every other line is
+one record with a ``type`` and the model fields, parents referenced by slug::
+
+	{"type": "archive", "format": "academy-course-archive", "version": 1, ...}
+	{"type": "category", "slug": "web", "name": "Web", ...}
+	{"type": "course", "slug": "django", "category": "web", ...}
+	{"type": "module", "course": "django", "slug": "basics", ...}
+	{"type": "lesson", "course": "django", "module": "basics", "slug": "intro", ...}
+
+Import happens in three steps:
+
+* ``read_archive()`` parses the file line by line;
+* ``plan_import()`` validates every record and diffs it against the rows that
+  already exist (matched by slug), raising ``ArchiveError`` with all problems
+  before anything is written;
+* ``apply_import()`` writes the plan with ``bulk_create``/``bulk_update`` in
+  one transaction.
+
+Bulk writes skip model signals, so ``content_imported`` is sent once the
+transaction commits; the catalog index and page cache listen to it and the
+imported lessons are queued for rendering. Instructors are not exported (user
+accounts differ between environments), and rows missing from an archive are
+left alone.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator, Optional
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_slug
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from academy import exports
+
+from .models import ContentStatus, Course, CourseCategory, Lesson, Module
+from .rendering import body_hash, queue_render
+from .signals import content_imported
+
+
+FORMAT = 'academy-course-archive'
+VERSION = 1
+BATCH_SIZE = 500
+
+CATEGORY_FIELDS = ('name', 'description', 'order')
+COURSE_FIELDS = (
+	'title', 'description', 'thumbnail', 'level', 'duration', 'price', 'status',
+	'published_at', 'scheduled_at', 'order', 'metadata',
+)
+MODULE_FIELDS = ('title', 'description', 'order', 'metadata')
+LESSON_FIELDS = (
+	'title', 'description', 'body', 'youtube_url', 'estimated_minutes', 'difficulty', 'order',
+	'status', 'published_at', 'scheduled_at', 'metadata',
+)
+DATETIME_FIELDS = frozenset({'published_at', 'scheduled_at'})
+NUMBER_FIELDS = {'price': (int, float), 'order': (int,), 'estimated_minutes': (int,)}
+NULLABLE_FIELDS = frozenset({'estimated_minutes', 'metadata'}) | DATETIME_FIELDS
+SLUG_KEYS = frozenset({'slug', 'course', 'module'})
+MODELS = {'category': CourseCategory, 'course': Course, 'module': Module, 'lesson': Lesson}
+REQUIRED = {
+	'category': ('slug', 'name'),
+	'course': ('slug', 'title'),
+	'module': ('course', 'slug', 'title'),
+	'lesson': ('course', 'module', 'slug', 'title'),
+}
+
+
+class ArchiveError(ValueError):
+	def __init__(self, errors: list[str]):
+		self.errors = errors
+		super().__init__('\n'.join(errors))
+
+
+# -- export -------------------------------------------------------------------
+
+def _record(kind: str, values: dict, **parents) -> bytes:
+	record = {'type': kind, **parents, **{key: exports._plain(value) for key, value in values.items()}}
+	return json.dumps(record, ensure_ascii=False, default=str).encode() + b'\n'
+
+
+def export_records(courses) -> Iterator[bytes]:
+	"""JSON lines for ``courses`` and everything under them, parents before children."""
+	yield _record('archive', {'format': FORMAT, 'version': VERSION, 'exported_at': timezone.now()})
+	courses = courses.order_by('order', 'slug')
+	categories = CourseCategory.objects.filter(courses__in=courses).distinct().order_by('order', 'slug')
+	for category in categories.values('slug', *CATEGORY_FIELDS):
+		yield _record('category', category)
+	for course in courses.values('id', 'slug', 'category__slug', *COURSE_FIELDS).iterator(chunk_size=BATCH_SIZE):
+		course_id, category = course.pop('id'), course.pop('category__slug')
+		yield _record('course', course, category=category)
+		modules = Module.objects.filter(course_id=course_id).order_by('order', 'slug')
+		for module in modules.values('slug', *MODULE_FIELDS):
+			yield _record('module', module, course=course['slug'])
+		lessons = (
+			Lesson.objects.filter(module__course_id=course_id)
+			.order_by('module__order', 'module__slug', 'order', 'slug')
+			.values('module__slug', 'slug', *LESSON_FIELDS)
+		)
+		for lesson in lessons.iterator(chunk_size=BATCH_SIZE):
+			module = lesson.pop('module__slug')
+			yield _record('lesson', lesson, course=course['slug'], module=module)
+
+
+def export_archive(courses) -> Iterator[bytes]:
+	return exports.gzip_stream(export_records(courses))
+
+
+# -- import -------------------------------------------------------------------
+
+def read_archive(fileobj: IO[bytes]) -> Iterator[tuple[int, dict]]:
+	"""(line number, record) pairs from a gzip (or plain) archive, header checked first."""
+	head = fileobj.read(2)
+	stream = io.BufferedReader(_Prefixed(head, fileobj))
+	if head == b'\x1f\x8b':
+		stream = gzip.GzipFile(fileobj=stream)
+	lines = io.TextIOWrapper(stream, encoding='utf-8')
+	header = False
+	for number, line in enumerate(lines, start=1):
+		if not line.strip():
+			continue
+		try:
+			record = json.loads(line)
+		except ValueError as exc:
+			raise ArchiveError([f'line {number}: not valid JSON ({exc})']) from None
+		if not isinstance(record, dict):
+			raise ArchiveError([f'line {number}: expected an object'])
+		if not header:
+			# The first record, whatever blank lines come before it, must be the header.
+			if record.get('type') != 'archive' or record.get('format') != FORMAT:
+				raise ArchiveError([f'line {number}: not a {FORMAT} file'])
+			if record.get('version') != VERSION:
+				raise ArchiveError([f"line {number}: unsupported archive version {record.get('version')!r} (expected {VERSION})"])
+			header = True
+			continue
+		yield number, record
+	if not header:
+		raise ArchiveError([f'not a {FORMAT} file (empty)'])
+
+
+class _Prefixed(io.RawIOBase):
+	"""Puts bytes already read (the gzip magic sniff) back in front of a stream."""
+
+	def __init__(self, prefix: bytes, raw: IO[bytes]):
+		self.prefix, self.raw = prefix, raw
+
+	def readable(self) -> bool:
+		return True
+
+	def readinto(self, buffer) -> int:
+		if self.prefix:
+			size = min(len(buffer), len(self.prefix))
+			buffer[:size], self.prefix = self.prefix[:size], self.prefix[size:]
+			return size
+		data = self.raw.read(len(buffer))
+		buffer[:len(data)] = data
+		return len(data)
+
+
+@dataclass
+class Change:
+	"""Rows of one model to write, each with the slug key of its parent row."""
+	created: list[tuple[object, object]] = field(default_factory=list)
+	updated: list[tuple[object, object]] = field(default_factory=list)
+	unchanged: int = 0
+
+	def summary(self) -> str:
+		return f'{len(self.created)} new, {len(self.updated)} changed, {self.unchanged} unchanged'
+
+
+@dataclass
+class ImportPlan:
+	categories: Change = field(default_factory=Change)
+	courses: Change = field(default_factory=Change)
+	modules: Change = field(default_factory=Change)
+	lessons: Change = field(default_factory=Change)
+	course_slugs: list[str] = field(default_factory=list)
+
+	def summary(self) -> dict[str, str]:
+		return {
+			'categories': self.categories.summary(),
+			'courses': self.courses.summary(),
+			'modules': self.modules.summary(),
+			'lessons': self.lessons.summary(),
+		}
+
+
+def _max_length(model, name: str) -> Optional[int]:
+	return model._meta.get_field(name).max_length
+
+
+def _clean(kind: str, number: int, record: dict, fields: Iterable[str], errors: list) -> dict:
+	problems = []
+	model = MODELS[kind]
+	for name in REQUIRED[kind]:
+		value = record.get(name)
+		if not isinstance(value, str) or not value.strip():
+			problems.append(f'needs a {name!r}')
+			continue
+		if name in SLUG_KEYS:
+			try:
+				validate_slug(value)
+			except ValidationError:
+				problems.append(f'{name} {value!r} is not a valid slug')
+				continue
+			# 'course' and 'module' are the parents' slugs.
+			limit = _max_length(MODELS.get(name, model), 'slug')
+			if limit and len(value) > limit:
+				problems.append(f'{name} is longer than {limit} characters')
+
+	values = {}
+	for name in fields:
+		if name not in record:
+			continue
+		value = record[name]
+		if value is None and name in NULLABLE_FIELDS:
+			pass
+		elif name in DATETIME_FIELDS:
+			parsed = parse_datetime(value) if isinstance(value, str) else None
+			if parsed is None:
+				problems.append(f'{name} {value!r} is not a datetime')
+				continue
+			value = parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+		elif name in NUMBER_FIELDS:
+			if isinstance(value, bool) or not isinstance(value, NUMBER_FIELDS[name]):
+				problems.append(f'{name} must be a number')
+				continue
+		elif name == 'status':
+			if value not in ContentStatus.values:
+				problems.append(f'unknown status {value!r}')
+				continue
+		elif name != 'metadata':
+			if not isinstance(value, str):
+				problems.append(f'{name} must be a string')
+				continue
+			limit = _max_length(model, name)
+			if limit and len(value) > limit:
+				problems.append(f'{name} is longer than {limit} characters')
+				continue
+		values[name] = value
+	errors.extend(f'line {number}: {kind} {problem}' for problem in problems)
+	return values
+
+
+def _diff(change: Change, existing, parent, values: dict, new, *, moved: bool = False) -> None:
+	if existing is None:
+		change.created.append((parent, new()))
+		return
+	dirty = moved
+	for name, value in values.items():
+		if getattr(existing, name) != value:
+			setattr(existing, name, value)
+			dirty = True
+	if dirty:
+		change.updated.append((parent, existing))
+	else:
+		change.unchanged += 1
+
+
+def plan_import(records: Iterable[tuple[int, dict]]) -> ImportPlan:
+	"""Validate the whole archive and diff it against the database; nothing is written."""
+	errors: list[str] = []
+	parsed = {kind: {} for kind in REQUIRED}
+	lesson_slugs = set()
+	fields = {'category': CATEGORY_FIELDS, 'course': COURSE_FIELDS, 'module': MODULE_FIELDS, 'lesson': LESSON_FIELDS}
+	for number, record in records:
+		kind = record.get('type')
+		if kind not in parsed:
+			errors.append(f'line {number}: unknown record type {kind!r}')
+			continue
+		values = _clean(kind, number, record, fields[kind], errors)
+		# Slug path from the course down: (course,), (course, module), (course, module, lesson).
+		key = tuple(record.get(name) for name in REQUIRED[kind] if name in SLUG_KEYS)
+		# Lesson slugs are unique site-wide, not per module.
+		if key in parsed[kind] or (kind == 'lesson' and key[-1] in lesson_slugs):
+			errors.append(f'line {number}: duplicate {kind} {"/".join(map(str, key))}')
+			continue
+		if kind == 'lesson':
+			lesson_slugs.add(key[-1])
+		if kind == 'course':
+			values['category'] = record.get('category') or None
+		elif kind in ('module', 'lesson') and key[:-1] not in parsed['course' if kind == 'module' else 'module']:
+			parent = 'course' if kind == 'module' else 'module'
+			errors.append(f'line {number}: {kind} {key[-1]!r} refers to {parent} {"/".join(map(str, key[:-1]))}, which is not listed before it')
+		parsed[kind][key] = values
+
+	listed = {slug for (slug,) in parsed['category']}
+	wanted = {values['category'] for values in parsed['course'].values() if values['category']} - listed
+	missing = wanted - set(CourseCategory.objects.filter(slug__in=wanted).values_list('slug', flat=True))
+	if missing:
+		errors.append(f'unknown categories: {", ".join(sorted(missing))}')
+	if errors:
+		raise ArchiveError(errors)
+
+	plan = ImportPlan(course_slugs=[slug for (slug,) in parsed['course']])
+	courses_listed = set(plan.course_slugs)
+
+	categories = CourseCategory.objects.in_bulk(list(listed), field_name='slug')
+	for (slug,), values in parsed['category'].items():
+		_diff(plan.categories, categories.get(slug), None, values, lambda: CourseCategory(slug=slug, **values))
+
+	courses = Course.objects.select_related('category').in_bulk(plan.course_slugs, field_name='slug')
+	for (slug,), values in parsed['course'].items():
+		category = values.pop('category')
+		course = courses.get(slug)
+		moved = course is not None and (course.category.slug if course.category else None) != category
+		_diff(plan.courses, course, category, values, lambda: Course(slug=slug, **values), moved=moved)
+
+	modules = {
+		(module.course.slug, module.slug): module
+		for module in Module.objects.filter(course__slug__in=plan.course_slugs).select_related('course')
+	}
+	for key, values in parsed['module'].items():
+		_diff(plan.modules, modules.get(key), key[:1], values, lambda: Module(slug=key[-1], **values))
+
+	lessons = Lesson.objects.select_related('module__course').in_bulk(list(lesson_slugs), field_name='slug')
+	# Slugs are site-wide, so an archive could claim a lesson that belongs to a course it doesn't carry.
+	foreign = sorted(
+		f'{key[-1]} (in {lessons[key[-1]].module.course.slug})'
+		for key in parsed['lesson']
+		if key[-1] in lessons and lessons[key[-1]].module.course.slug not in courses_listed
+	)
+	if foreign:
+		raise ArchiveError([f'lessons belong to courses not in this archive: {", ".join(foreign)}'])
+	for key, values in parsed['lesson'].items():
+		if 'body' in values:
+			values['body_hash'] = body_hash(values['body'])
+		lesson = lessons.get(key[-1])
+		# A lesson listed under another module in the archive moves there.
+		moved = lesson is not None and (lesson.module.course.slug, lesson.module.slug) != key[:2]
+		_diff(plan.lessons, lesson, key[:2], values, lambda: Lesson(slug=key[-1], **values), moved=moved)
+	return plan
+
+
+def _write(model, change: Change, fields: Iterable[str], parent_field: Optional[str] = None, parent_ids: Optional[dict] = None) -> None:
+	now = timezone.now()
+	for parent, obj in change.created + change.updated:
+		if parent_field is not None:
+			setattr(obj, parent_field, parent_ids.get(parent))
+		obj.updated_at = now
+	if change.created:
+		model.objects.bulk_create([obj for _, obj in change.created], batch_size=BATCH_SIZE)
+	if change.updated:
+		model.objects.bulk_update([obj for _, obj in change.updated], [*fields, 'updated_at'], batch_size=BATCH_SIZE)
+
+
+@transaction.atomic
+def apply_import(plan: ImportPlan) -> dict[str, str]:
+	"""Write ``plan`` in one transaction; returns the per-model summary."""
+	slugs = plan.course_slugs
+	_write(CourseCategory, plan.categories, CATEGORY_FIELDS)
+
+	category_ids = dict(CourseCategory.objects.filter(
+		slug__in={parent for parent, _ in plan.courses.created + plan.courses.updated if parent}
+	).values_list('slug', 'id'))
+	_write(Course, plan.courses, COURSE_FIELDS + ('category',), 'category_id', category_ids)
+
+	course_ids = {(slug,): pk for slug, pk in Course.objects.filter(slug__in=slugs).values_list('slug', 'id')}
+	_write(Module, plan.modules, MODULE_FIELDS, 'course_id', course_ids)
+
+	module_ids = {
+		(course, slug): pk
+		for pk, course, slug in Module.objects.filter(course__slug__in=slugs).values_list('id', 'course__slug', 'slug')
+	}
+	_write(Lesson, plan.lessons, LESSON_FIELDS + ('body_hash', 'module'), 'module_id', module_ids)
+
+	def announce():
+		content_imported.send(sender=Course, course_slugs=slugs)
+		queue_render()
+
+	transaction.on_commit(announce)
+	return plan.summary()
@@ -0,0 +1,221 @@
+"""
+Course catalog filtering and facet counts.
+
+The catalog is small (hundreds of courses at most) but is filtered on every
+page view, and facet counts ("Beginner (12)") would otherwise cost one GROUP
+BY per facet per request. Instead every course is reduced to one row of facet
+values and the rows are cached as the *facet index*:
+
+	(id, status, category slug, level, price band, duration band, modules)
+
+in catalog order. Filtering and counting then run in Python over the index;
+the database is only asked for the rows on the current page.
+
+The index is dropped when a course, category or module changes and rebuilt
+once the change commits (see signals.py), so publishing a course shows up on
+the next request.
+
+Price and duration are bucketed into bands. ``duration`` is free text
+("12 hours", "6 weeks"), so it is parsed into hours assuming a study pace of
+about ten hours a week; values that cannot be parsed belong to no band.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import ContentStatus, Course, CourseCategory
+
+
+INDEX_KEY = 'course_facet_index'
+INDEX_VERSION = 1
+FACETS = ('category', 'level', 'price', 'duration')
+
+# (key, label, lower bound inclusive, upper bound exclusive)
+PRICE_BANDS = (
+	('free', 'Free', None, None),
+	('under-1000', 'Under ₹1,000', 0, 1000),
+	('1000-5000', '₹1,000 – ₹5,000', 1000, 5000),
+	('over-5000', 'Over ₹5,000', 5000, None),
+)
+DURATION_BANDS = (
+	('short', 'Under 10 hours', 0, 10),
+	('medium', '10 – 40 hours', 10, 40),
+	('long', 'Over 40 hours', 40, None),
+)
+
+HOURS_PER_UNIT = {
+	'min': 1 / 60,
+	'h': 1,
+	'hr': 1,
+	'hour': 1,
+	'day': 2,
+	'week': 10,
+	'month': 40,
+}
+
+_duration = re.compile(r'(\d+(?:\.\d+)?)\s*(?:-\s*\d+(?:\.\d+)?\s*)?(min|hr|hour|h|day|week|month)', re.IGNORECASE)
+
+
+def price_band(price) -> str:
+	price = price or 0
+	if price <= 0:
+		return 'free'
+	for key, _, low, high in PRICE_BANDS[1:]:
+		if price >= low and (high is None or price < high):
+			return key
+	return PRICE_BANDS[-1][0]
+
+
+def duration_hours(text: str) -> Optional[float]:
+	"""Total hours in a free-text duration ("1 month 2 weeks" -> 60.0), or None."""
+	matches = _duration.findall(text or '')
+	if not matches:
+		return None
+	return sum(float(amount) * HOURS_PER_UNIT[unit.lower()] for amount, unit in matches)
+
+
+def duration_band(text: str) -> Optional[str]:
+	hours = duration_hours(text)
+	if hours is None:
+		return None
+	for key, _, low, high in DURATION_BANDS:
+		if hours >= low and (high is None or hours < high):
+			return key
+	return None
+
+
+@dataclass(frozen=True)
+class IndexRow:
+	id: int
+	status: str
+	category: Optional[str]
+	level: str
+	price: str
+	duration: Optional[str]
+	modules: int
+
+
+def build_index() -> dict:
+	courses = (
+		Course.objects.order_by('order', 'title')
+		.annotate(module_total=Count('modules'))
+		.values_list('id', 'status', 'category__slug', 'level', 'price', 'duration', 'module_total')
+	)
+	rows = [
+		(pk, status, category, (level or '').strip(), price_band(price), duration_band(duration), modules)
+		for pk, status, category, level, price, duration, modules in courses
+	]
+	return {
+		'version': INDEX_VERSION,
+		'rows': rows,
+		'categories': dict(CourseCategory.objects.order_by('name').values_list('slug', 'name')),
+	}
+
+
+def rebuild_index() -> dict:
+	index = build_index()
+	cache.set(INDEX_KEY, index, timeout=None)
+	return index
+
+
+def invalidate_index() -> None:
+	cache.delete(INDEX_KEY)
+
+
+def get_index() -> dict:
+	index = cache.get(INDEX_KEY)
+	if index is None or index.get('version') != INDEX_VERSION:
+		index = rebuild_index()
+	return index
+
+
+def _rows(index: dict, statuses: Optional[Iterable[str]]) -> list[IndexRow]:
+	rows = [IndexRow(*row) for row in index['rows']]
+	if statuses is None:
+		return rows
+	statuses = set(statuses)
+	return [row for row in rows if row.status in statuses]
+
+
+def _matches(row: IndexRow, filters: dict, skip: Optional[str] = None) -> bool:
+	for facet, value in filters.items():
+		if facet == skip or not value:
+			continue
+		if facet == 'level':
+			if row.level.lower() != value.lower():
+				return False
+		elif getattr(row, facet) != value:
+			return False
+	return True
+
+
+def clean_filters(params) -> dict:
+	"""Facet filters from a query dict, with unknown bands dropped."""
+	filters = {facet: (params.get(facet) or '').strip() for facet in FACETS}
+	if filters['price'] not in {key for key, *_ in PRICE_BANDS}:
+		filters['price'] = ''
+	if filters['duration'] not in {key for key, *_ in DURATION_BANDS}:
+		filters['duration'] = ''
+	return {facet: value for facet, value in filters.items() if value}
+
+
+@dataclass
+class CatalogResult:
+	ids: list[int]
+	modules: dict[int, int]
+	facets: dict[str, list[dict]]
+
+
+def search(filters: dict, *, statuses: Optional[Iterable[str]] = (ContentStatus.PUBLISHED,)) -> CatalogResult:
+	"""Matching course ids in catalog order, plus counts for every facet value.
+
+	Each facet is counted with the *other* filters applied, so picking a level
+	still shows how many courses every other level would give. Pass
+	``statuses=None`` to include drafts (staff view).
+	"""
+	index = get_index()
+	rows = _rows(index, statuses)
+	matched = [row for row in rows if _matches(row, filters)]
+
+	counts = {facet: {} for facet in FACETS}
+	for row in rows:
+		for facet in FACETS:
+			value = getattr(row, facet)
+			if value and _matches(row, filters, skip=facet):
+				key = value.lower() if facet == 'level' else value
+				counts[facet][key] = counts[facet].get(key, 0) + 1
+
+	levels = {}
+	for row in rows:
+		if row.level:
+			levels.setdefault(row.level.lower(), row.level)
+	labels = {
+		'category': index['categories'],
+		'level': levels,
+		'price': {key: label for key, label, *_ in PRICE_BANDS},
+		'duration': {key: label for key, label, *_ in DURATION_BANDS},
+	}
+	facets = {}
+	for facet in FACETS:
+		selected = filters.get(facet, '')
+		if facet == 'level':
+			selected = selected.lower()
+		facets[facet] = [
+			{'value': value, 'label': label, 'count': counts[facet].get(value, 0), 'selected': value == selected}
+			for value, label in labels[facet].items()
+			if counts[facet].get(value) or value == selected
+		]
+	return CatalogResult(
+		ids=[row.id for row in matched],
+		modules={row.id: row.modules for row in matched},
+		facets=facets,
+	)
+
+
+def ids_in_duration_band(band: str) -> list[int]:
+	return [row.id for row in _rows(get_index(), None) if row.duration == band]
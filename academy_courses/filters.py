@@ -0,0 +1,37 @@
+import django_filters
+from django.db.models import Q
+
+from . import catalog
+from .models import Course
+
+
+class CourseFilter(django_filters.FilterSet):
+	"""Catalog filters for the course API; bands match the catalog page facets."""
+
+	category = django_filters.CharFilter(field_name='category__slug')
+	level = django_filters.CharFilter(field_name='level', lookup_expr='iexact')
+	price = django_filters.ChoiceFilter(
+		choices=[(key, label) for key, label, *_ in catalog.PRICE_BANDS],
+		method='filter_price',
+	)
+	duration = django_filters.ChoiceFilter(
+		choices=[(key, label) for key, label, *_ in catalog.DURATION_BANDS],
+		method='filter_duration',
+	)
+
+	class Meta:
+		model = Course
+		fields = ['category', 'level', 'price', 'duration']
+
+	def filter_price(self, queryset, name, value):
+		if value == 'free':
+			return queryset.filter(price__lte=0)
+		_, _, low, high = next(band for band in catalog.PRICE_BANDS if band[0] == value)
+		condition = Q(price__gt=0, price__gte=low)
+		if high is not None:
+			condition &= Q(price__lt=high)
+		return queryset.filter(condition)
+
+	def filter_duration(self, queryset, name, value):
+		# Durations are free text, so the bands come from the facet index.
+		return queryset.filter(id__in=catalog.ids_in_duration_band(value))
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academy_courses import archive
+from academy_courses.models import Course
+
+
+class Command(BaseCommand):
+	help = 'Export courses with their modules and lessons to a gzipped course archive.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('slugs', nargs='*', help='Course slugs to export.')
+		parser.add_argument('--all', action='store_true', help='Export every course.')
+		parser.add_argument('--output', '-o', default='-', help='File to write, or - for stdout (default).')
+
+	def handle(self, *args, **options):
+		slugs = options['slugs']
+		if not slugs and not options['all']:
+			raise CommandError('Name the courses to export, or pass --all.')
+		courses = Course.objects.all() if options['all'] else Course.objects.filter(slug__in=slugs)
+		missing = set(slugs) - set(courses.values_list('slug', flat=True))
+		if missing:
+			raise CommandError(f'Unknown courses: {", ".join(sorted(missing))}')
+
+		chunks = archive.export_archive(courses)
+		if options['output'] == '-':
+			target = sys.stdout.buffer
+			for chunk in chunks:
+				target.write(chunk)
+			target.flush()
+		else:
+			with open(options['output'], 'wb') as target:
+				for chunk in chunks:
+					target.write(chunk)
+		self.stderr.write(f'Exported {courses.count()} course(s)')
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from academy_courses import archive
+
+
+class Command(BaseCommand):
+	help = 'Import a course archive written by export_courses, matching existing rows by slug.'
+
+	def add_arguments(self, parser):
+		parser.add_argument('path', help='Archive to read, or - for stdin.')
+		parser.add_argument('--dry-run', action='store_true', help='Validate and show the changes without writing.')
+
+	def handle(self, *args, **options):
+		path = options['path']
+		try:
+			if path == '-':
+				plan = archive.plan_import(archive.read_archive(sys.stdin.buffer))
+			else:
+				with open(path, 'rb') as source:
+					plan = archive.plan_import(archive.read_archive(source))
+		except OSError as exc:
+			raise CommandError(f'Cannot read {path}: {exc}')
+		except archive.ArchiveError as exc:
+			for error in exc.errors:
+				self.stderr.write(error)
+			raise CommandError(f'{len(exc.errors)} problem(s) in {path}; nothing was imported.')
+
+		summary = plan.summary() if options['dry_run'] else archive.apply_import(plan)
+		for kind, line in summary.items():
+			self.stdout.write(f'{kind}: {line}')
+		if options['dry_run']:
+			self.stdout.write(self.style.WARNING('Dry run; nothing was written.'))
+		else:
+			self.stdout.write(self.style.SUCCESS(f'Imported {len(plan.course_slugs)} course(s).'))
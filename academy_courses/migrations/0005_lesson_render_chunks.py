@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_courses', '0004_lesson_renders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonrender',
+            name='chunks',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.db import migrations
+
+
+def hash_existing_lessons(apps, schema_editor):
+    """Store body_hash for lessons saved before it existed.
+
+    The hash is the SHA-256 of the body, written out here so later changes to
+    academy_courses.rendering cannot change what this migration does. Rendering
+    is left to the application: the lesson page queues the render_stale_lessons
+    sweep for any body without a LessonRender and shows it sanitized until then.
+    """
+    Lesson = apps.get_model('academy_courses', 'Lesson')
+
+    for lesson in Lesson.objects.only('id', 'body', 'body_hash').iterator(chunk_size=200):
+        content_hash = hashlib.sha256((lesson.body or '').encode()).hexdigest()
+        if lesson.body_hash != content_hash:
+            Lesson.objects.filter(pk=lesson.pk).update(body_hash=content_hash)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_courses', '0005_lesson_render_chunks'),
+    ]
+
+    operations = [
+        migrations.RunPython(hash_existing_lessons, migrations.RunPython.noop),
+    ]
@@ -79,6 +79,8 @@ class Lesson(models.Model):
 	title = models.CharField(max_length=255)
 	description = models.TextField(blank=True)
 	body = models.TextField(blank=True)
+	# sha256 of ``body``, kept in sync on save; keys the rendered HTML (see rendering.py).
+	body_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
 	youtube_url = models.CharField(max_length=2048, blank=True)
 	estimated_minutes = models.IntegerField(null=True, blank=True)
 	difficulty = models.CharField(max_length=64, blank=True)
@@ -101,3 +103,22 @@ class Lesson(models.Model):
 
 	def __str__(self) -> str:
 		return self.title
+
+
+class LessonRender(models.Model):
+	"""Sanitized HTML for one lesson body, shared by every lesson with the same body."""
+	content_hash = models.CharField(max_length=64, unique=True)
+	renderer_version = models.PositiveIntegerField()
+	html = models.TextField()
+	# [start, end) offsets into ``html``, one pair per section chunk
+	chunks = models.JSONField(default=list)
+	created_at = models.DateTimeField(auto_now_add=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['renderer_version']),
+		]
+
+	def __str__(self) -> str:
+		return f'{self.content_hash[:12]} (v{self.renderer_version})'
@@ -0,0 +1,329 @@
+"""
+Lesson body rendering.
+
+``Lesson.body`` is Markdown (raw HTML inside it is allowed) and is turned into
+sanitized HTML once per revision rather than on every view. Bodies that start
+with an HTML tag are treated as HTML and only sanitized, since Markdown would
+turn indented markup into code blocks; any other body goes through Markdown.
+
+* saving a lesson stores ``body_hash`` and, once the save commits, renders the
+  body into a ``LessonRender`` row keyed by that hash;
+* ``lesson_html()`` hashes the body it is given and serves the render for that
+  hash through the cache, so the lesson page never parses Markdown and a body
+  changed behind the signals (``QuerySet.update()``) is never served stale
+  HTML;
+* bumping ``RENDERER_VERSION`` (new extensions, a sanitizer fix) marks every
+  stored render stale. Stale HTML keeps being served while the
+  ``render_stale_lessons`` task re-renders in the background.
+
+Each render also stores *chunk offsets*: [start, end) character ranges of the
+HTML that split it into sections at top-level headings, with long sections
+split further at block boundaries. Long lessons ship the first chunks with the
+page and fetch the rest on demand (``?chunks=a-b``).
+
+Markdown support is optional: without the ``markdown`` package plain-text
+bodies become paragraphs. Fenced code blocks are highlighted by Pygments when
+it is installed.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+from html import escape
+from html.parser import HTMLParser
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+from django.core.cache import cache
+from django.utils.html import linebreaks
+from django.utils.safestring import SafeString, mark_safe
+
+from .models import Lesson, LessonRender
+
+try:
+	import markdown
+except ImportError:  # pragma: no cover - optional dependency
+	markdown = None
+
+try:
+	import pygments  # noqa: F401
+except ImportError:  # pragma: no cover - optional dependency
+	pygments = None
+
+
+logger = logging.getLogger(__name__)
+
+RENDERER_VERSION = 3
+CHUNK_SIZE = 8 * 1024
+CACHE_TIMEOUT = 24 * 60 * 60
+QUEUE_KEY = 'lesson_render_queued'
+QUEUE_LOCK_TIMEOUT = 10 * 60
+
+ALLOWED_TAGS = frozenset({
+	'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'dd', 'del', 'div', 'dl', 'dt', 'em',
+	'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'ins', 'kbd', 'li', 'mark', 'ol',
+	'p', 'pre', 's', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody', 'td',
+	'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+})
+VOID_TAGS = frozenset({'br', 'hr', 'img'})
+# Dropped together with everything inside them.
+DROP_CONTENT_TAGS = frozenset({'script', 'style', 'iframe', 'object', 'template', 'noscript', 'svg', 'math'})
+ALLOWED_ATTRS = {
+	'*': frozenset({'class', 'id', 'title'}),
+	'a': frozenset({'href'}),
+	'img': frozenset({'src', 'alt', 'width', 'height'}),
+	'td': frozenset({'colspan', 'rowspan'}),
+	'th': frozenset({'colspan', 'rowspan', 'scope'}),
+	'ol': frozenset({'start'}),
+}
+URL_ATTRS = frozenset({'href', 'src'})
+URL_SCHEMES = frozenset({'', 'http', 'https', 'mailto'})
+SECTION_TAGS = frozenset({'h1', 'h2', 'h3'})
+
+
+def body_hash(body: str) -> str:
+	return hashlib.sha256((body or '').encode()).hexdigest()
+
+
+def _safe_url(value: str) -> bool:
+	value = ''.join(ch for ch in value if ch > ' ')
+	try:
+		return urlsplit(value).scheme.lower() in URL_SCHEMES
+	except ValueError:
+		return False
+
+
+class _Sanitizer(HTMLParser):
+	def __init__(self):
+		super().__init__(convert_charrefs=True)
+		self.out: list[str] = []
+		self.open: list[str] = []
+		self.dropping = 0
+		self.length = 0
+		# (offset, starts a section) for every top-level element
+		self.breaks: list[tuple[int, bool]] = []
+
+	def _emit(self, text: str) -> None:
+		self.out.append(text)
+		self.length += len(text)
+
+	def handle_starttag(self, tag, attrs):
+		if tag in DROP_CONTENT_TAGS:
+			self.dropping += 1
+			return
+		if self.dropping or tag not in ALLOWED_TAGS:
+			return
+		allowed = ALLOWED_ATTRS['*'] | ALLOWED_ATTRS.get(tag, frozenset())
+		parts = [tag]
+		for name, value in attrs:
+			if name not in allowed or value is None:
+				continue
+			if name in URL_ATTRS and not _safe_url(value):
+				continue
+			parts.append(f'{name}="{escape(value, quote=True)}"')
+		if tag == 'a' and any(part.startswith('href="http') for part in parts):
+			parts.append('rel="noopener noreferrer"')
+		if not self.open:
+			self.breaks.append((self.length, tag in SECTION_TAGS))
+		self._emit(f"<{' '.join(parts)}>")
+		if tag not in VOID_TAGS:
+			self.open.append(tag)
+
+	def handle_startendtag(self, tag, attrs):
+		if tag in DROP_CONTENT_TAGS:
+			return
+		self.handle_starttag(tag, attrs)
+		if tag not in VOID_TAGS and self.open and self.open[-1] == tag:
+			self.handle_endtag(tag)
+
+	def handle_endtag(self, tag):
+		if tag in DROP_CONTENT_TAGS:
+			self.dropping = max(self.dropping - 1, 0)
+			return
+		if self.dropping or tag not in self.open:
+			return
+		while self.open:
+			current = self.open.pop()
+			self._emit(f'</{current}>')
+			if current == tag:
+				break
+
+	def handle_data(self, data):
+		if not self.dropping:
+			self._emit(escape(data, quote=False))
+
+	def result(self) -> str:
+		self.close()
+		for tag in reversed(self.open):
+			self._emit(f'</{tag}>')
+		self.open = []
+		return ''.join(self.out)
+
+
+def _sanitize(html: str) -> tuple[str, list[tuple[int, bool]]]:
+	parser = _Sanitizer()
+	parser.feed(html or '')
+	return parser.result(), parser.breaks
+
+
+def sanitize_html(html: str) -> str:
+	"""Keep an allowlist of tags and attributes; drop scripts, styles and unsafe URLs."""
+	return _sanitize(html)[0]
+
+
+def chunk_offsets(length: int, breaks: list[tuple[int, bool]], size: Optional[int] = None) -> list[list[int]]:
+	"""[start, end) ranges: a new chunk at every section heading, or once a chunk reaches ``size``."""
+	size = size or CHUNK_SIZE
+	chunks = []
+	start = 0
+	for offset, heading in breaks:
+		if offset > start and (heading or offset - start >= size):
+			chunks.append([start, offset])
+			start = offset
+	if length > start or not chunks:
+		chunks.append([start, length])
+	return chunks
+
+
+class Rendered(NamedTuple):
+	version: int
+	html: str
+	chunks: list[list[int]]
+
+	def chunk(self, index: int) -> str:
+		start, end = self.chunks[index]
+		return self.html[start:end]
+
+
+def _rendered(html: str) -> Rendered:
+	html, breaks = _sanitize(html)
+	return Rendered(RENDERER_VERSION, html, chunk_offsets(len(html), breaks))
+
+
+def parse_chunk_range(value: str, total: int) -> range:
+	"""``"a-b"`` (inclusive), ``"a-"`` or ``"a"`` -> chunk indexes, clipped to ``total``."""
+	first, sep, last = (value or '').strip().partition('-')
+	try:
+		start = int(first)
+		stop = int(last) + 1 if last else (total if sep else start + 1)
+	except ValueError:
+		raise ValueError(f'Invalid chunk range {value!r}; expected "a-b".') from None
+	if start < 0 or stop <= start:
+		raise ValueError(f'Invalid chunk range {value!r}; expected "a-b".')
+	return range(min(start, total), min(stop, total))
+
+
+def is_html(body: str) -> bool:
+	return (body or '').lstrip().startswith('<')
+
+
+def _as_html(body: str) -> str:
+	"""HTML bodies as they are, plain text as paragraphs (the fallback without Markdown)."""
+	body = body or ''
+	return body if is_html(body) else linebreaks(body)
+
+
+def render_body(body: str) -> Rendered:
+	"""Markdown (or HTML) -> sanitized, chunked HTML. Too slow for the request path."""
+	if markdown is not None and not is_html(body):
+		extensions = ['extra', 'sane_lists']
+		config = {}
+		if pygments is not None:
+			extensions.append('codehilite')
+			config['codehilite'] = {'guess_lang': False, 'css_class': 'codehilite'}
+		html = markdown.markdown(body or '', extensions=extensions, extension_configs=config, output_format='html')
+	else:
+		html = _as_html(body)
+	return _rendered(html)
+
+
+def _cache_key(content_hash: str) -> str:
+	return f'lesson_render:{content_hash}'
+
+
+def store_render(body: str, content_hash: Optional[str] = None) -> LessonRender:
+	content_hash = content_hash or body_hash(body)
+	rendered = render_body(body)
+	render, _ = LessonRender.objects.update_or_create(
+		content_hash=content_hash,
+		defaults={'renderer_version': rendered.version, 'html': rendered.html, 'chunks': rendered.chunks},
+	)
+	cache.set(_cache_key(content_hash), tuple(rendered), timeout=CACHE_TIMEOUT)
+	return render
+
+
+def render_after_save(body: str, content_hash: str) -> None:
+	"""on_commit hook for saved lessons; a failed render is retried by the sweep task."""
+	try:
+		if not LessonRender.objects.filter(content_hash=content_hash, renderer_version=RENDERER_VERSION).exists():
+			store_render(body, content_hash)
+	except Exception as exc:  # pragma: no cover - defensive guard
+		logger.warning('Lesson body could not be rendered', exc_info=exc)
+
+
+def stale_lessons():
+	"""Lessons whose body has no render at the current renderer version."""
+	current = LessonRender.objects.filter(renderer_version=RENDERER_VERSION).values('content_hash')
+	return Lesson.objects.exclude(body_hash__in=current)
+
+
+def render_stale(batch_size: int = 200) -> int:
+	rendered = set()
+	for lesson in stale_lessons().only('id', 'body', 'body_hash').iterator(chunk_size=batch_size):
+		content_hash = lesson.body_hash or body_hash(lesson.body)
+		if content_hash in rendered:
+			continue
+		if not lesson.body_hash:
+			Lesson.objects.filter(pk=lesson.pk).update(body_hash=content_hash)
+		store_render(lesson.body, content_hash)
+		rendered.add(content_hash)
+	return len(rendered)
+
+
+def queue_render() -> None:
+	# One queued sweep covers every stale lesson, so don't queue one per view.
+	if not cache.add(QUEUE_KEY, 1, timeout=QUEUE_LOCK_TIMEOUT):
+		return
+	try:
+		from .tasks import render_stale_lessons
+		render_stale_lessons.apply_async(ignore_result=True)
+	except Exception as exc:  # pragma: no cover - defensive guard for runtime outages
+		logger.warning('Lesson render could not be queued', exc_info=exc)
+
+
+def lesson_render(lesson: Lesson) -> Rendered:
+	"""Rendered HTML and chunks for ``lesson.body`` without rendering on the request path.
+
+	A body that has not been rendered yet is shown sanitized but unformatted
+	until the queued render lands.
+	"""
+	# Hashing is cheap next to rendering; never trust a stored hash for the body we show.
+	content_hash = body_hash(lesson.body)
+	if lesson.pk and content_hash != lesson.body_hash:
+		# Written around the pre_save signal; let the stale sweep find it.
+		Lesson.objects.filter(pk=lesson.pk).update(body_hash=content_hash)
+		lesson.body_hash = content_hash
+	key = _cache_key(content_hash)
+	entry = cache.get(key)
+	if entry is None:
+		row = (
+			LessonRender.objects.filter(content_hash=content_hash)
+			.values_list('renderer_version', 'html', 'chunks')
+			.first()
+		)
+		if row is None:
+			queue_render()
+			return _rendered(_as_html(lesson.body))
+		entry = tuple(row)
+		cache.set(key, entry, timeout=CACHE_TIMEOUT)
+	rendered = Rendered(*entry)
+	if rendered.version != RENDERER_VERSION:
+		queue_render()
+	if not rendered.chunks:
+		# Stored before chunking existed; one chunk until the re-render lands.
+		rendered = rendered._replace(chunks=[[0, len(rendered.html)]])
+	return rendered
+
+
+def lesson_html(lesson: Lesson) -> SafeString:
+	return mark_safe(lesson_render(lesson).html)
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 
 from .models import Course, CourseCategory, Lesson, Module
+from .rendering import lesson_render, parse_chunk_range
 
 
 class CourseCategorySerializer(serializers.ModelSerializer):
@@ -64,3 +65,22 @@ class LessonSerializer(serializers.ModelSerializer):
     
     def get_course_id(self, obj):
         return obj.module.course_id if obj.module else None
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        chunk_range = self.context.get('chunk_range')
+        if chunk_range is not None:
+            # Rendered sections instead of the raw body (see rendering.py).
+            rendered = lesson_render(obj)
+            try:
+                indexes = parse_chunk_range(chunk_range, len(rendered.chunks))
+            except ValueError as exc:
+                raise serializers.ValidationError({'chunks': str(exc)})
+            del data['body']
+            data['chunks'] = {
+                'total': len(rendered.chunks),
+                'start': indexes.start,
+                'stop': indexes.stop,
+                'html': [rendered.chunk(i) for i in indexes],
+            }
+        return data
@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .catalog import invalidate_index, rebuild_index
+from .models import Course, CourseCategory, Lesson, Module
+from .rendering import body_hash, render_after_save
+
+
+# Sent after a course archive import commits (bulk writes send no post_save).
+content_imported = Signal()
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(content_imported)
+def catalog_changed(sender, **kwargs):
+	invalidate_index()
+	# Rebuild from the committed rows; a reader may have cached the old ones meanwhile.
+	transaction.on_commit(rebuild_index)
+
+
+@receiver(pre_save, sender=Lesson)
+def hash_lesson_body(sender, instance, **kwargs):
+	instance.body_hash = body_hash(instance.body)
+
+
+@receiver(post_save, sender=Lesson)
+def render_lesson_body(sender, instance, **kwargs):
+	body, content_hash = instance.body, instance.body_hash
+	transaction.on_commit(lambda: render_after_save(body, content_hash))
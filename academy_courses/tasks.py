@@ -0,0 +1,17 @@
+"""
+Celery tasks for course content.
+"""
+from celery import shared_task
+
+
+@shared_task(ignore_result=True)
+def render_stale_lessons():
+    """Render lesson bodies that have no HTML at the current renderer version."""
+    from django.core.cache import cache
+
+    from .rendering import QUEUE_KEY, render_stale
+    try:
+        rendered = render_stale()
+    finally:
+        cache.delete(QUEUE_KEY)
+    return f'Rendered {rendered} lesson bod{"y" if rendered == 1 else "ies"}'
@@ -1,7 +1,19 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+from io import StringIO
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
 from unittest.mock import patch
 
+from academy_courses import archive, catalog, rendering
+from academy_courses.models import ContentStatus, Course, CourseCategory, Lesson, LessonRender, Module
+
 
 class CeleryMockedTestCase(TestCase):
 	@classmethod
@@ -14,3 +26,314 @@ class CeleryMockedTestCase(TestCase):
 	def tearDownClass(cls):
 		cls._celery_patcher.stop()
 		super().tearDownClass()
+
+
+class AdminChangelistQueryTests(TestCase):
+	"""Changelist query counts must not grow with the number of rows shown."""
+
+	# url -> queries per request, whatever the row count
+	EXPECTED = {
+		'/admin/academy_courses/coursecategory/': 4,
+		'/admin/academy_courses/course/': 8,
+		'/admin/academy_courses/module/': 5,
+		'/admin/academy_courses/lesson/': 5,
+	}
+
+	def setUp(self):
+		self.admin = get_user_model().objects.create_superuser(email='admin@example.com', password='pass')
+		self.client.force_login(self.admin)
+		self.batches = 0
+
+	def _add_rows(self, count):
+		for _ in range(count):
+			self.batches += 1
+			n = self.batches
+			category = CourseCategory.objects.create(name=f'Category {n}', slug=f'category-{n}')
+			course = Course.objects.create(title=f'Course {n}', slug=f'course-{n}', category=category)
+			module = Module.objects.create(course=course, title=f'Module {n}', slug=f'module-{n}')
+			Lesson.objects.create(module=module, title=f'Lesson {n}', slug=f'lesson-{n}')
+
+	def test_changelist_queries_are_constant(self):
+		for rows in (2, 4):
+			self._add_rows(rows)
+			for url, expected in self.EXPECTED.items():
+				with self.subTest(url=url, rows=self.batches), self.assertNumQueries(expected):
+					self.assertEqual(self.client.get(url, secure=True).status_code, 200)
+
+
+class CourseCatalogTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.web = CourseCategory.objects.create(name='Web', slug='web')
+		self.data = CourseCategory.objects.create(name='Data', slug='data')
+		rows = [
+			('html', self.web, 'Beginner', 0, '6 hours'),
+			('django', self.web, 'Intermediate', 2999, '3 weeks'),
+			('pandas', self.data, 'Beginner', 499, '12 hours'),
+			('ml', self.data, 'Advanced', 7999, '3 months'),
+		]
+		for slug, category, level, price, duration in rows:
+			Course.objects.create(
+				slug=slug, title=slug.title(), category=category, level=level,
+				price=price, duration=duration, status=ContentStatus.PUBLISHED,
+			)
+		Course.objects.create(slug='draft', title='Draft', level='Beginner', status=ContentStatus.DRAFT)
+
+	def test_bands(self):
+		self.assertEqual(
+			[catalog.price_band(p) for p in (0, None, 1, 999, 1000, 5000)],
+			['free', 'free', 'under-1000', 'under-1000', '1000-5000', 'over-5000'],
+		)
+		self.assertEqual(catalog.duration_hours('1 month 2 weeks'), 60)
+		self.assertEqual(catalog.duration_hours('90 mins'), 1.5)
+		self.assertEqual(
+			[catalog.duration_band(d) for d in ('6 hours', '3-4 weeks', '3 months', 'Self-paced', '')],
+			['short', 'medium', 'long', None, None],
+		)
+
+	def test_facets_count_other_filters_without_queries(self):
+		catalog.get_index()
+		with self.assertNumQueries(0):
+			result = catalog.search({'category': 'data'})
+		self.assertEqual(Course.objects.filter(id__in=result.ids).count(), 2)
+		counts = {facet: {o['value']: o['count'] for o in options} for facet, options in result.facets.items()}
+		# The category facet ignores its own filter; the others apply it.
+		self.assertEqual(counts['category'], {'data': 2, 'web': 2})
+		self.assertEqual(counts['level'], {'beginner': 1, 'advanced': 1})
+		self.assertEqual(counts['price'], {'under-1000': 1, 'over-5000': 1})
+		self.assertEqual(counts['duration'], {'medium': 1, 'long': 1})
+		self.assertEqual(len(catalog.search({}, statuses=None).ids), 5)
+
+	def test_index_rebuilds_on_publish(self):
+		self.assertEqual(len(catalog.search({'level': 'beginner'}).ids), 2)
+		with self.captureOnCommitCallbacks(execute=True):
+			draft = Course.objects.get(slug='draft')
+			draft.status = ContentStatus.PUBLISHED
+			draft.save()
+		self.assertIsNotNone(cache.get(catalog.INDEX_KEY))
+		self.assertEqual(len(catalog.search({'level': 'beginner'}).ids), 3)
+
+	def test_api_filters_and_ordering(self):
+		def slugs(query):
+			response = self.client.get(f'/api/courses/?{query}', secure=True)
+			self.assertEqual(response.status_code, 200)
+			return [course['slug'] for course in response.json()]
+
+		self.assertEqual(slugs('category=web&ordering=-price'), ['django', 'html'])
+		self.assertEqual(slugs('level=beginner&ordering=title'), ['html', 'pandas'])
+		self.assertEqual(slugs('price=1000-5000'), ['django'])
+		self.assertEqual(slugs('duration=long'), ['ml'])
+		self.assertEqual(self.client.get('/api/courses/?price=cheap', secure=True).status_code, 400)
+
+		response = self.client.get('/api/courses/facets/?price=free', secure=True)
+		self.assertEqual(response.json()['count'], 1)
+
+
+class LessonRenderTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		course = Course.objects.create(slug='render', title='Render')
+		self.module = Module.objects.create(course=course, slug='m', title='M')
+
+	def _lesson(self, body):
+		with self.captureOnCommitCallbacks(execute=True):
+			return Lesson.objects.create(module=self.module, slug=f'l{Lesson.objects.count()}', title='L', body=body)
+
+	def test_sanitizer(self):
+		html = rendering.sanitize_html(
+			'<p onclick="x()">Hi <a href="javascript:alert(1)">a</a> <a href="https://e.com">b</a>'
+			'<script>alert(1)</script><img src="/i.png" onerror="x()"><iframe src="//e.com">no</iframe><b>open'
+		)
+		self.assertEqual(
+			html,
+			'<p>Hi <a>a</a> <a href="https://e.com" rel="noopener noreferrer">b</a><img src="/i.png"><b>open</b></p>',
+		)
+		self.assertEqual(rendering.sanitize_html('a < b & <i>c</i></p>'), 'a &lt; b &amp; <i>c</i>')
+
+	def test_body_is_rendered_once_per_revision_and_served_from_cache(self):
+		lesson = self._lesson('First line\n\n<b>bold</b><script>x</script>')
+		self.assertEqual(LessonRender.objects.count(), 1)
+		with patch.object(rendering, 'render_body', side_effect=AssertionError('rendered on request')):
+			with self.assertNumQueries(0):
+				html = rendering.lesson_html(lesson)
+		self.assertHTMLEqual(html, '<p>First line</p><p><b>bold</b></p>')
+
+		# Lessons sharing a body share the render; an edit renders the new revision.
+		self._lesson(lesson.body)
+		self.assertEqual(LessonRender.objects.count(), 1)
+		with self.captureOnCommitCallbacks(execute=True):
+			lesson.body = 'Second'
+			lesson.save()
+		self.assertEqual(rendering.lesson_html(lesson), '<p>Second</p>')
+		self.assertEqual(LessonRender.objects.count(), 2)
+
+	def test_renderer_upgrade_serves_stale_html_and_rerenders_in_background(self):
+		lesson = self._lesson('Body')
+		with patch.object(rendering, 'RENDERER_VERSION', rendering.RENDERER_VERSION + 1), \
+				patch('academy_courses.tasks.render_stale_lessons.apply_async') as queued:
+			self.assertEqual(rendering.lesson_html(lesson), '<p>Body</p>')
+			rendering.lesson_html(lesson)
+			self.assertEqual(queued.call_count, 1)
+			self.assertEqual(rendering.render_stale(), 1)
+		self.assertEqual(LessonRender.objects.get().renderer_version, rendering.RENDERER_VERSION + 1)
+
+	def test_html_bodies_skip_markdown(self):
+		# Bodies written before Markdown support: indented markup after a blank line stays markup.
+		lesson = self._lesson('<div>\n<p>Intro</p>\n\n    <p>Indented</p>\n</div>')
+		self.assertHTMLEqual(rendering.lesson_html(lesson), '<div><p>Intro</p><p>Indented</p></div>')
+
+	def test_body_is_hashed_on_read(self):
+		lesson = self._lesson('Old')
+		Lesson.objects.filter(pk=lesson.pk).update(body='New')
+		lesson.refresh_from_db()
+		with patch('academy_courses.tasks.render_stale_lessons.apply_async'):
+			self.assertHTMLEqual(rendering.lesson_html(lesson), '<p>New</p>')
+		self.assertEqual(Lesson.objects.get(pk=lesson.pk).body_hash, rendering.body_hash('New'))
+		self.assertEqual(rendering.render_stale(), 1)
+
+	def test_unrendered_body_is_shown_sanitized_and_queued(self):
+		Lesson.objects.create(module=self.module, slug='raw', title='Raw', body='<em>Hi</em><script>x</script>')
+		lesson = Lesson.objects.get(slug='raw')
+		with patch('academy_courses.tasks.render_stale_lessons.apply_async') as queued:
+			self.assertEqual(rendering.lesson_html(lesson), '<em>Hi</em>')
+		queued.assert_called_once()
+
+	def test_body_is_chunked_at_sections(self):
+		body = '<p>Intro</p>\n<h2>One</h2>\n<p>a</p>\n<h2>Two</h2>\n<div><h2>nested</h2></div>\n<p>' + 'x' * 50 + '</p><p>y</p>'
+		with patch.object(rendering, 'CHUNK_SIZE', 40):
+			lesson = self._lesson(body)
+		rendered = rendering.lesson_render(lesson)
+		self.assertEqual(''.join(rendered.chunk(i) for i in range(len(rendered.chunks))), rendered.html)
+		self.assertEqual(
+			[rendered.chunk(i).split('>')[0] for i in range(len(rendered.chunks))],
+			# Headings start sections; the long paragraph closes its chunk by size.
+			['<p', '<h2', '<h2', '<p', '<p'],
+		)
+		self.assertEqual(rendering.chunk_offsets(0, []), [[0, 0]])
+		self.assertEqual(list(rendering.parse_chunk_range('1-2', 4)), [1, 2])
+		self.assertEqual(list(rendering.parse_chunk_range('2-', 4)), [2, 3])
+		self.assertEqual(list(rendering.parse_chunk_range('3-9', 4)), [3])
+		for bad in ('', 'a-b', '2-1', '-1'):
+			with self.assertRaises(ValueError):
+				rendering.parse_chunk_range(bad, 4)
+
+		self.module.course.status = ContentStatus.PUBLISHED
+		self.module.course.save()
+		Lesson.objects.filter(pk=lesson.pk).update(status=ContentStatus.PUBLISHED)
+		data = self.client.get(f'/api/lessons/{lesson.slug}/?chunks=1-2', secure=True).json()
+		self.assertNotIn('body', data)
+		self.assertEqual(data['chunks'], {'total': 5, 'start': 1, 'stop': 3, 'html': [rendered.chunk(1), rendered.chunk(2)]})
+		self.assertEqual(self.client.get(f'/api/lessons/{lesson.slug}/?chunks=x', secure=True).status_code, 400)
+		self.assertIn('body', self.client.get(f'/api/lessons/{lesson.slug}/', secure=True).json())
+
+
+@patch('academy_courses.tasks.render_stale_lessons.apply_async', lambda *a, **kw: None)
+class CourseArchiveTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		category = CourseCategory.objects.create(name='Web', slug='web')
+		self.course = Course.objects.create(slug='django', title='Django', category=category, price=999, status=ContentStatus.PUBLISHED)
+		for m in range(2):
+			module = Module.objects.create(course=self.course, slug=f'm{m}', title=f'Module {m}', order=m)
+			for n in range(3):
+				Lesson.objects.create(module=module, slug=f'l{m}-{n}', title=f'Lesson {m}.{n}', order=n, body=f'Body {m}.{n}', estimated_minutes=5)
+
+	def _archive(self):
+		return io.BytesIO(b''.join(archive.export_archive(Course.objects.all())))
+
+	def _import(self, data):
+		data.seek(0)
+		return archive.plan_import(archive.read_archive(data))
+
+	def test_round_trip_into_an_empty_database(self):
+		data = self._archive()
+		Course.objects.all().delete()
+		CourseCategory.objects.all().delete()
+
+		plan = self._import(data)
+		self.assertEqual(plan.summary()['lessons'], '6 new, 0 changed, 0 unchanged')
+		with self.captureOnCommitCallbacks(execute=True):
+			with self.assertNumQueries(9):
+				archive.apply_import(plan)
+
+		course = Course.objects.get(slug='django')
+		self.assertEqual((course.category.slug, course.price, course.status), ('web', 999, ContentStatus.PUBLISHED))
+		lesson = Lesson.objects.get(module__course=course, module__slug='m1', slug='l1-2')
+		self.assertEqual((lesson.title, lesson.body, lesson.estimated_minutes), ('Lesson 1.2', 'Body 1.2', 5))
+		self.assertEqual(lesson.body_hash, rendering.body_hash('Body 1.2'))
+		self.assertEqual(len(catalog.search({}).ids), 1)
+
+	def test_import_diffs_against_existing_slugs(self):
+		data = self._archive()
+		Lesson.objects.filter(slug='l0-0').update(title='Edited')
+		Lesson.objects.filter(slug='l1-2').delete()
+		# Listed under m1 in the archive, so it moves back there.
+		Lesson.objects.filter(slug='l1-0').update(module=Module.objects.get(slug='m0'))
+
+		plan = self._import(data)
+		self.assertEqual(plan.summary(), {
+			'categories': '0 new, 0 changed, 1 unchanged',
+			'courses': '0 new, 0 changed, 1 unchanged',
+			'modules': '0 new, 0 changed, 2 unchanged',
+			'lessons': '1 new, 2 changed, 3 unchanged',
+		})
+		archive.apply_import(plan)
+		self.assertFalse(Lesson.objects.filter(title='Edited').exists())
+		self.assertEqual(Lesson.objects.count(), 6)
+		self.assertEqual(Lesson.objects.get(slug='l1-0').module.slug, 'm1')
+
+	def test_invalid_archives_are_rejected_before_writing(self):
+		lines = [
+			{'type': 'archive', 'format': archive.FORMAT, 'version': archive.VERSION},
+			{'type': 'course', 'slug': 'new', 'title': 'New', 'category': 'nope', 'price': 'free'},
+			{'type': 'module', 'course': 'missing', 'slug': 'm', 'title': 'M'},
+			{'type': 'lesson', 'course': 'new', 'module': 'm', 'slug': 'bad slug', 'title': 'L', 'status': 'LIVE'},
+			{'type': 'quiz'},
+		]
+		data = io.BytesIO(''.join(json.dumps(line) + '\n' for line in lines).encode())
+		with self.assertRaises(archive.ArchiveError) as caught:
+			self._import(data)
+		self.assertEqual(len(caught.exception.errors), 7)
+		self.assertFalse(Course.objects.filter(slug='new').exists())
+
+		with self.assertRaises(archive.ArchiveError):
+			self._import(io.BytesIO(b'{"type": "archive", "format": "academy-course-archive", "version": 99}\n'))
+
+	def test_archive_header_must_be_the_first_record(self):
+		data = io.BytesIO(b'\n{"type": "course", "slug": "new", "title": "New"}\n')
+		with self.assertRaises(archive.ArchiveError) as caught:
+			self._import(data)
+		self.assertEqual(caught.exception.errors, [f'line 2: not a {archive.FORMAT} file'])
+
+	def test_overlong_values_are_rejected(self):
+		header = {'type': 'archive', 'format': archive.FORMAT, 'version': archive.VERSION}
+		limit = Course._meta.get_field('title').max_length
+		lines = [header, {'type': 'course', 'slug': 'x' * 300, 'title': 'T' * (limit + 1)}]
+		data = io.BytesIO(''.join(json.dumps(line) + '\n' for line in lines).encode())
+		with self.assertRaises(archive.ArchiveError) as caught:
+			self._import(data)
+		self.assertEqual(len(caught.exception.errors), 2)
+		self.assertIn(f'title is longer than {limit} characters', caught.exception.errors[1])
+
+	def test_lessons_of_courses_outside_the_archive_are_not_moved(self):
+		other = Course.objects.create(slug='flask', title='Flask', category=self.course.category)
+		Module.objects.create(course=other, slug='intro', title='Intro')
+		exported = gzip.decompress(b''.join(archive.export_archive(Course.objects.filter(pk=other.pk))))
+		# Claims a lesson that lives in the django course.
+		data = io.BytesIO(exported + json.dumps({'type': 'lesson', 'course': 'flask', 'module': 'intro', 'slug': 'l0-0', 'title': 'Stolen'}).encode() + b'\n')
+		with self.assertRaises(archive.ArchiveError) as caught:
+			self._import(data)
+		self.assertIn('l0-0 (in django)', caught.exception.errors[0])
+		self.assertEqual(Lesson.objects.get(slug='l0-0').module.course, self.course)
+
+	def test_commands(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			path = os.path.join(tmp, 'courses.jsonl.gz')
+			call_command('export_courses', 'django', output=path, stderr=StringIO())
+			Lesson.objects.filter(slug__in=['l0-1', 'l1-1']).update(title='Edited')
+			out = StringIO()
+			call_command('import_courses', path, dry_run=True, stdout=out)
+			self.assertIn('lessons: 0 new, 2 changed, 4 unchanged', out.getvalue())
+			self.assertEqual(Lesson.objects.filter(title='Edited').count(), 2)
+			call_command('import_courses', path, stdout=StringIO())
+			self.assertEqual(Lesson.objects.filter(title='Edited').count(), 0)
@@ -1,6 +1,14 @@
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.response import Response
 
+from academy_learning.presence import course_scope, get_presence_store
+
+from . import catalog
+from .filters import CourseFilter
 from .models import ContentStatus, Course, CourseCategory, Lesson, Module
 from .serializers import CourseCategorySerializer, CourseSerializer, LessonSerializer, ModuleSerializer
 
@@ -20,6 +28,10 @@ class CourseViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.G
 	serializer_class = CourseSerializer
 	lookup_field = 'slug'
 	permission_classes = [IsAuthenticatedOrReadOnly]
+	filter_backends = [DjangoFilterBackend, OrderingFilter]
+	filterset_class = CourseFilter
+	ordering_fields = ['order', 'title', 'price', 'published_at', 'created_at']
+	ordering = ['order', 'title']
 	
 	def get_queryset(self):
 		queryset = Course.objects.select_related('category').all()
@@ -28,6 +40,33 @@ class CourseViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.G
 			queryset = queryset.filter(status=ContentStatus.PUBLISHED)
 		return queryset
 
+	@action(detail=False, methods=['get'])
+	def facets(self, request):
+		"""Facet counts for the given filters, served from the cached facet index."""
+		filters = catalog.clean_filters(request.query_params)
+		statuses = None if request.user.is_staff else (ContentStatus.PUBLISHED,)
+		result = catalog.search(filters, statuses=statuses)
+		return Response({'count': len(result.ids), 'facets': result.facets})
+
+	@action(detail=True, methods=['get'])
+	def presence(self, request, slug=None):
+		"""Learners currently connected to this course; staff also get a roster page."""
+		course = self.get_object()
+		store = get_presence_store()
+		scope = course_scope(course.id)
+		payload = {'course_id': course.id, 'online': store.count(scope)}
+		if request.user.is_staff:
+			try:
+				offset = max(int(request.query_params.get('offset', 0)), 0)
+				limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+			except ValueError:
+				offset, limit = 0, 50
+			payload['roster'] = [
+				{'user_id': entry.user_id, 'expires_at': entry.expires_at}
+				for entry in store.roster(scope, offset=offset, limit=limit)
+			]
+		return Response(payload)
+
 
 class ModuleViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
 	"""
@@ -63,3 +102,9 @@ class LessonViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.G
 				module__course__status=ContentStatus.PUBLISHED
 			)
 		return queryset
+
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		if self.action == 'retrieve' and 'chunks' in self.request.query_params:
+			context['chunk_range'] = self.request.query_params['chunks']
+		return context
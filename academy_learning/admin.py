@@ -1,11 +1,14 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
+from academy.exports import ExportActionForm, export_csv_action, export_jsonl_action
+from academy.paginators import EstimatedCountAdminMixin
+
 from .models import Certificate, CourseProgress, Enrollment, LessonProgress
 
 
 @admin.register(Enrollment)
-class EnrollmentAdmin(admin.ModelAdmin):
+class EnrollmentAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ("user_email", "course", "status_badge", "started_at", "completed_at")
     list_filter = ("status", "course")
     search_fields = ("user__email", "user__name", "course__slug", "course__title")
@@ -13,6 +16,8 @@ class EnrollmentAdmin(admin.ModelAdmin):
     date_hierarchy = 'started_at'
     ordering = ['-started_at']
     list_select_related = ['user', 'course']
+    actions = [export_csv_action, export_jsonl_action]
+    action_form = ExportActionForm
     
     def user_email(self, obj):
         return obj.user.email
@@ -34,7 +39,7 @@ class EnrollmentAdmin(admin.ModelAdmin):
 
 
 @admin.register(CourseProgress)
-class CourseProgressAdmin(admin.ModelAdmin):
+class CourseProgressAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ("user_email", "course", "progress_bar", "updated_at")
     search_fields = ("user__email", "user__name", "course__slug", "course__title")
     list_filter = ("course",)
@@ -60,7 +65,7 @@ class CourseProgressAdmin(admin.ModelAdmin):
 
 
 @admin.register(LessonProgress)
-class LessonProgressAdmin(admin.ModelAdmin):
+class LessonProgressAdmin(EstimatedCountAdminMixin, admin.ModelAdmin):
     list_display = ("user_email", "lesson", "completed_badge", "completed_at", "updated_at")
     list_filter = ("completed",)
     search_fields = ("user__email", "lesson__title")
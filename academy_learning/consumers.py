@@ -1,239 +1,369 @@
 """
 WebSocket consumers for real-time learning features.
 """
-import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.core.cache import cache
 
+from academy_learning.presence import course_scope, get_presence_store
+from academy_learning.protocol import (
+    TOPIC_COURSE_UPDATES,
+    TOPIC_COURSES,
+    TOPIC_NOTIFICATIONS,
+    TOPIC_PROGRESS,
+    FramedSenderMixin,
+    parse_topic,
+    topic_group,
+    topic_name,
+)
+
+
+class PresenceMixin:
+    """Keep the connected user in presence scopes while the socket is open.
+
+    Clients refresh membership by sending ``{"action": "heartbeat"}`` more often
+    than PRESENCE_TTL; connections that go quiet expire on their own.
+    """
+
+    presence_scopes = frozenset()
+
+    async def presence_join(self, scope):
+        self.presence_scopes = self.presence_scopes | {scope}
+        await sync_to_async(get_presence_store().touch)(scope, self.user.id, self.channel_name)
+
+    async def presence_heartbeat(self):
+        store = get_presence_store()
+        for scope in self.presence_scopes:
+            await sync_to_async(store.touch)(scope, self.user.id, self.channel_name)
+
+    async def presence_leave(self, scope=None):
+        scopes = self.presence_scopes if scope is None else self.presence_scopes & {scope}
+        store = get_presence_store()
+        for item in scopes:
+            await sync_to_async(store.leave)(item, self.user.id, self.channel_name)
+        self.presence_scopes = self.presence_scopes - scopes
 
-class ProgressConsumer(AsyncWebsocketConsumer):
-    """Real-time course progress updates."""
+    async def presence_count(self, scope):
+        return await sync_to_async(get_presence_store().count)(scope)
+
+
+def _get_progress(user, course_id):
+    from academy_learning.models import CourseProgress
+    try:
+        progress = CourseProgress.objects.get(
+            user=user,
+            course_id=course_id
+        )
+        return {
+            'completed_lessons': progress.completed_lessons,
+            'total_lessons': progress.total_lessons,
+            'progress_percent': progress.progress_percent,
+        }
+    except CourseProgress.DoesNotExist:
+        return {
+            'completed_lessons': 0,
+            'total_lessons': 0,
+            'progress_percent': 0,
+        }
+
+
+def _mark_lesson_complete(user, course_id, lesson_id):
+    from academy_learning.models import LessonProgress, CourseProgress
+    from academy_courses.models import Lesson
+    from django.utils import timezone
     
-    async def connect(self):
-        self.course_id = self.scope['url_route']['kwargs']['course_id']
-        self.user = self.scope['user']
-        
-        if not self.user.is_authenticated:
-            await self.close()
-            return
+    try:
+        lesson = Lesson.objects.get(id=lesson_id, module__course_id=course_id)
+        lesson_progress, created = LessonProgress.objects.get_or_create(
+            user=user,
+            lesson=lesson,
+            defaults={'completed': True, 'completed_at': timezone.now()}
+        )
         
-        self.room_group_name = f'progress_{self.user.id}_{self.course_id}'
+        if not lesson_progress.completed:
+            lesson_progress.completed = True
+            lesson_progress.completed_at = timezone.now()
+            lesson_progress.save()
         
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
+        # Update course progress
+        course_progress, _ = CourseProgress.objects.get_or_create(
+            user=user,
+            course_id=course_id
         )
         
-        await self.accept()
+        completed_count = LessonProgress.objects.filter(
+            user=user,
+            lesson__module__course_id=course_id,
+            completed=True
+        ).count()
         
-        # Send current progress on connect
-        progress = await self.get_progress()
-        await self.send(text_data=json.dumps({
-            'type': 'progress_update',
-            'progress': progress
-        }))
-    
-    async def disconnect(self, close_code):
-        if hasattr(self, 'room_group_name'):
-            await self.channel_layer.group_discard(
-                self.room_group_name,
-                self.channel_name
-            )
-    
-    async def receive(self, text_data):
-        """Handle incoming progress updates from client."""
-        try:
-            data = json.loads(text_data)
-            action = data.get('action')
-            
-            if action == 'mark_complete':
-                lesson_id = data.get('lesson_id')
-                await self.mark_lesson_complete(lesson_id)
-            elif action == 'update_checkpoint':
-                lesson_id = data.get('lesson_id')
-                checkpoint = data.get('checkpoint')
-                await self.update_checkpoint(lesson_id, checkpoint)
-        except Exception as e:
-            await self.send(text_data=json.dumps({
-                'type': 'error',
-                'message': str(e)
-            }))
-    
-    async def progress_update(self, event):
-        """Send progress update to WebSocket."""
-        await self.send(text_data=json.dumps(event['data']))
-    
-    @database_sync_to_async
-    def get_progress(self):
-        from academy_learning.models import CourseProgress
-        try:
-            progress = CourseProgress.objects.get(
-                user=self.user,
-                course_id=self.course_id
-            )
-            return {
-                'completed_lessons': progress.completed_lessons,
-                'total_lessons': progress.total_lessons,
-                'progress_percent': progress.progress_percent,
-            }
-        except CourseProgress.DoesNotExist:
-            return {
-                'completed_lessons': 0,
-                'total_lessons': 0,
-                'progress_percent': 0,
-            }
-    
-    @database_sync_to_async
-    def mark_lesson_complete(self, lesson_id):
-        from academy_learning.models import LessonProgress, CourseProgress
-        from academy_courses.models import Lesson
-        from django.utils import timezone
+        total_lessons = Lesson.objects.filter(
+            module__course_id=course_id
+        ).count()
         
-        try:
-            lesson = Lesson.objects.get(id=lesson_id, module__course_id=self.course_id)
-            lesson_progress, created = LessonProgress.objects.get_or_create(
-                user=self.user,
-                lesson=lesson,
-                defaults={'completed': True, 'completed_at': timezone.now()}
-            )
-            
-            if not lesson_progress.completed:
-                lesson_progress.completed = True
-                lesson_progress.completed_at = timezone.now()
-                lesson_progress.save()
-            
-            # Update course progress
-            course_progress, _ = CourseProgress.objects.get_or_create(
-                user=self.user,
-                course_id=self.course_id
-            )
-            
-            completed_count = LessonProgress.objects.filter(
-                user=self.user,
-                lesson__module__course_id=self.course_id,
-                completed=True
-            ).count()
-            
-            total_lessons = Lesson.objects.filter(
-                module__course_id=self.course_id
-            ).count()
-            
-            course_progress.completed_lessons = completed_count
-            course_progress.total_lessons = total_lessons
-            course_progress.progress_percent = (completed_count / total_lessons * 100) if total_lessons > 0 else 0
-            course_progress.last_viewed_lesson = lesson
-            course_progress.save()
-            
-            return True
-        except Exception:
+        course_progress.completed_lessons = completed_count
+        course_progress.total_lessons = total_lessons
+        course_progress.progress_percent = (completed_count / total_lessons * 100) if total_lessons > 0 else 0
+        course_progress.last_viewed_lesson = lesson
+        course_progress.save()
+        
+        return True
+    except Exception:
+        return False
+
+
+def _can_subscribe(user, kind, course_id):
+    """Per-topic authorization for the realtime gateway."""
+    from academy_courses.models import ContentStatus, Course
+    from academy_learning.models import Enrollment
+
+    authenticated = user is not None and user.is_authenticated
+    if kind == TOPIC_COURSES:
+        return True
+    if kind == TOPIC_NOTIFICATIONS:
+        return authenticated
+    if kind == TOPIC_PROGRESS:
+        if not authenticated:
             return False
+        return user.is_staff or Enrollment.objects.filter(user=user, course_id=course_id).exists()
+    if kind == TOPIC_COURSE_UPDATES:
+        if authenticated and user.is_staff:
+            return Course.objects.filter(id=course_id).exists()
+        return Course.objects.filter(id=course_id, status=ContentStatus.PUBLISHED).exists()
+    return False
+
+
+def _update_checkpoint(user, lesson_id, checkpoint):
+    from academy_learning.models import LessonProgress
+    from academy_courses.models import Lesson
     
-    @database_sync_to_async
-    def update_checkpoint(self, lesson_id, checkpoint):
-        from academy_learning.models import LessonProgress
-        from academy_courses.models import Lesson
+    try:
+        lesson = Lesson.objects.get(id=lesson_id)
+        lesson_progress, _ = LessonProgress.objects.get_or_create(
+            user=user,
+            lesson=lesson
+        )
         
+        if not lesson_progress.checkpoints:
+            lesson_progress.checkpoints = []
+        
+        lesson_progress.checkpoints.append(checkpoint)
+        lesson_progress.save()
+        return True
+    except Exception:
+        return False
+
+
+class RealtimeGatewayConsumer(FramedSenderMixin, PresenceMixin, AsyncWebsocketConsumer):
+    """One socket carrying progress, notifications and course updates.
+
+    Clients manage topics at runtime::
+
+        {"action": "subscribe", "topic": "progress:12"}
+        {"action": "unsubscribe", "topic": "progress:12"}
+
+    Initial topics may also be given in the query string, e.g.
+    ``/ws/realtime/?topics=notifications,courses``. Each subscription is
+    authorized separately; outgoing events carry a ``topic`` key so the client
+    can route them, and inbound progress actions name their course the same way.
+    Combined with the ``vpa.msgpack.v1`` subprotocol this replaces three sockets
+    (and three session lookups) with one.
+    """
+
+    max_topics = 50
+    # Legacy single-topic routes close the socket instead of reporting an error.
+    close_on_denied = False
+
+    async def connect(self):
+        self.user = self.scope.get('user')
+        self.groups_by_topic = {}
+
         try:
-            lesson = Lesson.objects.get(id=lesson_id)
-            lesson_progress, _ = LessonProgress.objects.get_or_create(
-                user=self.user,
-                lesson=lesson
-            )
-            
-            if not lesson_progress.checkpoints:
-                lesson_progress.checkpoints = []
-            
-            lesson_progress.checkpoints.append(checkpoint)
-            lesson_progress.save()
+            initial = self.initial_topics()
+        except ValueError:
+            await self.close()
+            return
+
+        # Join initial topics before accepting so no broadcast is missed
+        # between the handshake and the subscription.
+        allowed, denied = [], []
+        for kind, course_id in initial[:self.max_topics]:
+            if await self.authorize(kind, course_id):
+                allowed.append((kind, course_id))
+            elif self.close_on_denied:
+                # Reject the handshake outright, as the single-topic routes always did.
+                await self.close()
+                return
+            else:
+                denied.append(topic_name(kind, course_id))
+        for kind, course_id in allowed:
+            await self._join(kind, course_id)
+
+        await self.accept_framed()
+        for topic in denied:
+            await self.send_event({'type': 'error', 'topic': topic, 'message': 'Not allowed'})
+        for kind, course_id in allowed:
+            await self.send_snapshot(kind, course_id)
+
+    def initial_topics(self):
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        raw = ','.join(query.get('topics', []))
+        return [parse_topic(topic) for topic in raw.split(',') if topic.strip()]
+
+    @property
+    def is_authenticated(self):
+        return self.user is not None and self.user.is_authenticated
+
+    async def authorize(self, kind, course_id):
+        return await database_sync_to_async(_can_subscribe)(self.user, kind, course_id)
+
+    async def subscribe(self, kind, course_id):
+        topic = topic_name(kind, course_id)
+        if topic in self.groups_by_topic:
             return True
-        except Exception:
+        if len(self.groups_by_topic) >= self.max_topics:
+            await self.send_event({'type': 'error', 'topic': topic, 'message': 'Too many subscriptions'})
+            return False
+        if not await self.authorize(kind, course_id):
+            await self.send_event({'type': 'error', 'topic': topic, 'message': 'Not allowed'})
             return False
+        await self._join(kind, course_id)
+        await self.send_snapshot(kind, course_id)
+        return True
 
+    async def _join(self, kind, course_id):
+        group = topic_group(kind, course_id, self.user.id if self.is_authenticated else None)
+        self.groups_by_topic[topic_name(kind, course_id)] = group
+        await self.channel_layer.group_add(group, self.channel_name)
+        if self.is_authenticated and course_id is not None:
+            await self.presence_join(course_scope(course_id))
 
-class NotificationConsumer(AsyncWebsocketConsumer):
-    """Real-time notifications for users."""
-    
-    async def connect(self):
-        self.user = self.scope['user']
-        
-        if not self.user.is_authenticated:
-            await self.close()
+    async def unsubscribe(self, kind, course_id):
+        topic = topic_name(kind, course_id)
+        group = self.groups_by_topic.pop(topic, None)
+        if group is None:
             return
-        
-        self.room_group_name = f'notifications_{self.user.id}'
-        
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-        
-        await self.accept()
-        
-        # Send unread count on connect
-        unread_count = await self.get_unread_count()
-        await self.send(text_data=json.dumps({
-            'type': 'unread_count',
-            'count': unread_count
-        }))
-    
-    async def disconnect(self, close_code):
-        if hasattr(self, 'room_group_name'):
-            await self.channel_layer.group_discard(
-                self.room_group_name,
-                self.channel_name
+        await self.channel_layer.group_discard(group, self.channel_name)
+        if self.is_authenticated and course_id is not None:
+            still_watching = any(
+                parse_topic(other)[1] == course_id for other in self.groups_by_topic
             )
-    
-    async def receive(self, text_data):
-        """Handle incoming messages from client."""
+            if not still_watching:
+                await self.presence_leave(course_scope(course_id))
+
+    async def send_snapshot(self, kind, course_id):
+        """Current state sent right after a subscription is accepted."""
+        if kind == TOPIC_PROGRESS:
+            progress = await database_sync_to_async(_get_progress)(self.user, course_id)
+            await self.send_event({
+                'type': 'progress_update',
+                'topic': topic_name(kind, course_id),
+                'progress': progress,
+            })
+        elif kind == TOPIC_NOTIFICATIONS:
+            await self.send_event({
+                'type': 'unread_count',
+                'topic': TOPIC_NOTIFICATIONS,
+                'count': await database_sync_to_async(cache.get)(f'unread_notifications_{self.user.id}', 0),
+            })
+
+    async def disconnect(self, close_code):
+        self.stop_writer()
+        if self.is_authenticated:
+            await self.presence_leave()
+        for group in getattr(self, 'groups_by_topic', {}).values():
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+    def default_topic(self):
+        """Topic assumed for inbound actions that don't name one."""
+        return None
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """Handle subscription management and progress actions from the client."""
         try:
-            data = json.loads(text_data)
+            data = self.decode_message(text_data, bytes_data)
             action = data.get('action')
-            
+
+            if action == 'heartbeat':
+                await self.presence_heartbeat()
+                for scope in sorted(self.presence_scopes):
+                    await self.send_event({
+                        'type': 'presence',
+                        'scope': scope,
+                        'online': await self.presence_count(scope),
+                    })
+                return
             if action == 'mark_read':
-                notification_id = data.get('notification_id')
-                await self.mark_notification_read(notification_id)
+                # Placeholder - implement when notification model is created
+                return
+
+            topic = data.get('topic') or self.default_topic()
+            kind, course_id = parse_topic(topic)
+            if action == 'subscribe':
+                await self.subscribe(kind, course_id)
+                return
+            if action == 'unsubscribe':
+                await self.unsubscribe(kind, course_id)
+                return
+
+            if kind != TOPIC_PROGRESS or topic_name(kind, course_id) not in self.groups_by_topic:
+                raise ValueError('Not subscribed to a progress topic')
+            if action == 'mark_complete':
+                await database_sync_to_async(_mark_lesson_complete)(self.user, course_id, data.get('lesson_id'))
+            elif action == 'update_checkpoint':
+                await database_sync_to_async(_update_checkpoint)(self.user, data.get('lesson_id'), data.get('checkpoint'))
         except Exception as e:
-            await self.send(text_data=json.dumps({
+            await self.send_event({
                 'type': 'error',
                 'message': str(e)
-            }))
-    
+            })
+
+    async def progress_update(self, event):
+        """Send progress update to WebSocket."""
+        await self.send_event({**event['data'], 'topic': topic_name(TOPIC_PROGRESS, event.get('course_id'))})
+
     async def notification(self, event):
         """Send notification to WebSocket."""
-        await self.send(text_data=json.dumps(event['data']))
-    
-    @database_sync_to_async
-    def get_unread_count(self):
-        # Placeholder - implement when notification model is created
-        return cache.get(f'unread_notifications_{self.user.id}', 0)
-    
-    @database_sync_to_async
-    def mark_notification_read(self, notification_id):
-        # Placeholder - implement when notification model is created
-        pass
-
+        await self.send_event({**event['data'], 'topic': TOPIC_NOTIFICATIONS})
 
-class CourseUpdateConsumer(AsyncWebsocketConsumer):
-    """Real-time course content updates."""
-    
-    async def connect(self):
-        self.course_id = self.scope['url_route']['kwargs']['course_id']
-        self.room_group_name = f'course_updates_{self.course_id}'
-        
-        await self.channel_layer.group_add(
-            self.room_group_name,
-            self.channel_name
-        )
-        
-        await self.accept()
-    
-    async def disconnect(self, close_code):
-        await self.channel_layer.group_discard(
-            self.room_group_name,
-            self.channel_name
-        )
-    
     async def course_update(self, event):
         """Send course update to WebSocket."""
-        await self.send(text_data=json.dumps(event['data']))
+        # Per-course broadcasts wrap their payload in "data"; catalogue-wide
+        # broadcasts from signals_realtime carry update_type/course directly.
+        if 'data' in event:
+            await self.send_event({**event['data'], 'topic': topic_name(TOPIC_COURSE_UPDATES, event.get('course_id'))})
+        else:
+            await self.send_event({'type': event['update_type'], 'course': event['course'], 'topic': TOPIC_COURSES})
+
+
+class ProgressConsumer(RealtimeGatewayConsumer):
+    """Real-time course progress updates (legacy ``ws/progress/<id>/`` route)."""
+
+    close_on_denied = True
+
+    def initial_topics(self):
+        return [(TOPIC_PROGRESS, self.scope['url_route']['kwargs']['course_id'])]
+
+    def default_topic(self):
+        return topic_name(TOPIC_PROGRESS, self.scope['url_route']['kwargs']['course_id'])
+
+
+class NotificationConsumer(RealtimeGatewayConsumer):
+    """Real-time notifications for users (legacy ``ws/notifications/`` route)."""
+
+    close_on_denied = True
+
+    def initial_topics(self):
+        return [(TOPIC_NOTIFICATIONS, None)]
+
+
+class CourseUpdateConsumer(RealtimeGatewayConsumer):
+    """Real-time course content updates (legacy ``ws/course-updates/<id>/`` route)."""
+
+    close_on_denied = True
+
+    def initial_topics(self):
+        return [(TOPIC_COURSE_UPDATES, self.scope['url_route']['kwargs']['course_id'])]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_learning', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='courseprogress',
+            index=models.Index(fields=['updated_at', 'id'], name='course_progress_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['started_at', 'id'], name='enrollment_started'),
+        ),
+        migrations.AddIndex(
+            model_name='enrollment',
+            index=models.Index(fields=['completed_at', 'id'], name='enrollment_completed'),
+        ),
+    ]
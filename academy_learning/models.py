@@ -25,7 +25,12 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = [("user", "course")]
-        indexes = [models.Index(fields=["user", "course"]) ]
+        indexes = [
+            models.Index(fields=["user", "course"]),
+            # Watermark scans for the admin dashboard (academy_api.dashboard).
+            models.Index(fields=["started_at", "id"], name="enrollment_started"),
+            models.Index(fields=["completed_at", "id"], name="enrollment_completed"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user_id}:{self.course_id}:{self.status}"
@@ -43,6 +48,7 @@ class CourseProgress(models.Model):
 
     class Meta:
         unique_together = [("user", "course")]
+        indexes = [models.Index(fields=["updated_at", "id"], name="course_progress_updated")]
 
     def __str__(self) -> str:
         return f"{self.user_id}:{self.course_id}:{self.progress_percent}"
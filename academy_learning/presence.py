@@ -0,0 +1,187 @@
+"""
+Presence tracking for learners connected to course WebSockets.
+
+Membership is stored in sorted sets scored by expiry timestamp, so a
+connection that stops sending heartbeats (for example because its Daphne
+worker crashed) simply ages out and is pruned on the next write or by the
+periodic sweep task. Redis is used when available; development falls back to
+an in-process store with the same semantics.
+
+Keys (Redis backend):
+    presence:{scope}              user ids, score = latest expiry
+    presence:{scope}:u:{user_id}  channel names of that user, score = expiry
+    presence:scopes               known scopes, used by the sweeper
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+
+KEY_PREFIX = 'presence'
+SCOPES_KEY = f'{KEY_PREFIX}:scopes'
+
+
+def course_scope(course_id: int) -> str:
+    return f'course:{course_id}'
+
+
+@dataclass(frozen=True)
+class PresenceEntry:
+    user_id: int
+    expires_at: float
+
+
+# Removes one connection and drops the user from the scope only when no other
+# live connection of theirs remains. Runs atomically inside Redis.
+_LEAVE_SCRIPT = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+if redis.call('ZCARD', KEYS[1]) == 0 then
+    redis.call('ZREM', KEYS[2], ARGV[3])
+    return 0
+end
+return 1
+"""
+
+
+class RedisPresenceStore:
+    """Presence backed by Redis sorted sets (production)."""
+
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+        self._leave = client.register_script(_LEAVE_SCRIPT)
+
+    @staticmethod
+    def _users_key(scope: str) -> str:
+        return f'{KEY_PREFIX}:{scope}'
+
+    @staticmethod
+    def _conns_key(scope: str, user_id: int) -> str:
+        return f'{KEY_PREFIX}:{scope}:u:{user_id}'
+
+    def touch(self, scope: str, user_id: int, channel_name: str, now: Optional[float] = None) -> None:
+        """Join or refresh a connection; also prunes expired members of the scope."""
+        now = now or time.time()
+        expires = now + self.ttl
+        conns_key = self._conns_key(scope, user_id)
+        users_key = self._users_key(scope)
+        pipe = self.client.pipeline()
+        pipe.zadd(conns_key, {channel_name: expires})
+        pipe.expire(conns_key, self.ttl * 2)
+        pipe.zadd(users_key, {user_id: expires})
+        pipe.zremrangebyscore(users_key, '-inf', now)
+        pipe.expire(users_key, self.ttl * 2)
+        pipe.zadd(SCOPES_KEY, {scope: expires})
+        pipe.execute()
+
+    def leave(self, scope: str, user_id: int, channel_name: str, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        self._leave(
+            keys=[self._conns_key(scope, user_id), self._users_key(scope)],
+            args=[channel_name, now, user_id],
+        )
+
+    def count(self, scope: str, now: Optional[float] = None) -> int:
+        """Number of distinct online users (ZCOUNT over live expiries, O(log n))."""
+        now = now or time.time()
+        # Exclusive lower bound, as in roster() and the memory store: a member
+        # expiring at ``now`` is gone, which is also what prune() removes.
+        return self.client.zcount(self._users_key(scope), f'({now}', '+inf')
+
+    def roster(self, scope: str, offset: int = 0, limit: int = 50, now: Optional[float] = None) -> list[PresenceEntry]:
+        """One page of live users, most recently seen first (O(log n + limit))."""
+        now = now or time.time()
+        rows = self.client.zrevrangebyscore(
+            self._users_key(scope), '+inf', f'({now}', start=offset, num=limit, withscores=True
+        )
+        return [PresenceEntry(user_id=int(member), expires_at=score) for member, score in rows]
+
+    def prune(self, now: Optional[float] = None) -> int:
+        """Drop expired members from every known scope. Returns members removed."""
+        now = now or time.time()
+        removed = 0
+        for scope in self.client.zrange(SCOPES_KEY, 0, -1):
+            scope = scope.decode() if isinstance(scope, bytes) else scope
+            removed += self.client.zremrangebyscore(self._users_key(scope), '-inf', now)
+        self.client.zremrangebyscore(SCOPES_KEY, '-inf', now)
+        return removed
+
+
+class MemoryPresenceStore:
+    """In-process presence store for development and tests (single worker only)."""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users: dict[str, dict[int, float]] = {}
+        self._conns: dict[tuple[str, int], dict[str, float]] = {}
+
+    def _prune_scope(self, scope: str, now: float) -> int:
+        users = self._users.get(scope, {})
+        expired = [user_id for user_id, expires in users.items() if expires <= now]
+        for user_id in expired:
+            del users[user_id]
+            self._conns.pop((scope, user_id), None)
+        return len(expired)
+
+    def touch(self, scope: str, user_id: int, channel_name: str, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        expires = now + self.ttl
+        with self._lock:
+            self._conns.setdefault((scope, user_id), {})[channel_name] = expires
+            self._users.setdefault(scope, {})[user_id] = expires
+            self._prune_scope(scope, now)
+
+    def leave(self, scope: str, user_id: int, channel_name: str, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        with self._lock:
+            conns = self._conns.get((scope, user_id), {})
+            conns.pop(channel_name, None)
+            for name in [name for name, expires in conns.items() if expires <= now]:
+                del conns[name]
+            if not conns:
+                self._conns.pop((scope, user_id), None)
+                self._users.get(scope, {}).pop(user_id, None)
+
+    def count(self, scope: str, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        with self._lock:
+            return sum(1 for expires in self._users.get(scope, {}).values() if expires > now)
+
+    def roster(self, scope: str, offset: int = 0, limit: int = 50, now: Optional[float] = None) -> list[PresenceEntry]:
+        now = now or time.time()
+        with self._lock:
+            live = [(user_id, expires) for user_id, expires in self._users.get(scope, {}).items() if expires > now]
+        live.sort(key=lambda item: item[1], reverse=True)
+        return [PresenceEntry(user_id=user_id, expires_at=expires) for user_id, expires in live[offset:offset + limit]]
+
+    def prune(self, now: Optional[float] = None) -> int:
+        now = now or time.time()
+        with self._lock:
+            return sum(self._prune_scope(scope, now) for scope in list(self._users))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_presence_store():
+    """Return the process-wide presence store configured by PRESENCE_BACKEND."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                ttl = getattr(settings, 'PRESENCE_TTL', 60)
+                if getattr(settings, 'PRESENCE_BACKEND', 'memory') == 'redis':
+                    import redis
+                    client = redis.from_url(settings.REDIS_URL, socket_connect_timeout=2)
+                    _store = RedisPresenceStore(client, ttl)
+                else:
+                    _store = MemoryPresenceStore(ttl)
+    return _store
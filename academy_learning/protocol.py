@@ -0,0 +1,225 @@
+"""
+Wire protocol helpers shared by the realtime consumers.
+
+Clients that offer the ``vpa.msgpack.v1`` WebSocket subprotocol receive binary
+frames, each holding a msgpack-encoded *list* of events. Events produced within
+FLUSH_WINDOW seconds of each other share a frame, which cuts frame counts on
+mobile networks. Clients that don't negotiate it keep receiving one JSON text
+frame per event, exactly as before.
+
+Outgoing events pass through a bounded per-connection queue (see
+``OutboundQueue``), so a burst broadcast to a slow client coalesces or drops
+events visibly instead of overflowing the channel layer silently.
+
+Topics name the streams a socket can carry:
+    notifications           the user's notifications
+    progress:<course_id>    the user's progress in a course
+    course-updates:<id>     content updates for one course
+    courses                 catalogue-wide course changes
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+import msgpack
+from django.conf import settings
+
+from academy import metrics
+
+
+MSGPACK_SUBPROTOCOL = 'vpa.msgpack.v1'
+
+# How long binary clients wait for more events before a frame is sent.
+FLUSH_WINDOW = 0.05
+MAX_BATCH = 32
+
+# Close code sent to clients that cannot keep up with their outbox.
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+METRIC_DELIVERED = 'realtime.delivered'
+METRIC_DROPPED = 'realtime.dropped'
+METRIC_COALESCED = 'realtime.coalesced'
+REALTIME_METRICS = (METRIC_DELIVERED, METRIC_DROPPED, METRIC_COALESCED)
+
+# Snapshot events: only the latest per topic is worth delivering.
+COALESCED_TYPES = {'progress_update', 'presence', 'unread_count'}
+# Catalogue changes: only the latest state of each course is worth delivering.
+CATALOGUE_TYPES = {'course_created', 'course_updated', 'course_deleted'}
+
+TOPIC_NOTIFICATIONS = 'notifications'
+TOPIC_PROGRESS = 'progress'
+TOPIC_COURSE_UPDATES = 'course-updates'
+TOPIC_COURSES = 'courses'
+
+_TOPICS_WITH_COURSE = {TOPIC_PROGRESS, TOPIC_COURSE_UPDATES}
+
+
+def negotiate_subprotocol(scope) -> Optional[str]:
+    """Pick msgpack when the client offered it, otherwise plain JSON."""
+    if MSGPACK_SUBPROTOCOL in (scope.get('subprotocols') or []):
+        return MSGPACK_SUBPROTOCOL
+    return None
+
+
+def parse_topic(topic: str) -> tuple[str, Optional[int]]:
+    """Split ``"progress:12"`` into ``("progress", 12)``; raise ValueError if malformed."""
+    kind, _, arg = (topic or '').strip().partition(':')
+    if kind in _TOPICS_WITH_COURSE:
+        return kind, int(arg)
+    if kind in (TOPIC_NOTIFICATIONS, TOPIC_COURSES) and not arg:
+        return kind, None
+    raise ValueError(f'Unknown topic: {topic!r}')
+
+
+def topic_name(kind: str, course_id: Optional[int] = None) -> str:
+    return f'{kind}:{course_id}' if course_id is not None else kind
+
+
+def topic_group(kind: str, course_id: Optional[int], user_id: Optional[int]) -> str:
+    """Channel-layer group that carries a topic (matches the legacy group names)."""
+    if kind == TOPIC_NOTIFICATIONS:
+        return f'notifications_{user_id}'
+    if kind == TOPIC_PROGRESS:
+        return f'progress_{user_id}_{course_id}'
+    if kind == TOPIC_COURSE_UPDATES:
+        return f'course_updates_{course_id}'
+    return 'course_updates'
+
+
+def coalesce_key(event: dict):
+    """Events sharing a key replace each other while queued (latest wins)."""
+    event_type = event.get('type')
+    if event_type in COALESCED_TYPES:
+        return (event_type, event.get('topic'))
+    if event_type in CATALOGUE_TYPES and isinstance(event.get('course'), dict):
+        return ('course', event.get('topic'), event['course'].get('id'))
+    return None
+
+
+class OutboundQueue:
+    """Bounded per-connection queue of outgoing events.
+
+    Snapshot-style events are coalesced so only the latest is delivered; when
+    the queue is full the oldest event is dropped. Every decision is counted in
+    ``academy.metrics`` so slow consumers are visible on /api/metrics/.
+
+    ``dropped`` is the lifetime total; ``recent_drops()`` counts only drops
+    within the last ``drop_window`` seconds, which is what decides whether a
+    connection is too slow to keep.
+    """
+
+    def __init__(self, maxsize: int, drop_window: float = 10.0):
+        self.maxsize = maxsize
+        self.drop_window = drop_window
+        self.dropped = 0
+        self._drop_times: deque = deque()
+        self._items: OrderedDict = OrderedDict()
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, event: dict) -> None:
+        key = coalesce_key(event)
+        if key is not None and key in self._items:
+            # Keep the queued slot so frequent updates aren't starved.
+            self._items[key] = event
+            metrics.incr(METRIC_COALESCED)
+            return
+        if len(self._items) >= self.maxsize:
+            self._items.popitem(last=False)
+            self.dropped += 1
+            self._drop_times.append(time.monotonic())
+            metrics.incr(METRIC_DROPPED)
+        self._items[key if key is not None else next(self._seq)] = event
+
+    def recent_drops(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        while self._drop_times and self._drop_times[0] <= now - self.drop_window:
+            self._drop_times.popleft()
+        return len(self._drop_times)
+
+    def drain(self, limit: int) -> list[dict]:
+        batch = []
+        while self._items and len(batch) < limit:
+            batch.append(self._items.popitem(last=False)[1])
+        return batch
+
+
+class FramedSenderMixin:
+    """Queue outgoing events and write them as JSON text or batched msgpack frames.
+
+    Consumers call ``accept_framed()`` instead of ``accept()``, ``send_event()``
+    instead of ``send(text_data=json.dumps(...))``, ``decode_message()`` on
+    whatever ``receive()`` was given and ``stop_writer()`` on disconnect.
+
+    ``send_event()`` never waits on the socket: group handlers return straight
+    away so the channel-layer inbox keeps draining, and a writer task delivers
+    the bounded outbox. Connections that drop more than REALTIME_MAX_DROPS
+    events within REALTIME_DROP_WINDOW seconds are closed so the client
+    reconnects and resynchronises from fresh snapshots.
+    """
+
+    subprotocol = None
+    _outbox = None
+    _wakeup = None
+    _writer_task = None
+
+    async def accept_framed(self):
+        self.subprotocol = negotiate_subprotocol(self.scope)
+        self._outbox = OutboundQueue(
+            getattr(settings, 'REALTIME_OUTBOX_SIZE', 200),
+            drop_window=getattr(settings, 'REALTIME_DROP_WINDOW', 10.0),
+        )
+        self._wakeup = asyncio.Event()
+        await self.accept(subprotocol=self.subprotocol)
+        self._writer_task = asyncio.ensure_future(self._write_loop())
+
+    @property
+    def is_binary(self) -> bool:
+        return self.subprotocol == MSGPACK_SUBPROTOCOL
+
+    def decode_message(self, text_data=None, bytes_data=None) -> dict:
+        if bytes_data is not None:
+            data = msgpack.unpackb(bytes_data, raw=False)
+        else:
+            data = json.loads(text_data)
+        if not isinstance(data, dict):
+            raise ValueError('Messages must be objects')
+        return data
+
+    async def send_event(self, event: dict):
+        if self._outbox is None:
+            return
+        self._outbox.put(event)
+        self._wakeup.set()
+        if self._outbox.recent_drops() > getattr(settings, 'REALTIME_MAX_DROPS', 1000):
+            self.stop_writer()
+            self._outbox = None
+            await self.close(code=SLOW_CONSUMER_CLOSE_CODE)
+
+    async def _write_loop(self):
+        while True:
+            await self._wakeup.wait()
+            if self.is_binary:
+                # Let more events arrive so they share one frame.
+                await asyncio.sleep(FLUSH_WINDOW)
+            self._wakeup.clear()
+            while self._outbox:
+                batch = self._outbox.drain(MAX_BATCH)
+                if self.is_binary:
+                    await self.send(bytes_data=msgpack.packb(batch, use_bin_type=True))
+                else:
+                    for event in batch:
+                        await self.send(text_data=json.dumps(event))
+                metrics.incr(METRIC_DELIVERED, len(batch))
+
+    def stop_writer(self):
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+            self._writer_task = None
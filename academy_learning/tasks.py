@@ -108,6 +108,80 @@ def send_payment_approval_email(self, user_id, course_id):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def send_payment_approval_batch(self, pairs):
+    """Email learners about a bulk approval; ``pairs`` is a list of [user_id, course_id].
+
+    Only sends mail, so a retry never repeats the realtime notifications (see
+    ``notify_payment_approval_batch``, queued alongside it).
+    """
+    try:
+        from django.core.mail import send_mass_mail
+        from academy_users.models import User
+        from academy_courses.models import Course
+
+        users = User.objects.in_bulk({user_id for user_id, _ in pairs})
+        courses = Course.objects.in_bulk({course_id for _, course_id in pairs})
+
+        messages = []
+        for user_id, course_id in pairs:
+            user, course = users.get(user_id), courses.get(course_id)
+            if user is None or course is None:
+                continue
+            messages.append((
+                'Payment Approved - Course Unlocked!',
+                f"""
+        Hi {user.name or 'there'},
+
+        Great news! Your payment for {course.title} has been approved and you are enrolled.
+
+        Start learning now: {settings.SITE_URL}/courses/{course.slug}/
+
+        - Veeru's Pro Academy Team
+        """,
+                settings.DEFAULT_FROM_EMAIL,
+                [user.email],
+            ))
+        send_mass_mail(messages, fail_silently=False)
+        return f'Payment approval email sent to {len(messages)} learner(s)'
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3)
+def notify_payment_approval_batch(self, pairs, sent=0):
+    """Realtime notifications for a bulk approval.
+
+    ``sent`` counts the pairs already notified, so a retry after a channel
+    layer failure resumes where it stopped instead of notifying twice.
+    """
+    from academy_courses.models import Course
+
+    courses = Course.objects.in_bulk({course_id for _, course_id in pairs})
+    channel_layer = get_channel_layer()
+    timestamp = timezone.now().isoformat()
+    try:
+        for user_id, course_id in pairs[sent:]:
+            course = courses.get(course_id)
+            if course is not None:
+                async_to_sync(channel_layer.group_send)(
+                    f'notifications_{user_id}',
+                    {
+                        'type': 'notification',
+                        'data': {
+                            'type': 'payment_approved',
+                            'message': f'Payment approved for {course.title}',
+                            'course_id': course_id,
+                            'timestamp': timestamp,
+                        }
+                    }
+                )
+            sent += 1
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60, args=[pairs], kwargs={'sent': sent})
+    return f'Payment approval notifications sent for {sent} approval(s)'
+
+
 @shared_task
 def update_course_progress_cache(user_id, course_id):
     """Update cached course progress data."""
@@ -136,6 +210,14 @@ def cleanup_old_sessions():
     return 'Old sessions cleaned up'
 
 
+@shared_task
+def sweep_presence():
+    """Remove presence entries whose heartbeats stopped (e.g. crashed workers)."""
+    from academy_learning.presence import get_presence_store
+    removed = get_presence_store().prune()
+    return f'Pruned {removed} stale presence entries'
+
+
 @shared_task
 def generate_certificate(user_id, course_id):
     """Generate course completion certificate."""
@@ -195,6 +277,7 @@ def broadcast_course_update(course_id, update_type, message):
         f'course_updates_{course_id}',
         {
             'type': 'course_update',
+            'course_id': course_id,
             'data': {
                 'update_type': update_type,
                 'message': message,
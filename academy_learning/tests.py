@@ -0,0 +1,213 @@
+import time
+from unittest.mock import patch
+
+from django.core import mail
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from academy_learning.presence import MemoryPresenceStore
+from academy_learning.protocol import OutboundQueue
+
+
+class PresenceStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.store = MemoryPresenceStore(ttl=60)
+        self.scope = 'course:1'
+
+    def test_counts_distinct_users_across_connections(self):
+        self.store.touch(self.scope, 1, 'chan-a', now=1000)
+        self.store.touch(self.scope, 1, 'chan-b', now=1000)
+        self.store.touch(self.scope, 2, 'chan-c', now=1000)
+        self.assertEqual(self.store.count(self.scope, now=1000), 2)
+
+        # Closing one of two tabs keeps the learner online.
+        self.store.leave(self.scope, 1, 'chan-a', now=1001)
+        self.assertEqual(self.store.count(self.scope, now=1001), 2)
+        self.store.leave(self.scope, 1, 'chan-b', now=1001)
+        self.assertEqual(self.store.count(self.scope, now=1001), 1)
+
+    def test_stale_connections_expire_without_leave(self):
+        self.store.touch(self.scope, 1, 'crashed-worker', now=1000)
+        self.store.touch(self.scope, 2, 'live', now=1050)
+        self.assertEqual(self.store.prune(now=1061), 1)
+        self.assertEqual([entry.user_id for entry in self.store.roster(self.scope, now=1061)], [2])
+
+    def test_count_excludes_expired_members_before_pruning(self):
+        self.store.touch(self.scope, 1, 'crashed-worker', now=1000)
+        self.store.touch(self.scope, 2, 'live', now=1050)
+        self.assertEqual(self.store.count(self.scope, now=1061), 1)
+        self.assertEqual(len(self.store.roster(self.scope, now=1061)), 1)
+
+    def test_roster_pages_most_recent_first(self):
+        for user_id in range(5):
+            self.store.touch(self.scope, user_id, f'chan-{user_id}', now=1000 + user_id)
+        page = self.store.roster(self.scope, offset=1, limit=2, now=1005)
+        self.assertEqual([entry.user_id for entry in page], [3, 2])
+
+
+class RedisPresenceStoreTests(SimpleTestCase):
+    def test_count_and_roster_share_an_exclusive_bound(self):
+        from unittest.mock import MagicMock
+
+        from academy_learning.presence import RedisPresenceStore
+
+        client = MagicMock()
+        client.zrevrangebyscore.return_value = []
+        store = RedisPresenceStore(client, ttl=60)
+        store.count('course:1', now=1060)
+        store.roster('course:1', now=1060)
+        self.assertEqual(client.zcount.call_args.args[1:], ('(1060', '+inf'))
+        self.assertEqual(client.zrevrangebyscore.call_args.args[1:], ('+inf', '(1060'))
+
+
+class RealtimeProtocolTests(SimpleTestCase):
+    def test_msgpack_clients_receive_batched_frames(self):
+        import msgpack
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+
+        from academy.routing import websocket_urlpatterns
+        from academy_learning.protocol import MSGPACK_SUBPROTOCOL
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns),
+                '/ws/realtime/?topics=courses',
+                subprotocols=[MSGPACK_SUBPROTOCOL],
+            )
+            connected, subprotocol = await communicator.connect()
+            self.assertTrue(connected)
+            self.assertEqual(subprotocol, MSGPACK_SUBPROTOCOL)
+
+            layer = get_channel_layer()
+            for course_id in (1, 2):
+                await layer.group_send('course_updates', {
+                    'type': 'course_update',
+                    'update_type': 'course_updated',
+                    'course': {'id': course_id},
+                })
+            frame = await communicator.receive_from(timeout=1)
+            await communicator.disconnect()
+            return frame
+
+        events = msgpack.unpackb(async_to_sync(scenario)(), raw=False)
+        self.assertEqual([event['course']['id'] for event in events], [1, 2])
+        self.assertTrue(all(event['topic'] == 'courses' for event in events))
+
+    def test_gateway_authorizes_each_subscription(self):
+        from asgiref.sync import async_to_sync
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from django.contrib.auth.models import AnonymousUser
+
+        from academy.routing import websocket_urlpatterns
+
+        async def scenario():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/realtime/')
+            communicator.scope['user'] = AnonymousUser()
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'notifications'})
+            denied = await communicator.receive_json_from()
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'courses'})
+            await communicator.send_json_to({'action': 'unsubscribe', 'topic': 'courses'})
+            await communicator.send_json_to({'action': 'subscribe', 'topic': 'bogus'})
+            malformed = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return denied, malformed
+
+        denied, malformed = async_to_sync(scenario)()
+        self.assertEqual(denied, {'type': 'error', 'topic': 'notifications', 'message': 'Not allowed'})
+        self.assertEqual(malformed['type'], 'error')
+
+    def test_legacy_routes_reject_anonymous_handshake(self):
+        from asgiref.sync import async_to_sync
+        from channels.routing import URLRouter
+        from channels.testing import WebsocketCommunicator
+        from django.contrib.auth.models import AnonymousUser
+
+        from academy.routing import websocket_urlpatterns
+
+        async def scenario():
+            communicator = WebsocketCommunicator(URLRouter(websocket_urlpatterns), '/ws/notifications/')
+            communicator.scope['user'] = AnonymousUser()
+            connected, _ = await communicator.connect()
+            return connected
+
+        self.assertFalse(async_to_sync(scenario)())
+
+
+class OutboundQueueTests(SimpleTestCase):
+    def test_latest_progress_snapshot_wins(self):
+        queue = OutboundQueue(maxsize=10)
+        queue.put({'type': 'progress_update', 'topic': 'progress:1', 'progress': {'progress_percent': 10}})
+        queue.put({'type': 'notification', 'topic': 'notifications'})
+        queue.put({'type': 'progress_update', 'topic': 'progress:1', 'progress': {'progress_percent': 20}})
+        queue.put({'type': 'progress_update', 'topic': 'progress:2', 'progress': {'progress_percent': 5}})
+
+        batch = queue.drain(10)
+        self.assertEqual([event['type'] for event in batch], ['progress_update', 'notification', 'progress_update'])
+        self.assertEqual(batch[0]['progress']['progress_percent'], 20)
+
+    def test_full_queue_drops_oldest(self):
+        queue = OutboundQueue(maxsize=2)
+        for index in range(4):
+            queue.put({'type': 'notification', 'index': index})
+        self.assertEqual(queue.dropped, 2)
+        self.assertEqual([event['index'] for event in queue.drain(10)], [2, 3])
+
+    def test_only_recent_drops_count_towards_closing(self):
+        queue = OutboundQueue(maxsize=1, drop_window=10)
+        for index in range(4):
+            queue.put({'type': 'notification', 'index': index})
+        now = time.monotonic()
+        self.assertEqual(queue.recent_drops(now), 3)
+        # A long-lived connection's old drops age out; the lifetime total stays.
+        self.assertEqual(queue.recent_drops(now + 11), 0)
+        self.assertEqual(queue.dropped, 3)
+
+
+class PaymentApprovalBatchTaskTests(TestCase):
+    def setUp(self):
+        from academy_courses.models import Course
+        from academy_users.models import User
+
+        self.course = Course.objects.create(slug='batch-course', title='Batch Course', price=500)
+        self.users = [User.objects.create_user(email=f'batch{index}@example.com', password='pw') for index in range(3)]
+        self.pairs = [[user.id, self.course.id] for user in self.users]
+
+    @override_settings(SITE_URL='https://academy.example.com')
+    def test_emails_go_out_in_one_batch(self):
+        from academy_learning.tasks import send_payment_approval_batch
+
+        with self.assertNumQueries(2):
+            send_payment_approval_batch.run(self.pairs)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), sorted(user.email for user in self.users))
+
+    def test_notification_retry_resumes_after_the_last_sent_pair(self):
+        from academy_learning.tasks import notify_payment_approval_batch
+
+        sent = []
+
+        class FlakyLayer:
+            async def group_send(self, group, message):
+                if len(sent) == 1 and not hasattr(self, 'failed'):
+                    self.failed = True
+                    raise ConnectionError('channel layer down')
+                sent.append(group)
+
+        class Retry(Exception):
+            pass
+
+        layer = FlakyLayer()
+        with patch('academy_learning.tasks.get_channel_layer', return_value=layer), \
+                patch.object(notify_payment_approval_batch, 'retry', side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                notify_payment_approval_batch.run(self.pairs)
+            self.assertEqual(retry.call_args.kwargs['kwargs'], {'sent': 1})
+            notify_payment_approval_batch.run(self.pairs, **retry.call_args.kwargs['kwargs'])
+
+        self.assertEqual(sent, [f'notifications_{user.id}' for user in self.users])
+        self.assertEqual(len(mail.outbox), 0)
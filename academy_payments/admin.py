@@ -1,16 +1,21 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 
+from academy.exports import ExportActionForm, export_csv_action, export_jsonl_action
+
+from . import previews, review_queue
 from .models import Entitlement, PaymentProofSubmission, ProofStatus
-from .services import approve_course_payment_proof, reject_payment_proof
+from .services import approve_course_payment_proof, approve_course_payment_proofs, reject_payment_proof
 
 
 @admin.action(description="✅ Approve selected proofs")
 def approve_selected(modeladmin, request, queryset):
-    approved = 0
-    for submission in queryset.select_related("course", "user").filter(status=ProofStatus.PENDING):
-        approve_course_payment_proof(submission=submission, admin_user=request.user)
-        approved += 1
+    approved = approve_course_payment_proofs(submissions=queryset, admin_user=request.user)
     modeladmin.message_user(request, f"Successfully approved {approved} payment proof(s).")
 
 
@@ -25,28 +30,112 @@ def reject_selected(modeladmin, request, queryset):
 
 @admin.register(PaymentProofSubmission)
 class PaymentProofSubmissionAdmin(admin.ModelAdmin):
-    list_display = ("id", "user_email", "product_type", "status_badge", "course", "amount_display", "submitted_at", "reviewed_at")
+    list_display = ("id", "user_email", "product_type", "status_badge", "course", "amount_display", "duplicate_badge", "submitted_at", "reviewed_at")
     list_filter = ("status", "product_type")
-    search_fields = ("user__email", "user__name", "course__slug", "course__title")
-    actions = [approve_selected, reject_selected]
-    readonly_fields = ("submitted_at", "reviewed_at", "reviewed_by")
+    search_fields = ("user__email", "user__name", "course__slug", "course__title", "=proof_sha256")
+    actions = [approve_selected, reject_selected, export_csv_action, export_jsonl_action]
+    action_form = ExportActionForm
+    readonly_fields = ("submitted_at", "reviewed_at", "reviewed_by", "proof_sha256")
     list_per_page = 20
     date_hierarchy = 'submitted_at'
     ordering = ['-submitted_at']
     list_select_related = ['user', 'course', 'reviewed_by']
+    change_list_template = "admin/academy_payments/paymentproofsubmission/change_list.html"
     
     fieldsets = (
         ('Submission Details', {
             'fields': ('user', 'product_type', 'course', 'project')
         }),
         ('Payment Information', {
-            'fields': ('amount', 'proof_file', 'proof_url', 'notes')
+            'fields': ('amount', 'proof_file', 'proof_sha256', 'proof_url', 'notes')
         }),
         ('Status', {
             'fields': ('status', 'admin_notes', 'submitted_at', 'reviewed_at', 'reviewed_by')
         }),
     )
     
+    def get_queryset(self, request):
+        return review_queue.with_duplicate_counts(super().get_queryset(request))
+
+    def get_urls(self):
+        urls = [
+            path(
+                "review-queue/",
+                self.admin_site.admin_view(self.review_queue_view),
+                name="academy_payments_paymentproofsubmission_review_queue",
+            ),
+            path(
+                "previews/<str:sha256>/<str:size>.webp",
+                self.admin_site.admin_view(self.proof_preview_view),
+                name="academy_payments_paymentproofsubmission_preview",
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def review_queue_view(self, request):
+        """Keyset-paginated triage page; POSTs claim, release, approve or reject."""
+        queue_url = reverse("admin:academy_payments_paymentproofsubmission_review_queue")
+        if request.method == "POST":
+            if not self.has_change_permission(request):
+                return redirect(queue_url)
+            action = request.POST.get("action")
+            if action == "claim":
+                claimed = review_queue.claim_next(reviewer=request.user)
+                self.message_user(request, f"Claimed {len(claimed)} payment proof(s).")
+            elif action == "release":
+                released = review_queue.release_claims(reviewer=request.user)
+                self.message_user(request, f"Released {released} payment proof(s).")
+            elif action in ("approve", "reject"):
+                submission = get_object_or_404(PaymentProofSubmission, pk=request.POST.get("submission"))
+                try:
+                    with transaction.atomic():
+                        submission = review_queue.lock_for_decision(submission, request.user)
+                        if action == "approve":
+                            approve_course_payment_proof(submission=submission, admin_user=request.user)
+                        else:
+                            reject_payment_proof(submission=submission, admin_user=request.user)
+                except review_queue.ReviewConflict as exc:
+                    self.message_user(request, f"Payment proof {submission.id}: {exc}", level=messages.WARNING)
+                except ValueError as exc:
+                    self.message_user(request, f"Payment proof {submission.id}: {exc}", level=messages.ERROR)
+                else:
+                    verb = "Approved" if action == "approve" else "Rejected"
+                    self.message_user(request, f"{verb} payment proof {submission.id}.")
+            return redirect(queue_url)
+
+        status = request.GET.get("status", ProofStatus.PENDING)
+        if status not in ProofStatus.values:
+            status = ProofStatus.PENDING
+        try:
+            page = review_queue.review_page(status=status, cursor=request.GET.get("cursor"))
+        except ValueError:
+            return redirect(queue_url)
+        counts = review_queue.status_counts()
+        with_previews = {s.proof_sha256 for s in page.items if previews.has_preview(s.proof_sha256)}
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Payment review queue",
+            "status": status,
+            "tabs": [(value, label, counts.get(value, 0)) for value, label in ProofStatus.choices],
+            "page": page,
+            "mine": {s.id for s in page.items if s.claimed_by_id == request.user.pk},
+            "with_previews": with_previews,
+            "layout": "grid" if request.GET.get("layout") == "grid" else "table",
+        }
+        return TemplateResponse(request, "admin/academy_payments/review_queue.html", context)
+    
+    def proof_preview_view(self, request, sha256, size):
+        """Serve a proof rendition; names are content hashes, so they never change."""
+        if not self.has_view_permission(request):
+            raise Http404
+        path = previews.preview_file(sha256, size)
+        if path is None:
+            raise Http404
+        response = FileResponse(open(path, "rb"), content_type="image/webp")
+        response["Cache-Control"] = "private, max-age=31536000, immutable"
+        return response
+    
     def user_email(self, obj):
         return obj.user.email
     user_email.short_description = 'User'
@@ -66,6 +155,18 @@ class PaymentProofSubmissionAdmin(admin.ModelAdmin):
     status_badge.short_description = 'Status'
     status_badge.admin_order_field = 'status'
     
+    def duplicate_badge(self, obj):
+        count = getattr(obj, "duplicate_count", 0)
+        if not count:
+            return ""
+        url = reverse("admin:academy_payments_paymentproofsubmission_changelist")
+        return format_html(
+            '<a href="{}?q={}" style="background-color: #ef4444; color: white; padding: 3px 10px; border-radius: 12px; font-size: 11px;">{} duplicate(s)</a>',
+            url, obj.proof_sha256, count
+        )
+    duplicate_badge.short_description = 'Same file'
+    duplicate_badge.admin_order_field = 'duplicate_count'
+    
     def amount_display(self, obj):
         return format_html('<strong>₹{}</strong>', int(obj.amount) if obj.amount else 0)
     amount_display.short_description = 'Amount'
@@ -81,6 +182,8 @@ class EntitlementAdmin(admin.ModelAdmin):
     date_hierarchy = 'granted_at'
     ordering = ['-granted_at']
     list_select_related = ['user', 'course', 'project']
+    actions = [export_csv_action, export_jsonl_action]
+    action_form = ExportActionForm
     
     def user_email(self, obj):
         return obj.user.email
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AcademyPaymentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "academy_payments"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,91 @@
+"""
+Per-user entitlement sets.
+
+A user's entitlements are loaded with one query, kept in the cache as two
+frozensets of ids and memoised on the user object for the rest of the request,
+so access checks are set lookups. ``academy_payments.signals`` drops the cached
+set whenever an entitlement is granted or revoked.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+
+from .models import Entitlement, ProductType
+
+
+CACHE_TIMEOUT = 60 * 60
+
+_USER_ATTR = "_entitlement_set"
+
+
+@dataclass(frozen=True)
+class EntitlementSet:
+    course_ids: frozenset = field(default_factory=frozenset)
+    project_ids: frozenset = field(default_factory=frozenset)
+
+    def has_course(self, course) -> bool:
+        return getattr(course, "pk", course) in self.course_ids
+
+    def has_project(self, project) -> bool:
+        return getattr(project, "pk", project) in self.project_ids
+
+
+EMPTY = EntitlementSet()
+
+
+def _cache_key(user_id: int) -> str:
+    return f"entitlements_{user_id}"
+
+
+def _load(user_id: int) -> EntitlementSet:
+    course_ids, project_ids = set(), set()
+    rows = Entitlement.objects.filter(user_id=user_id).values_list("product_type", "course_id", "project_id")
+    for product_type, course_id, project_id in rows:
+        if product_type == ProductType.COURSE and course_id is not None:
+            course_ids.add(course_id)
+        elif product_type == ProductType.PROJECT and project_id is not None:
+            project_ids.add(project_id)
+    return EntitlementSet(frozenset(course_ids), frozenset(project_ids))
+
+
+def cached_entitlements(user):
+    """The per-request memo or the shared cache entry, without querying; None on a miss."""
+    memo = getattr(user, _USER_ATTR, None)
+    if memo is not None:
+        return memo
+    cached = cache.get(_cache_key(user.pk))
+    if cached is None:
+        return None
+    entitlements = EntitlementSet(frozenset(cached[0]), frozenset(cached[1]))
+    setattr(user, _USER_ATTR, entitlements)
+    return entitlements
+
+
+def remember_entitlements(user, entitlements: EntitlementSet) -> EntitlementSet:
+    """Cache a set loaded elsewhere (e.g. by the access context's UNION query)."""
+    cache.set(_cache_key(user.pk), (tuple(entitlements.course_ids), tuple(entitlements.project_ids)), timeout=CACHE_TIMEOUT)
+    setattr(user, _USER_ATTR, entitlements)
+    return entitlements
+
+
+def get_entitlements(user) -> EntitlementSet:
+    if user is None or not user.is_authenticated:
+        return EMPTY
+    entitlements = cached_entitlements(user)
+    if entitlements is None:
+        entitlements = remember_entitlements(user, _load(user.pk))
+    return entitlements
+
+
+def has_course_entitlement(user, course) -> bool:
+    return get_entitlements(user).has_course(course)
+
+
+def has_project_entitlement(user, project) -> bool:
+    return get_entitlements(user).has_project(project)
+
+
+def invalidate_entitlements(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
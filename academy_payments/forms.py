@@ -2,18 +2,33 @@ from __future__ import annotations
 
 from django import forms
 
+from .uploads import max_upload_size, rejection_message
+
 
 class CoursePaymentProofForm(forms.Form):
     proof_file = forms.FileField(required=False)
     proof_url = forms.URLField(required=False)
     notes = forms.CharField(required=False, widget=forms.Textarea)
 
+    def __init__(self, *args, upload_error: str | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_error = upload_error
+
+    def clean_proof_file(self):
+        proof_file = self.cleaned_data.get("proof_file")
+        # The upload handler drops oversized files before the form sees them.
+        if self.upload_error:
+            raise forms.ValidationError(self.upload_error)
+        if proof_file and proof_file.size > max_upload_size():
+            raise forms.ValidationError(rejection_message())
+        return proof_file
+
     def clean(self):
         cleaned = super().clean()
         proof_file = cleaned.get("proof_file")
         proof_url = (cleaned.get("proof_url") or "").strip() or None
 
-        if not proof_file and not proof_url:
+        if not proof_file and not proof_url and not self.upload_error:
             raise forms.ValidationError("Upload a file or provide a URL")
 
         cleaned["proof_url"] = proof_url
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_payments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='entitlement',
+            index=models.Index(condition=models.Q(('course__isnull', False)), fields=['user', 'course'], name='entitlement_user_course'),
+        ),
+        migrations.AddIndex(
+            model_name='entitlement',
+            index=models.Index(condition=models.Q(('project__isnull', False)), fields=['user', 'project'], name='entitlement_user_project'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:11
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('academy_payments', '0002_entitlement_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentproofsubmission',
+            name='claimed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='paymentproofsubmission',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_payment_proofs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='paymentproofsubmission',
+            index=models.Index(fields=['status', 'submitted_at', 'id'], name='proof_review_queue'),
+        ),
+    ]
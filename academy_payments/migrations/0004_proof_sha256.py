@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_payments', '0003_review_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='paymentproofsubmission',
+            name='proof_sha256',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-19 14:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academy_payments', '0004_proof_sha256'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='paymentproofsubmission',
+            index=models.Index(fields=['reviewed_at', 'id'], name='proof_reviewed'),
+        ),
+    ]
@@ -27,6 +27,7 @@ class PaymentProofSubmission(models.Model):
     amount = models.FloatField(default=0)
     proof_file = models.FileField(upload_to="payment_proofs/", null=True, blank=True)
     proof_url = models.URLField(max_length=2048, null=True, blank=True)
+    proof_sha256 = models.CharField(max_length=64, blank=True, db_index=True)
     notes = models.TextField(blank=True)
 
     status = models.CharField(max_length=16, choices=ProofStatus.choices, default=ProofStatus.PENDING)
@@ -36,10 +37,16 @@ class PaymentProofSubmission(models.Model):
     reviewed_at = models.DateTimeField(null=True, blank=True)
     admin_notes = models.TextField(blank=True)
 
+    # Review-queue lease; see academy_payments.review_queue.
+    claimed_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name="claimed_payment_proofs")
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         indexes = [
             models.Index(fields=["product_type", "status"]),
             models.Index(fields=["user", "submitted_at"]),
+            models.Index(fields=["status", "submitted_at", "id"], name="proof_review_queue"),
+            models.Index(fields=["reviewed_at", "id"], name="proof_reviewed"),
         ]
 
     def __str__(self) -> str:
@@ -64,6 +71,12 @@ class Entitlement(models.Model):
 
     class Meta:
         unique_together = [("user", "product_type", "course", "project")]
+        # The unique index above is rarely usable for lookups because one of
+        # course/project is always NULL; these cover the per-product queries.
+        indexes = [
+            models.Index(fields=["user", "course"], condition=models.Q(course__isnull=False), name="entitlement_user_course"),
+            models.Index(fields=["user", "project"], condition=models.Q(project__isnull=False), name="entitlement_user_project"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.user_id}:{self.product_type}"
@@ -0,0 +1,104 @@
+"""
+Downscaled WebP renditions of payment proof images.
+
+Renditions are generated by a Celery task after a proof is submitted and kept
+on local disk under PROOF_PREVIEW_ROOT, named by the proof's content hash and
+the rendition size (``<sha256>_thumb.webp``). The name never changes for a
+given file, so the staff-only view that serves them can mark them immutable.
+
+Pillow is optional: without it no renditions are produced and the review queue
+falls back to links to the original files.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import tempfile
+from typing import Optional
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels for each rendition.
+SIZES = {
+    "thumb": 320,
+    "preview": 1280,
+}
+WEBP_QUALITY = 80
+
+# Phone screenshots are rarely beyond this; larger "images" are likely hostile.
+MAX_SOURCE_PIXELS = 60_000_000
+
+
+def preview_root() -> str:
+    return getattr(settings, "PROOF_PREVIEW_ROOT", os.path.join(settings.MEDIA_ROOT, "proof_previews"))
+
+
+def preview_path(sha256: str, size: str) -> str:
+    return os.path.join(preview_root(), sha256[:2], f"{sha256}_{size}.webp")
+
+
+def has_preview(sha256: str, size: str = "thumb") -> bool:
+    return bool(sha256) and os.path.exists(preview_path(sha256, size))
+
+
+def generate_previews(sha256: str, source_name: str) -> list[str]:
+    """Write every missing rendition of ``source_name``; return the sizes written."""
+    if Image is None or not sha256 or not source_name:
+        return []
+    missing = [size for size in SIZES if not has_preview(sha256, size)]
+    if not missing:
+        return []
+
+    # Storage and disk errors propagate so the task retries; only a source that
+    # cannot be decoded means "no preview".
+    with default_storage.open(source_name, "rb") as source:
+        data = source.read()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_SOURCE_PIXELS:
+                logger.info("No preview for proof %s: %dx%d is too large", sha256, image.width, image.height)
+                return []
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    except (Image.DecompressionBombError, OSError, SyntaxError, ValueError) as exc:
+        # PDFs and other non-image proofs simply get no preview.
+        logger.info("No preview for proof %s: %s", sha256, exc)
+        return []
+    for size in missing:
+        _write_rendition(image, sha256, size)
+    return missing
+
+
+def _write_rendition(image, sha256: str, size: str) -> None:
+    rendition = image.copy()
+    rendition.thumbnail((SIZES[size], SIZES[size]))
+    target = preview_path(sha256, size)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    # Write then rename so readers never see a partial file.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            rendition.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp, target)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def preview_file(sha256: str, size: str) -> Optional[str]:
+    """Path of an existing rendition, or None."""
+    if size not in SIZES or len(sha256) != 64 or not all(c in "0123456789abcdef" for c in sha256):
+        return None
+    path = preview_path(sha256, size)
+    return path if os.path.exists(path) else None
@@ -0,0 +1,203 @@
+"""
+Payment proof review queue.
+
+Pages are fetched with keyset pagination on (status, submitted_at, id), which
+the ``proof_review_queue`` index serves directly, so a page costs the same at
+row 10 as at row 10,000 and no COUNT(*) is run. Per-status totals are kept in
+the cache and adjusted by the payment services on every state transition.
+
+Reviewers *claim* batches of pending proofs. A claim is a lease recorded on the
+row (``claimed_by`` / ``claimed_at``) and expires after CLAIM_TTL, so two
+reviewers working the queue at once are handed disjoint rows and an abandoned
+claim returns to the pool.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import PaymentProofSubmission, ProofStatus
+
+
+CLAIM_TTL = timedelta(minutes=15)
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+COUNTS_TIMEOUT = 60 * 60
+
+
+@dataclass(frozen=True)
+class ReviewPage:
+    items: list
+    next_cursor: Optional[str]
+
+
+def encode_cursor(submission: PaymentProofSubmission) -> str:
+    raw = json.dumps([submission.submitted_at.isoformat(), submission.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Raise ValueError for cursors that weren't produced by encode_cursor()."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_at, submission_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        parsed = parse_datetime(submitted_at)
+        if parsed is None:
+            raise ValueError(cursor)
+        return parsed, int(submission_id)
+    except (TypeError, ValueError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from exc
+
+
+def _claim_expiry(now=None):
+    return (now or timezone.now()) - CLAIM_TTL
+
+
+def with_duplicate_counts(queryset):
+    """Annotate ``duplicate_count``: other submissions carrying the same proof file."""
+    same_file = (
+        PaymentProofSubmission.objects.filter(proof_sha256=OuterRef("proof_sha256"))
+        .exclude(proof_sha256="")
+        .exclude(pk=OuterRef("pk"))
+        .order_by()
+        .values("proof_sha256")
+        .annotate(n=Count("id"))
+        .values("n")
+    )
+    return queryset.annotate(duplicate_count=Coalesce(Subquery(same_file, output_field=IntegerField()), 0))
+
+
+def review_page(*, status: str = ProofStatus.PENDING, cursor: Optional[str] = None, limit: int = PAGE_SIZE, unclaimed_only: bool = False) -> ReviewPage:
+    """Oldest-first page of submissions in ``status``, continuing after ``cursor``."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    qs = with_duplicate_counts(
+        PaymentProofSubmission.objects.filter(status=status).select_related("user", "course", "claimed_by")
+    )
+    if cursor:
+        submitted_at, submission_id = decode_cursor(cursor)
+        qs = qs.filter(Q(submitted_at__gt=submitted_at) | Q(submitted_at=submitted_at, id__gt=submission_id))
+    if unclaimed_only:
+        qs = qs.filter(Q(claimed_by__isnull=True) | Q(claimed_at__lt=_claim_expiry()))
+
+    rows = list(qs.order_by("submitted_at", "id")[: limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return ReviewPage(items=rows[:limit], next_cursor=next_cursor)
+
+
+def claim_next(*, reviewer, limit: int = 10) -> list[PaymentProofSubmission]:
+    """Lease the oldest unclaimed pending proofs to ``reviewer``.
+
+    Rows already leased to the reviewer are returned again. On databases with
+    SKIP LOCKED, concurrent callers skip each other's candidate rows instead of
+    queueing behind them; elsewhere the conditional UPDATE keeps claims disjoint.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    now = timezone.now()
+    with transaction.atomic():
+        candidates = (
+            PaymentProofSubmission.objects.filter(status=ProofStatus.PENDING)
+            .filter(Q(claimed_by__isnull=True) | Q(claimed_by=reviewer) | Q(claimed_at__lt=_claim_expiry(now)))
+            .order_by("submitted_at", "id")
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list("id", flat=True)[:limit])
+
+        # Re-check the lease in the UPDATE itself so a racing claim loses cleanly.
+        PaymentProofSubmission.objects.filter(id__in=ids, status=ProofStatus.PENDING).filter(
+            Q(claimed_by__isnull=True) | Q(claimed_by=reviewer) | Q(claimed_at__lt=_claim_expiry(now))
+        ).update(claimed_by=reviewer, claimed_at=now)
+
+    return list(
+        PaymentProofSubmission.objects.filter(id__in=ids, claimed_by=reviewer)
+        .select_related("user", "course")
+        .order_by("submitted_at", "id")
+    )
+
+
+def release_claims(*, reviewer, submission_ids=None) -> int:
+    qs = PaymentProofSubmission.objects.filter(claimed_by=reviewer)
+    if submission_ids is not None:
+        qs = qs.filter(id__in=submission_ids)
+    return qs.update(claimed_by=None, claimed_at=None)
+
+
+def is_claimed_by_other(submission: PaymentProofSubmission, reviewer) -> bool:
+    return (
+        submission.claimed_by_id is not None
+        and submission.claimed_by_id != reviewer.pk
+        and submission.claimed_at is not None
+        and submission.claimed_at >= _claim_expiry()
+    )
+
+
+class ReviewConflict(Exception):
+    """The proof was claimed by someone else or decided while the reviewer looked at it."""
+
+
+def lock_for_decision(submission: PaymentProofSubmission, reviewer) -> PaymentProofSubmission:
+    """Re-read ``submission`` with its row locked and check ``reviewer`` may still decide it.
+
+    Call inside ``transaction.atomic()``: two reviewers posting a decision at
+    once are serialised here, and the second one sees the first one's status.
+    """
+    locked = (
+        PaymentProofSubmission.objects.select_for_update(of=("self",))
+        .select_related("user", "course")
+        .get(pk=submission.pk)
+    )
+    if is_claimed_by_other(locked, reviewer):
+        raise ReviewConflict("Claimed by another reviewer.")
+    if locked.status != ProofStatus.PENDING:
+        raise ReviewConflict("Already reviewed.")
+    return locked
+
+
+# --- Per-status counters -------------------------------------------------
+
+def _count_key(status: str) -> str:
+    return f"payment_review_count_{status}"
+
+
+def status_counts() -> dict[str, int]:
+    keys = {status: _count_key(status) for status in ProofStatus.values}
+    cached = cache.get_many(list(keys.values()))
+    if len(cached) == len(keys):
+        return {status: max(0, cached[key]) for status, key in keys.items()}
+
+    counts = dict.fromkeys(ProofStatus.values, 0)
+    counts.update(
+        PaymentProofSubmission.objects.values_list("status").annotate(n=Count("id")).values_list("status", "n")
+    )
+    cache.set_many({keys[status]: n for status, n in counts.items()}, timeout=COUNTS_TIMEOUT)
+    return counts
+
+
+def _adjust(status: str, delta: int) -> None:
+    try:
+        cache.incr(_count_key(status), delta)
+    except ValueError:
+        # Not cached; the next status_counts() recomputes every status.
+        pass
+
+
+def record_transition(from_status: Optional[str], to_status: str, count: int = 1) -> None:
+    """Adjust the cached counters once the surrounding transaction commits."""
+    def apply():
+        if from_status:
+            _adjust(from_status, -count)
+        _adjust(to_status, count)
+
+    if count:
+        transaction.on_commit(apply)
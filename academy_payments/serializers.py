@@ -0,0 +1,17 @@
+from rest_framework import serializers
+
+from .models import PaymentProofSubmission
+
+
+class ReviewQueueItemSerializer(serializers.ModelSerializer):
+    user_email = serializers.EmailField(source="user.email", read_only=True)
+    course_title = serializers.CharField(source="course.title", read_only=True, default=None)
+    duplicate_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta:
+        model = PaymentProofSubmission
+        fields = (
+            "id", "user", "user_email", "product_type", "course", "course_title", "amount",
+            "proof_file", "proof_sha256", "duplicate_count", "proof_url", "notes", "status", "submitted_at", "claimed_by", "claimed_at",
+        )
+        read_only_fields = fields
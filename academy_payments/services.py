@@ -1,28 +1,53 @@
 from __future__ import annotations
 
+import logging
+
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 
-from academy_audit.models import AuditLog
+from academy_audit import sink as audit
 from academy_learning.models import CourseProgress, Enrollment, EnrollmentStatus
 from academy_learning.services import enroll_user_in_course
 
 from academy_courses.models import Course
 
+from .entitlements import invalidate_entitlements
 from .models import Entitlement, EntitlementSource, PaymentProofSubmission, ProductType, ProofStatus
+from .review_queue import record_transition
+from .uploads import store_proof_file
+
+
+logger = logging.getLogger(__name__)
 
 
 def submit_course_payment_proof(*, user, course: Course, proof_file, proof_url: str | None, notes: str | None) -> PaymentProofSubmission:
-    return PaymentProofSubmission.objects.create(
+    proof_name, proof_sha256 = store_proof_file(proof_file) if proof_file else (None, "")
+    submission = PaymentProofSubmission.objects.create(
         user=user,
         product_type=ProductType.COURSE,
         course=course,
         amount=course.price or 0,
-        proof_file=proof_file,
+        proof_file=proof_name,
+        proof_sha256=proof_sha256,
         proof_url=proof_url,
         notes=notes or "",
         status=ProofStatus.PENDING,
     )
+    record_transition(None, ProofStatus.PENDING)
+    if proof_sha256:
+        transaction.on_commit(lambda: _safe_queue_proof_previews(submission.id))
+    return submission
+
+
+def _safe_queue_proof_previews(submission_id: int) -> None:
+    """Queue thumbnail generation without failing the submission if Celery/Redis is down."""
+    try:
+        from .tasks import generate_proof_previews
+        generate_proof_previews.apply_async(args=[submission_id], ignore_result=True)
+    except Exception as exc:  # pragma: no cover - defensive guard for runtime outages
+        logger.warning("Proof previews could not be queued", exc_info=exc)
 
 
 @transaction.atomic
@@ -52,15 +77,19 @@ def approve_course_payment_proof(*, submission: PaymentProofSubmission, admin_us
     )
     Enrollment.objects.filter(user=submission.user, course=submission.course).update(status=EnrollmentStatus.ACTIVE)
 
+    record_transition(submission.status, ProofStatus.APPROVED)
     submission.status = ProofStatus.APPROVED
     submission.reviewed_by = admin_user
     submission.reviewed_at = timezone.now()
     submission.admin_notes = admin_notes or submission.admin_notes
-    submission.save(update_fields=["status", "reviewed_by", "reviewed_at", "admin_notes"])
+    submission.claimed_by = None
+    submission.claimed_at = None
+    submission.save(update_fields=["status", "reviewed_by", "reviewed_at", "admin_notes", "claimed_by", "claimed_at"])
 
-    AuditLog.objects.create(
+    audit.record(
+        "payment_proof.approved",
+        durable=True,
         actor=admin_user,
-        action="payment_proof.approved",
         subject_type="course",
         subject_id=str(submission.course_id),
         message=f"Approved payment proof submission {submission.id}",
@@ -72,20 +101,166 @@ def approve_course_payment_proof(*, submission: PaymentProofSubmission, admin_us
     )
 
 
+def _safe_send_approval_notifications(pairs: list[tuple[int, int]]) -> None:
+    """Queue the batched email and notification tasks without failing the approval if Celery/Redis is down.
+
+    They are separate tasks so that retrying one never repeats the other.
+    """
+    try:
+        from academy_learning.tasks import notify_payment_approval_batch, send_payment_approval_batch
+        send_payment_approval_batch.apply_async(args=[pairs], ignore_result=True)
+        notify_payment_approval_batch.apply_async(args=[pairs], ignore_result=True)
+    except Exception as exc:  # pragma: no cover - defensive guard for runtime outages
+        logger.warning("Payment approval notifications could not be queued", exc_info=exc)
+
+
+def _invalidate_learner_caches(pairs: list[tuple[int, int]]) -> None:
+    from academy_web.access import invalidate_access_context
+
+    user_ids = {user_id for user_id, _ in pairs}
+    course_ids = {course_id for _, course_id in pairs}
+    for user_id in user_ids:
+        invalidate_entitlements(user_id)
+        invalidate_access_context(user_id)
+    cache.delete_many(
+        [f"user_enrollments_{user_id}" for user_id in user_ids]
+        + [f"course_enrollments_{course_id}" for course_id in course_ids]
+        + [f"course_progress_{user_id}_{course_id}" for user_id, course_id in pairs]
+    )
+
+
+def approve_course_payment_proofs(*, submissions, admin_user, admin_notes: str | None = None) -> int:
+    """Approve every pending course proof in ``submissions`` with a fixed number of queries.
+
+    Equivalent to calling ``approve_course_payment_proof`` for each row, but
+    lesson totals are computed once per course, entitlements, enrollments,
+    progress and audit rows are bulk-inserted, and learners are notified by a
+    single batched task. Bulk writes skip model signals, so the caches they
+    would have cleared are invalidated here. Returns the number approved.
+    """
+    from academy_courses.models import Lesson
+
+    with transaction.atomic():
+        rows = list(
+            submissions.select_for_update()
+            .filter(status=ProofStatus.PENDING, product_type=ProductType.COURSE, course__isnull=False)
+            .values_list("id", "user_id", "course_id")
+        )
+        if not rows:
+            return 0
+
+        submission_ids = [row[0] for row in rows]
+        pairs = sorted({(user_id, course_id) for _, user_id, course_id in rows})
+        user_ids = {user_id for user_id, _ in pairs}
+        course_ids = {course_id for _, course_id in pairs}
+
+        # The unique index on entitlements never conflicts (project is NULL),
+        # so existing grants are filtered out explicitly.
+        entitled = set(
+            Entitlement.objects.filter(
+                product_type=ProductType.COURSE, user_id__in=user_ids, course_id__in=course_ids,
+            ).values_list("user_id", "course_id")
+        )
+        Entitlement.objects.bulk_create(
+            [
+                Entitlement(
+                    user_id=user_id,
+                    product_type=ProductType.COURSE,
+                    course_id=course_id,
+                    source=EntitlementSource.MANUAL,
+                    granted_by=admin_user,
+                )
+                for user_id, course_id in pairs
+                if (user_id, course_id) not in entitled
+            ],
+            ignore_conflicts=True,
+        )
+
+        Enrollment.objects.bulk_create(
+            [Enrollment(user_id=user_id, course_id=course_id, status=EnrollmentStatus.ACTIVE) for user_id, course_id in pairs],
+            ignore_conflicts=True,
+        )
+        pair_set = set(pairs)
+        inactive = [
+            enrollment_id
+            for enrollment_id, user_id, course_id in Enrollment.objects.filter(user_id__in=user_ids, course_id__in=course_ids)
+            .exclude(status=EnrollmentStatus.ACTIVE)
+            .values_list("id", "user_id", "course_id")
+            if (user_id, course_id) in pair_set
+        ]
+        if inactive:
+            Enrollment.objects.filter(id__in=inactive).update(status=EnrollmentStatus.ACTIVE)
+
+        totals = dict(
+            Lesson.objects.filter(module__course_id__in=course_ids)
+            .values("module__course_id")
+            .annotate(total=Count("id"))
+            .values_list("module__course_id", "total")
+        )
+        CourseProgress.objects.bulk_create(
+            [
+                CourseProgress(user_id=user_id, course_id=course_id, total_lessons=totals.get(course_id, 0), progress_percent=0)
+                for user_id, course_id in pairs
+            ],
+            ignore_conflicts=True,
+        )
+
+        update = {
+            "status": ProofStatus.APPROVED,
+            "reviewed_by": admin_user,
+            "reviewed_at": timezone.now(),
+            "claimed_by": None,
+            "claimed_at": None,
+        }
+        if admin_notes:
+            update["admin_notes"] = admin_notes
+        PaymentProofSubmission.objects.filter(id__in=submission_ids).update(**update)
+        record_transition(ProofStatus.PENDING, ProofStatus.APPROVED, len(rows))
+
+        audit.record_many(
+            [
+                audit.event(
+                    "payment_proof.approved",
+                    actor=admin_user,
+                    subject_type="course",
+                    subject_id=str(course_id),
+                    message=f"Approved payment proof submission {submission_id}",
+                    metadata={
+                        "submission_id": submission_id,
+                        "user_id": user_id,
+                        "course_id": course_id,
+                        "bulk": True,
+                    },
+                )
+                for submission_id, user_id, course_id in rows
+            ],
+            durable=True,
+        )
+
+        transaction.on_commit(lambda: _invalidate_learner_caches(pairs))
+        transaction.on_commit(lambda: _safe_send_approval_notifications([list(pair) for pair in pairs]))
+
+    return len(rows)
+
+
 @transaction.atomic
 def reject_payment_proof(*, submission: PaymentProofSubmission, admin_user, admin_notes: str | None = None) -> None:
     if submission.status == ProofStatus.REJECTED:
         return
 
+    record_transition(submission.status, ProofStatus.REJECTED)
     submission.status = ProofStatus.REJECTED
     submission.reviewed_by = admin_user
     submission.reviewed_at = timezone.now()
     submission.admin_notes = admin_notes or submission.admin_notes
-    submission.save(update_fields=["status", "reviewed_by", "reviewed_at", "admin_notes"])
+    submission.claimed_by = None
+    submission.claimed_at = None
+    submission.save(update_fields=["status", "reviewed_by", "reviewed_at", "admin_notes", "claimed_by", "claimed_at"])
 
-    AuditLog.objects.create(
+    audit.record(
+        "payment_proof.rejected",
+        durable=True,
         actor=admin_user,
-        action="payment_proof.rejected",
         subject_type=("course" if submission.course_id else "project" if submission.project_id else ""),
         subject_id=str(submission.course_id or submission.project_id or ""),
         message=f"Rejected payment proof submission {submission.id}",
@@ -0,0 +1,14 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .entitlements import invalidate_entitlements
+from .models import Entitlement
+
+
+@receiver(post_save, sender=Entitlement)
+@receiver(post_delete, sender=Entitlement)
+def drop_cached_entitlements(sender, instance, **kwargs):
+    invalidate_entitlements(instance.user_id)
+    # A concurrent request may re-cache the old set before we commit.
+    transaction.on_commit(lambda: invalidate_entitlements(instance.user_id))
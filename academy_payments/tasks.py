@@ -0,0 +1,21 @@
+"""
+Celery tasks for payment proofs.
+"""
+from celery import shared_task
+
+
+@shared_task(bind=True, max_retries=3)
+def generate_proof_previews(self, submission_id):
+    """Render WebP thumbnails/previews for a submitted proof image."""
+    from .models import PaymentProofSubmission
+    from .previews import generate_previews
+
+    try:
+        submission = PaymentProofSubmission.objects.only("proof_file", "proof_sha256").get(id=submission_id)
+    except PaymentProofSubmission.DoesNotExist:
+        return f'Submission {submission_id} not found'
+    try:
+        written = generate_previews(submission.proof_sha256, submission.proof_file.name)
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=60)
+    return f'Generated {len(written)} preview(s) for submission {submission_id}'
@@ -0,0 +1,97 @@
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from . import previews
+from .models import PaymentProofSubmission, ProductType
+from .tasks import generate_proof_previews
+
+
+SHA = "ab" * 32
+
+
+class ProofPreviewTests(TestCase):
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media, PROOF_PREVIEW_ROOT=os.path.join(media, "previews"))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def _store(self, name: str, content: bytes) -> str:
+        return default_storage.save(name, ContentFile(content))
+
+    @skipUnless(previews.Image is not None, "Pillow is not installed")
+    def test_image_proofs_get_every_rendition(self):
+        import io
+
+        buffer = io.BytesIO()
+        previews.Image.new("RGB", (2000, 1000), "white").save(buffer, "PNG")
+        name = self._store("proofs/screenshot.png", buffer.getvalue())
+
+        self.assertEqual(previews.generate_previews(SHA, name), ["thumb", "preview"])
+        with previews.Image.open(previews.preview_path(SHA, "thumb")) as thumb:
+            self.assertEqual(thumb.size, (320, 160))
+        # Renditions are named by content hash, so a second run has nothing to do.
+        self.assertEqual(previews.generate_previews(SHA, name), [])
+
+    @skipUnless(previews.Image is not None, "Pillow is not installed")
+    def test_oversized_sources_are_skipped(self):
+        import io
+
+        buffer = io.BytesIO()
+        previews.Image.new("1", (400, 300)).save(buffer, "PNG")
+        name = self._store("proofs/huge.png", buffer.getvalue())
+        with patch.object(previews, "MAX_SOURCE_PIXELS", 400 * 300 - 1):
+            self.assertEqual(previews.generate_previews(SHA, name), [])
+        self.assertFalse(previews.has_preview(SHA))
+
+    def test_non_image_proofs_get_no_preview(self):
+        name = self._store("proofs/receipt.pdf", b"%PDF-1.4 not an image")
+        self.assertEqual(previews.generate_previews(SHA, name), [])
+        self.assertFalse(previews.has_preview(SHA))
+
+    def test_storage_errors_are_retried(self):
+        user = get_user_model().objects.create_user(email="payer@example.com", password="pw")
+        submission = PaymentProofSubmission.objects.create(
+            user=user, product_type=ProductType.COURSE, proof_file="proofs/missing.png", proof_sha256=SHA,
+        )
+
+        class Retry(Exception):
+            pass
+
+        with patch("academy_payments.previews.generate_previews", side_effect=OSError("storage unavailable")), \
+                patch.object(generate_proof_previews, "retry", side_effect=Retry) as retry:
+            with self.assertRaises(Retry):
+                generate_proof_previews.run(submission.id)
+        self.assertIsInstance(retry.call_args.kwargs["exc"], OSError)
+
+    def test_admin_serves_existing_renditions_only_to_staff(self):
+        path = previews.preview_path(SHA, "thumb")
+        os.makedirs(os.path.dirname(path))
+        with open(path, "wb") as out:
+            out.write(b"RIFF....WEBP")
+        url = reverse("admin:academy_payments_paymentproofsubmission_preview", args=[SHA, "thumb"])
+
+        User = get_user_model()
+        self.client.force_login(User.objects.create_user(email="learner@example.com", password="pw"))
+        self.assertEqual(self.client.get(url, secure=True).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser(email="admin@example.com", password="pw"))
+        resp = self.client.get(url, secure=True)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp["Content-Type"], "image/webp")
+        self.assertIn("immutable", resp["Cache-Control"])
+        self.assertEqual(b"".join(resp.streaming_content), b"RIFF....WEBP")
+        resp.close()
+
+        missing = reverse("admin:academy_payments_paymentproofsubmission_preview", args=[SHA, "preview"])
+        self.assertEqual(self.client.get(missing, secure=True).status_code, 404)
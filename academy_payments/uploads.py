@@ -0,0 +1,110 @@
+"""
+Payment proof uploads.
+
+``HashingFileUploadHandler`` replaces Django's default handlers on the proof
+upload view. It streams each chunk straight to a temporary file while feeding
+a SHA-256, so nothing is buffered in memory, and it gives up on a file as soon
+as it grows past PAYMENT_PROOF_MAX_UPLOAD_SIZE instead of storing it first.
+
+Stored proofs are content-addressed (``payment_proofs/sha256/ab/abcd….png``):
+a learner re-uploading the same screenshot reuses the existing object, and the
+digest kept on the submission lets reviewers spot duplicate proofs at a glance.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+
+
+# Room for the other form fields when judging the request size up front.
+FORM_OVERHEAD = 64 * 1024
+
+_EXTENSION = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+
+def max_upload_size() -> int:
+    return getattr(settings, "PAYMENT_PROOF_MAX_UPLOAD_SIZE", 10 * 1024 * 1024)
+
+
+def rejection_message() -> str:
+    return f"File is too large (max {max_upload_size() // (1024 * 1024)} MB)."
+
+
+class HashingFileUploadHandler(FileUploadHandler):
+    """Write uploads to disk in chunks and attach their ``sha256`` hex digest."""
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.max_size = max_upload_size()
+        self.request_too_large = False
+        self.hasher = None
+        self.size = 0
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_too_large = bool(content_length) and content_length > self.max_size + FORM_OVERHEAD
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        if self.request_too_large:
+            self._reject()
+        self.file = TemporaryUploadedFile(self.file_name, self.content_type, 0, self.charset, self.content_type_extra)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.file.close()
+            self._reject()
+        self.hasher.update(raw_data)
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+    def upload_interrupted(self):
+        if getattr(self, "file", None) is not None:
+            self.file.close()
+
+    def _reject(self):
+        if self.request is not None:
+            self.request.upload_rejected = rejection_message()
+        raise SkipFile()
+
+
+def file_sha256(uploaded) -> str:
+    """Digest computed by the handler, or by reading the file in chunks."""
+    digest = getattr(uploaded, "sha256", None)
+    if digest:
+        return digest
+    hasher = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        hasher.update(chunk)
+    uploaded.seek(0)
+    return hasher.hexdigest()
+
+
+def content_address(sha256: str, original_name: str) -> str:
+    extension = os.path.splitext(original_name or "")[1].lower()
+    if not _EXTENSION.match(extension):
+        extension = ""
+    return f"payment_proofs/sha256/{sha256[:2]}/{sha256}{extension}"
+
+
+def store_proof_file(uploaded) -> tuple[str, str]:
+    """Store ``uploaded`` under its content address; return (storage name, sha256)."""
+    sha256 = file_sha256(uploaded)
+    name = content_address(sha256, uploaded.name)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, uploaded)
+    return name, sha256
@@ -0,0 +1,81 @@
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from academy_rbac.permissions import HasRolePermission
+
+from . import review_queue
+from .models import PaymentProofSubmission, ProofStatus
+from .serializers import ReviewQueueItemSerializer
+from .services import approve_course_payment_proof, reject_payment_proof
+
+
+# Staff, or support users whose role grants payment review.
+CanReviewPayments = HasRolePermission.of("payments.review")
+
+
+def _int_param(value, default):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser | CanReviewPayments])
+def review_queue_list(request):
+    """Keyset-paginated review queue: ``?status=PENDING&cursor=...&limit=50``."""
+    proof_status = request.query_params.get("status", ProofStatus.PENDING)
+    if proof_status not in ProofStatus.values:
+        return Response({"detail": "Unknown status."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = review_queue.review_page(
+            status=proof_status,
+            cursor=request.query_params.get("cursor"),
+            limit=_int_param(request.query_params.get("limit"), review_queue.PAGE_SIZE),
+            unclaimed_only=request.query_params.get("unclaimed") == "1",
+        )
+    except ValueError:
+        return Response({"detail": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({
+        "counts": review_queue.status_counts(),
+        "results": ReviewQueueItemSerializer(page.items, many=True).data,
+        "next_cursor": page.next_cursor,
+    })
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser | CanReviewPayments])
+def review_queue_claim(request):
+    claimed = review_queue.claim_next(reviewer=request.user, limit=_int_param(request.data.get("limit"), 10))
+    return Response({"results": ReviewQueueItemSerializer(claimed, many=True).data})
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser | CanReviewPayments])
+def review_queue_release(request):
+    ids = request.data.get("ids")
+    released = review_queue.release_claims(reviewer=request.user, submission_ids=ids if isinstance(ids, list) else None)
+    return Response({"released": released})
+
+
+@api_view(["POST"])
+@permission_classes([IsAdminUser | CanReviewPayments])
+def review_queue_decide(request, pk: int, decision: str):
+    submission = get_object_or_404(PaymentProofSubmission, pk=pk)
+    admin_notes = request.data.get("admin_notes")
+    try:
+        with transaction.atomic():
+            submission = review_queue.lock_for_decision(submission, request.user)
+            if decision == "approve":
+                approve_course_payment_proof(submission=submission, admin_user=request.user, admin_notes=admin_notes)
+            else:
+                reject_payment_proof(submission=submission, admin_user=request.user, admin_notes=admin_notes)
+    except review_queue.ReviewConflict as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(ReviewQueueItemSerializer(submission).data)
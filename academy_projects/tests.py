@@ -0,0 +1,18 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from .models import Project
+
+
+class ProjectAdminQueryTests(TestCase):
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(email="admin@example.com", password="pass")
+        self.client.force_login(admin)
+
+    def test_changelist_queries_are_constant(self):
+        for total in (2, 6):
+            while Project.objects.count() < total:
+                n = Project.objects.count() + 1
+                Project.objects.create(title=f"Project {n}", slug=f"project-{n}")
+            with self.subTest(rows=total), self.assertNumQueries(6):
+                self.assertEqual(self.client.get("/admin/academy_projects/project/", secure=True).status_code, 200)
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 from django.utils.html import format_html
 
 from .models import Role, UserRole
@@ -21,13 +22,16 @@ class RoleAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(user_total=Count('user_roles'))
+    
     def user_count(self, obj):
-        count = obj.user_roles.count()
         return format_html(
             '<span style="background-color: #3b82f6; color: white; padding: 3px 10px; border-radius: 12px; font-size: 11px;">{} users</span>',
-            count
+            obj.user_total
         )
     user_count.short_description = 'Users'
+    user_count.admin_order_field = 'user_total'
 
 
 @admin.register(UserRole)
@@ -39,6 +43,7 @@ class UserRoleAdmin(admin.ModelAdmin):
     list_per_page = 25
     date_hierarchy = 'assigned_at'
     ordering = ['-assigned_at']
+    list_select_related = ['user', 'role']
     
     def user_email(self, obj):
         return obj.user.email
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AcademyRbacConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academy_rbac'
+
+    def ready(self):
+        from . import signals  # noqa: F401
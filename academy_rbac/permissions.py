@@ -0,0 +1,39 @@
+from functools import wraps
+
+from django.contrib.auth.views import redirect_to_login
+from django.core.exceptions import PermissionDenied
+from rest_framework.permissions import BasePermission
+
+from .resolver import has_perm
+
+
+class HasRolePermission(BasePermission):
+	"""Grant access when the user holds ``required_permission`` through a role.
+
+	Use ``HasRolePermission.of('payments.review')`` in ``permission_classes``;
+	it composes with DRF's ``|`` and ``&``.
+	"""
+
+	required_permission = None
+
+	@classmethod
+	def of(cls, perm):
+		return type(f'HasRolePermission[{perm}]', (cls,), {'required_permission': perm})
+
+	def has_permission(self, request, view):
+		perm = self.required_permission or getattr(view, 'required_permission', None)
+		return bool(perm) and has_perm(request.user, perm)
+
+
+def role_permission_required(perm):
+	"""View decorator: send anonymous users to login, 403 everyone else without ``perm``."""
+	def decorator(view):
+		@wraps(view)
+		def wrapped(request, *args, **kwargs):
+			if not request.user.is_authenticated:
+				return redirect_to_login(request.get_full_path())
+			if not has_perm(request.user, perm):
+				raise PermissionDenied
+			return view(request, *args, **kwargs)
+		return wrapped
+	return decorator
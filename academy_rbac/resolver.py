@@ -0,0 +1,145 @@
+"""
+Role-based permission resolver.
+
+``Role.permissions`` is a JSON list of dotted names (``"payments.review"``),
+optionally with wildcards: ``"payments.*"`` grants everything under
+``payments`` and ``"*"`` grants everything. Each role's list is compiled once
+into an interned frozenset; a user's effective set is the union of their
+roles' sets.
+
+Two caches sit in front of the database:
+
+* the role table (role id -> compiled set) is kept per process and reloaded
+  whenever the global ``rbac_version`` counter changes, which happens on any
+  Role save or delete;
+* each user's role ids are cached under ``rbac_user_roles_{uid}`` and dropped
+  on UserRole changes.
+
+Within a request the resolved set is memoised on the user object together with
+the version it was resolved at, so the version counter is read once per request
+and repeated ``has_perm`` checks cost a set lookup. A role change made during a
+request is picked up by the next one.
+"""
+from __future__ import annotations
+
+import sys
+import time
+from typing import Iterable, Optional
+
+from django.core.cache import cache
+
+from .models import Role, UserRole
+
+
+VERSION_KEY = 'rbac_version'
+USER_ROLES_TIMEOUT = 60 * 60
+WILDCARD = '*'
+
+EMPTY = frozenset()
+
+_compiled: dict[frozenset, frozenset] = {}
+_role_table: tuple[Optional[int], dict[int, frozenset]] = (None, {})
+
+
+def compile_permissions(permissions: Iterable) -> frozenset:
+	"""Normalise a permission list into a shared, interned frozenset."""
+	names = frozenset(
+		sys.intern(name.strip().lower())
+		for name in permissions or ()
+		if isinstance(name, str) and name.strip()
+	)
+	# Roles with identical lists share one object.
+	return _compiled.setdefault(names, names)
+
+
+def current_version() -> int:
+	version = cache.get(VERSION_KEY)
+	if version is None:
+		# Seed from the clock, not 1: after an eviction a restarted counter
+		# must not match a role table some process loaded earlier.
+		cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+		version = cache.get(VERSION_KEY)
+	return version
+
+
+def bump_version() -> None:
+	try:
+		cache.incr(VERSION_KEY)
+	except ValueError:
+		cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def role_table(version: Optional[int] = None) -> dict[int, frozenset]:
+	global _role_table
+	if version is None:
+		version = current_version()
+	loaded_version, table = _role_table
+	if loaded_version != version:
+		table = {
+			role_id: compile_permissions(permissions)
+			for role_id, permissions in Role.objects.values_list('id', 'permissions')
+		}
+		_role_table = (version, table)
+	return table
+
+
+def _user_roles_key(user_id) -> str:
+	return f'rbac_user_roles_{user_id}'
+
+
+def user_role_ids(user_id) -> tuple[int, ...]:
+	key = _user_roles_key(user_id)
+	role_ids = cache.get(key)
+	if role_ids is None:
+		role_ids = tuple(UserRole.objects.filter(user_id=user_id).values_list('role_id', flat=True).order_by('role_id'))
+		cache.set(key, role_ids, timeout=USER_ROLES_TIMEOUT)
+	return role_ids
+
+
+def invalidate_user_roles(user_id) -> None:
+	cache.delete(_user_roles_key(user_id))
+
+
+def get_permissions(user) -> frozenset:
+	"""The user's effective permission set (empty for anonymous users)."""
+	if user is None or not user.is_authenticated:
+		return EMPTY
+	memo = getattr(user, '_rbac_permissions', None)
+	if memo is not None:
+		return memo[1]
+
+	version = current_version()
+	table = role_table(version)
+	sets = [table.get(role_id, EMPTY) for role_id in user_role_ids(user.pk)]
+	permissions = compile_permissions(frozenset().union(*sets)) if sets else EMPTY
+	user._rbac_permissions = (version, permissions)
+	return permissions
+
+
+def permission_granted(permissions: frozenset, perm: str) -> bool:
+	if not permissions:
+		return False
+	perm = perm.lower()
+	if perm in permissions or WILDCARD in permissions:
+		return True
+	# "payments.review.refund" is granted by "payments.review.*" and "payments.*".
+	parts = perm.split('.')
+	return any('.'.join(parts[:i]) + '.*' in permissions for i in range(1, len(parts)))
+
+
+def has_perm(user, perm: str) -> bool:
+	"""Superusers have every permission; everyone else goes through their roles."""
+	if user is None or not user.is_authenticated or not user.is_active:
+		return False
+	if user.is_superuser:
+		return True
+	return permission_granted(get_permissions(user), perm)
+
+
+def has_any_perm(user, perms: Iterable[str]) -> bool:
+	return any(has_perm(user, perm) for perm in perms)
+
+
+def scope_has_perm(scope, perm: str) -> bool:
+	"""``has_perm`` for Channels consumers, using the user the auth middleware put in ``scope``."""
+	return has_perm(scope.get('user'), perm)
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Role, UserRole
+from .resolver import bump_version, invalidate_user_roles
+
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def role_changed(sender, instance, **kwargs):
+	bump_version()
+	transaction.on_commit(bump_version)
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+def user_role_changed(sender, instance, **kwargs):
+	invalidate_user_roles(instance.user_id)
+	# A concurrent request may re-cache the old roles before we commit.
+	transaction.on_commit(lambda: invalidate_user_roles(instance.user_id))
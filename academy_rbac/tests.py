@@ -1,7 +1,12 @@
 
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
 from unittest.mock import patch
 
+from academy_rbac import resolver
+from academy_rbac.models import Role, RoleKey, UserRole
+
 
 class CeleryMockedTestCase(TestCase):
 	@classmethod
@@ -14,3 +19,70 @@ class CeleryMockedTestCase(TestCase):
 	def tearDownClass(cls):
 		cls._celery_patcher.stop()
 		super().tearDownClass()
+
+
+class PermissionResolverTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.user = get_user_model().objects.create_user(email='support@example.com', password='pass')
+
+	def _fresh_user(self):
+		return type(self.user).objects.get(pk=self.user.pk)
+
+	def test_role_changes_invalidate_cached_permissions(self):
+		role = Role.objects.create(key=RoleKey.SUPPORT, name='Support', permissions=['Payments.Review', 'courses.*'])
+		self.assertFalse(resolver.has_perm(self._fresh_user(), 'payments.review'))
+
+		UserRole.objects.create(user=self.user, role=role)
+		user = self._fresh_user()
+		self.assertTrue(resolver.has_perm(user, 'payments.review'))
+		self.assertTrue(resolver.has_perm(user, 'courses.lessons.edit'))
+		self.assertFalse(resolver.has_perm(user, 'payments.refund'))
+		with self.assertNumQueries(0):
+			self.assertTrue(resolver.has_perm(self.user, 'payments.review'))
+
+		role.permissions = ['payments.refund']
+		role.save()
+		user = self._fresh_user()
+		self.assertFalse(resolver.has_perm(user, 'payments.review'))
+		self.assertTrue(resolver.has_perm(user, 'payments.refund'))
+
+	def test_repeated_checks_read_the_version_once(self):
+		role = Role.objects.create(key=RoleKey.SUPPORT, name='Support', permissions=['payments.review'])
+		UserRole.objects.create(user=self.user, role=role)
+		user = self._fresh_user()
+		with patch.object(resolver, 'current_version', wraps=resolver.current_version) as version:
+			for _ in range(3):
+				self.assertTrue(resolver.has_perm(user, 'payments.review'))
+				self.assertFalse(resolver.has_perm(user, 'payments.refund'))
+		self.assertEqual(version.call_count, 1)
+
+	def test_identical_role_lists_share_one_set(self):
+		self.assertIs(resolver.compile_permissions(['a.b', 'c']), resolver.compile_permissions([' C', 'a.b']))
+
+
+class RbacAdminQueryTests(TestCase):
+	"""Changelist query counts must not grow with the number of rows shown."""
+
+	EXPECTED = {
+		'/admin/academy_rbac/role/': 4,
+		'/admin/academy_rbac/userrole/': 7,
+	}
+
+	def setUp(self):
+		admin = get_user_model().objects.create_superuser(email='admin@example.com', password='pass')
+		self.client.force_login(admin)
+		self.roles = [Role.objects.create(key=key, name=label) for key, label in RoleKey.choices]
+
+	def _add_users(self, total):
+		while UserRole.objects.count() < total:
+			n = UserRole.objects.count()
+			user = get_user_model().objects.create_user(email=f'user{n}@example.com', password='pass')
+			UserRole.objects.create(user=user, role=self.roles[n % len(self.roles)])
+
+	def test_changelist_queries_are_constant(self):
+		for total in (2, 6):
+			self._add_users(total)
+			for url, expected in self.EXPECTED.items():
+				with self.subTest(url=url, rows=total), self.assertNumQueries(expected):
+					self.assertEqual(self.client.get(url, secure=True).status_code, 200)
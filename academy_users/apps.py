@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AcademyUsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'academy_users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
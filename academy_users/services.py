@@ -0,0 +1,71 @@
+"""
+User lookups for hot paths that must not touch the database.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from django.core.cache import cache
+
+from .models import User
+
+
+SNAPSHOT_FIELDS = ('id', 'email', 'name', 'is_active', 'is_staff', 'is_superuser')
+SNAPSHOT_TIMEOUT = 300  # shared cache, seconds
+
+# Small per-process layer in front of the shared cache. Entries are not
+# invalidated across processes, so keep the TTL short.
+LOCAL_TTL = 30
+LOCAL_MAX_ENTRIES = 10000
+
+_local: dict[int, tuple[float, dict]] = {}
+_local_lock = threading.Lock()
+
+
+def _cache_key(user_id: int) -> str:
+    return f'user_snapshot_{user_id}'
+
+
+def _from_snapshot(snapshot: dict) -> User:
+    user = User(**snapshot)
+    # Behaves like a row loaded from the database (e.g. for FK filters).
+    user._state.adding = False
+    user._state.db = 'default'
+    return user
+
+
+def get_local_user(user_id: int) -> Optional[User]:
+    """Per-process TTL hit or None; never does I/O, so it is safe on the event loop."""
+    entry = _local.get(user_id)
+    if entry is None or entry[0] < time.monotonic():
+        return None
+    return _from_snapshot(entry[1])
+
+
+def get_cached_user(user_id: int) -> Optional[User]:
+    """Resolve a user from the process cache, then the shared cache, then the database."""
+    user = get_local_user(user_id)
+    if user is not None:
+        return user
+
+    snapshot = cache.get(_cache_key(user_id))
+    if snapshot is None:
+        row = User.objects.filter(id=user_id).values(*SNAPSHOT_FIELDS).first()
+        if row is None:
+            return None
+        snapshot = row
+        cache.set(_cache_key(user_id), snapshot, timeout=SNAPSHOT_TIMEOUT)
+
+    with _local_lock:
+        if len(_local) >= LOCAL_MAX_ENTRIES:
+            _local.clear()
+        _local[user_id] = (time.monotonic() + LOCAL_TTL, snapshot)
+    return _from_snapshot(snapshot)
+
+
+def invalidate_cached_user(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
+    with _local_lock:
+        _local.pop(user_id, None)
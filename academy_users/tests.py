@@ -14,3 +14,46 @@ class CeleryMockedTestCase(TestCase):
 	def tearDownClass(cls):
 		cls._celery_patcher.stop()
 		super().tearDownClass()
+
+
+class WebSocketAuthTests(TestCase):
+	def setUp(self):
+		from django.contrib.auth import get_user_model
+		self.user = get_user_model().objects.create_user(email='ws@example.com', password='pass12345')
+
+	def _resolve(self, query_string):
+		from asgiref.sync import async_to_sync
+		from academy.ws_auth import WebSocketAuthMiddleware
+
+		seen = {}
+
+		async def inner(scope, receive, send):
+			seen['user'] = scope['user']
+
+		async def call():
+			await WebSocketAuthMiddleware(inner)({'type': 'websocket', 'query_string': query_string, 'headers': []}, None, None)
+
+		async_to_sync(call)()
+		return seen['user']
+
+	def test_connection_token_resolves_user_from_cache(self):
+		self.client.force_login(self.user)
+		response = self.client.post('/api/realtime/token/')
+		self.assertEqual(response.status_code, 200)
+		query = f"token={response.json()['token']}".encode()
+
+		self.assertEqual(self._resolve(query).id, self.user.id)
+		with self.assertNumQueries(0):
+			self.assertEqual(self._resolve(query).email, self.user.email)
+
+	def test_access_jwt_and_bad_tokens(self):
+		from rest_framework_simplejwt.tokens import AccessToken
+
+		jwt = str(AccessToken.for_user(self.user))
+		self.assertEqual(self._resolve(f'jwt={jwt}'.encode()).id, self.user.id)
+		self.assertFalse(self._resolve(b'token=forged').is_authenticated)
+
+		# Deactivation invalidates the cached snapshot.
+		self.user.is_active = False
+		self.user.save()
+		self.assertFalse(self._resolve(f'jwt={jwt}'.encode()).is_authenticated)
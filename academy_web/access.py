@@ -0,0 +1,156 @@
+"""
+Request-scoped access context.
+
+``request.access`` (attached by ``academy.middleware.AccessContextMiddleware``)
+answers "is this user enrolled / entitled / waiting on a payment review" for
+every course at once. Entitlements come from
+``academy_payments.entitlements``, so there is one cached copy of them and
+it is dropped by the same signal that grants or revokes one. Enrollments and
+payment proofs are cached here until ``academy_web.signals`` invalidates
+them. Each part is cached in the shared cache and memoised on the request.
+
+When both are cold, they are loaded with one UNION query and the entitlement
+part primes the entitlement cache.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from django.core.cache import cache
+from django.db.models import CharField, F, IntegerField, TextField, Value
+
+from academy_learning.models import Enrollment, EnrollmentStatus
+from academy_payments.entitlements import EMPTY, EntitlementSet, cached_entitlements, get_entitlements, remember_entitlements
+from academy_payments.models import Entitlement, PaymentProofSubmission, ProductType, ProofStatus
+
+
+CACHE_TIMEOUT = 60 * 15
+
+_ENROLLMENT = "E"
+_ENTITLEMENT = "X"
+_PROOF = "P"
+
+
+@dataclass(frozen=True)
+class ProofSummary:
+    """The fields of a user's latest payment proof that pages render."""
+    id: int
+    status: str
+    admin_notes: str = ""
+
+
+@dataclass(frozen=True)
+class AccessContext:
+    enrollments: dict = field(default_factory=dict)           # course_id -> status
+    entitlements: EntitlementSet = EMPTY
+    latest_proofs: dict = field(default_factory=dict)         # course_id -> ProofSummary
+    pending_course_ids: frozenset = field(default_factory=frozenset)
+    is_staff: bool = False
+
+    def is_enrolled(self, course) -> bool:
+        return getattr(course, "pk", course) in self.enrollments
+
+    def is_active_learner(self, course) -> bool:
+        return self.enrollments.get(getattr(course, "pk", course)) == EnrollmentStatus.ACTIVE
+
+    def can_view_lessons(self, course) -> bool:
+        return self.is_staff or self.is_active_learner(course)
+
+    def has_course_entitlement(self, course) -> bool:
+        return self.entitlements.has_course(course)
+
+    def latest_proof(self, course) -> Optional[ProofSummary]:
+        return self.latest_proofs.get(getattr(course, "pk", course))
+
+    def has_pending_proof(self, course=None) -> bool:
+        """Pending review for ``course``, or for any course when omitted."""
+        if course is None:
+            return bool(self.pending_course_ids)
+        return getattr(course, "pk", course) in self.pending_course_ids
+
+
+ANONYMOUS = AccessContext()
+
+
+def _cache_key(user_id: int) -> str:
+    return f"access_context_{user_id}"
+
+
+_COLUMNS = ("a_kind", "a_course", "a_project", "a_state", "a_ref", "a_notes")
+
+
+def _arm(queryset, kind, course, project, state, notes):
+    """Project a queryset onto the shared UNION columns.
+
+    Every column is an annotation, added in the same order, because Django
+    emits model fields before annotations and the arms would not line up.
+    """
+    return queryset.annotate(
+        a_kind=Value(kind, output_field=CharField()),
+        a_course=course,
+        a_project=project,
+        a_state=state,
+        a_ref=F("id"),
+        a_notes=notes,
+    ).values_list(*_COLUMNS)
+
+
+def _load(user, with_entitlements: bool) -> tuple[AccessContext, Optional[EntitlementSet]]:
+    no_id = Value(None, output_field=IntegerField())
+    no_notes = Value("", output_field=TextField())
+    enrollments = _arm(Enrollment.objects.filter(user_id=user.pk), _ENROLLMENT, F("course_id"), no_id, F("status"), no_notes)
+    proofs = _arm(
+        PaymentProofSubmission.objects.filter(user_id=user.pk, product_type=ProductType.COURSE, course__isnull=False),
+        _PROOF, F("course_id"), no_id, F("status"), F("admin_notes"),
+    )
+    arms = [proofs]
+    if with_entitlements:
+        arms.insert(0, _arm(
+            Entitlement.objects.filter(user_id=user.pk), _ENTITLEMENT, F("course_id"), F("project_id"), F("product_type"), no_notes,
+        ))
+
+    enrolled, course_ids, project_ids, proofs_by_course, pending = {}, set(), set(), {}, set()
+    for kind, course_id, project_id, state, ref_id, notes in enrollments.union(*arms, all=True):
+        if kind == _ENROLLMENT:
+            enrolled[course_id] = state
+        elif kind == _ENTITLEMENT:
+            if state == ProductType.COURSE and course_id is not None:
+                course_ids.add(course_id)
+            elif state == ProductType.PROJECT and project_id is not None:
+                project_ids.add(project_id)
+        else:
+            if state == ProofStatus.PENDING:
+                pending.add(course_id)
+            # Ids grow with submitted_at, so the highest id is the latest proof.
+            current = proofs_by_course.get(course_id)
+            if current is None or ref_id > current.id:
+                proofs_by_course[course_id] = ProofSummary(ref_id, state, notes or "")
+    context = AccessContext(
+        enrollments=enrolled,
+        latest_proofs=proofs_by_course,
+        pending_course_ids=frozenset(pending),
+        is_staff=user.is_staff,
+    )
+    entitlements = EntitlementSet(frozenset(course_ids), frozenset(project_ids)) if with_entitlements else None
+    return context, entitlements
+
+
+def get_access_context(user) -> AccessContext:
+    if user is None or not user.is_authenticated:
+        return ANONYMOUS
+    key = _cache_key(user.pk)
+    context = cache.get(key)
+    entitlements = cached_entitlements(user)
+    if context is None or context.is_staff != user.is_staff:
+        context, loaded = _load(user, with_entitlements=entitlements is None)
+        cache.set(key, context, timeout=CACHE_TIMEOUT)
+        if loaded is not None:
+            entitlements = remember_entitlements(user, loaded)
+    if entitlements is None:
+        entitlements = get_entitlements(user)
+    return replace(context, entitlements=entitlements)
+
+
+def invalidate_access_context(user_id: int) -> None:
+    cache.delete(_cache_key(user_id))
@@ -6,6 +6,8 @@ class AcademyWebConfig(AppConfig):
     name = "academy_web"
 
     def ready(self):
+        from . import signals  # noqa: F401
+
         from django.contrib import admin
         admin.site.site_header = "Veeru's Pro Academy Admin"
         admin.site.site_title = "Academy Admin Portal"
@@ -0,0 +1,140 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template import engines
+from django.test import RequestFactory
+
+from academy.template_warmup import project_templates
+from academy_courses.models import ContentStatus, Course, Lesson
+from academy_payments.forms import CoursePaymentProofForm
+from academy_projects.models import Project, ProjectStatus
+from academy_web.access import get_access_context
+from academy_web.forms import ContactForm, LoginForm, PasswordResetConfirmForm, PasswordResetRequestForm, SignupForm
+from academy_web.forms_feedback import FeedbackForm
+
+
+FORMS = {
+    'academy_web/signup.html': SignupForm,
+    'academy_web/login.html': LoginForm,
+    'academy_web/contact.html': ContactForm,
+    'academy_web/feedback.html': FeedbackForm,
+    'academy_web/password_reset_request.html': PasswordResetRequestForm,
+    'academy_web/password_reset_confirm.html': PasswordResetConfirmForm,
+    'academy_web/course_payment_proof.html': CoursePaymentProofForm,
+}
+
+# Rendered only by their own views (admin changelists etc.); compiled, not rendered.
+COMPILE_ONLY_PREFIXES = ('admin/',)
+
+# Pages behind login_required; rendered as a stand-in user when no --user is given.
+SIGNED_IN_TEMPLATES = {
+    'academy_web/dashboard.html',
+    'academy_web/dashboard_realtime.html',
+    'academy_web/lesson_view.html',
+    'academy_web/course_payment_proof.html',
+}
+
+
+class Command(BaseCommand):
+    help = "Compile and render every project template with sample data, timing each one."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Render as this user (email) instead of an anonymous visitor.")
+        parser.add_argument('--slow-ms', type=float, default=50.0, help="Flag renders slower than this (default 50 ms).")
+
+    def handle(self, *args, **options):
+        engine = engines['django']
+        request = self._request(options.get('user'))
+        context = self._sample_context(request)
+        signed_in = request if request.user.is_authenticated else self._stand_in_request()
+
+        failures = 0
+        for name in project_templates():
+            started = time.perf_counter()
+            try:
+                template = engine.get_template(name)
+                compiled = time.perf_counter()
+                if name.startswith(COMPILE_ONLY_PREFIXES):
+                    rendered = compiled
+                else:
+                    page_request = signed_in if name in SIGNED_IN_TEMPLATES else request
+                    template.render(self._context_for(name, context), page_request)
+                    rendered = time.perf_counter()
+            except Exception as exc:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f'FAIL  {name}: {exc.__class__.__name__}: {exc}'))
+                continue
+
+            compile_ms = (compiled - started) * 1000
+            render_ms = (rendered - compiled) * 1000
+            line = f'{compile_ms:7.1f} ms compile {render_ms:7.1f} ms render  {name}'
+            if name.startswith(COMPILE_ONLY_PREFIXES):
+                line += '  (compile only)'
+            style = self.style.WARNING if render_ms > options['slow_ms'] else self.style.SUCCESS
+            self.stdout.write(style(line))
+
+        if failures:
+            raise CommandError(f'{failures} template(s) failed')
+
+    def _request(self, email):
+        request = RequestFactory().get('/', secure=True)
+        if email:
+            try:
+                request.user = get_user_model().objects.get(email=email)
+            except get_user_model().DoesNotExist:
+                raise CommandError(f'No user with email {email!r}')
+        else:
+            request.user = AnonymousUser()
+        request.access = get_access_context(request.user)
+        return request
+
+    def _stand_in_request(self):
+        request = RequestFactory().get('/', secure=True)
+        request.user = get_user_model()(email='sample@example.com', name='Sample Learner')
+        request.access = get_access_context(AnonymousUser())
+        return request
+
+    def _sample_context(self, request):
+        """Representative objects from the database, or unsaved stand-ins when it is empty."""
+        course = (
+            Course.objects.filter(status=ContentStatus.PUBLISHED, modules__lessons__isnull=False).first()
+            or Course(title='Sample course', slug='sample-course', price=0)
+        )
+        lesson = (
+            Lesson.objects.filter(module__course=course).select_related('module').first() if course.pk else None
+        ) or Lesson(title='Sample lesson', slug='sample-lesson')
+        project = (
+            Project.objects.filter(status=ProjectStatus.PUBLISHED).first()
+            or Project(title='Sample project', slug='sample-project')
+        )
+        user = request.user
+        return {
+            'course': course,
+            'courses': Course.objects.filter(status=ContentStatus.PUBLISHED)[:12],
+            'modules': course.modules.order_by('order').prefetch_related('lessons') if course.pk else [],
+            'lesson': lesson,
+            'all_lessons': [lesson],
+            'previous_lesson': None,
+            'next_lesson': None,
+            'project': project,
+            'projects': Project.objects.filter(status=ProjectStatus.PUBLISHED)[:12],
+            'is_enrolled': request.access.is_enrolled(course) if course.pk else False,
+            'has_entitlement': False,
+            'latest_submission': None,
+            'enrollments': user.enrollments.select_related('course') if user.is_authenticated else [],
+            'payment_proofs': user.payment_proofs.select_related('course') if user.is_authenticated else [],
+            'entitlements': user.entitlements.select_related('course') if user.is_authenticated else [],
+            'progress': user.course_progress.select_related('course') if user.is_authenticated else [],
+            'max_upload_mb': 10,
+            'next': '',
+            'content_version': 0,
+            'fragment_timeout': 0,
+        }
+
+    def _context_for(self, name, context):
+        form_class = FORMS.get(name)
+        if form_class is None:
+            return context
+        return {**context, 'form': form_class()}
@@ -0,0 +1,129 @@
+"""
+Full-page cache for anonymous visitors.
+
+Marketing and catalog pages look the same for every signed-out visitor, so
+``@cache_anonymous_page`` stores the rendered response once, keyed by path,
+query string, language and the catalog *content version*, and serves it to
+later anonymous requests without running the view. The body is stored
+Brotli- and gzip-compressed alongside the plain one, so compression also
+happens once (cached pages hold no CSRF token, so Brotli is safe here).
+
+The content version is a counter bumped whenever a course, module, lesson,
+category or project changes (see signals.py); bumping it orphans every cached
+page at once and they age out of the cache on their own.
+
+Signed-in users always get a fresh render; ``course_detail`` additionally
+caches its curriculum as a template fragment keyed by the same version.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from django.utils.translation import get_language
+
+from academy import compression
+
+
+VERSION_KEY = 'page_cache_version'
+KEY_PREFIX = 'page'
+
+
+def page_cache_timeout() -> int:
+    return getattr(settings, 'PAGE_CACHE_TIMEOUT', 10 * 60)
+
+
+def content_version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seeded from the clock so an evicted counter never reuses old keys.
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_content_version() -> None:
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def page_key(request) -> str:
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode(), usedforsecurity=False).hexdigest()
+    return f'{KEY_PREFIX}:{content_version()}:{get_language()}:{request.path}:{query}'
+
+
+def _cacheable_request(request) -> bool:
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # Pending flash messages (e.g. "logged out") must reach the visitor.
+    return not len(get_messages(request))
+
+
+def _cacheable_response(request, response) -> bool:
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and not response.has_header('Content-Encoding')
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _entry(response) -> dict:
+    body = response.content
+    encoded = {'gzip': compress_string(body)}
+    if compression.brotli is not None:
+        encoded['br'] = compression.brotli.compress(body)
+    return {
+        'content_type': response['Content-Type'],
+        'body': body,
+        'encoded': encoded,
+    }
+
+
+def _from_entry(request, entry: dict) -> HttpResponse:
+    response = HttpResponse(content_type=entry['content_type'])
+    encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if encoding in entry['encoded']:
+        response.content = entry['encoded'][encoding]
+        response['Content-Encoding'] = encoding
+    else:
+        response.content = entry['body']
+    response['Content-Length'] = str(len(response.content))
+    return response
+
+
+def cache_anonymous_page(view):
+    """Serve anonymous GET/HEAD requests for ``view`` from the page cache."""
+
+    @wraps(view)
+    def wrapped(request, *args, **kwargs):
+        if not _cacheable_request(request):
+            return view(request, *args, **kwargs)
+
+        key = page_key(request)
+        entry = cache.get(key)
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if not _cacheable_response(request, response):
+                return response
+            entry = _entry(response)
+            cache.set(key, entry, timeout=page_cache_timeout())
+            status = 'MISS'
+        else:
+            status = 'HIT'
+        response = _from_entry(request, entry)
+        response['X-Page-Cache'] = status
+        patch_vary_headers(response, ('Cookie', 'Accept-Encoding'))
+        return response
+
+    return wrapped
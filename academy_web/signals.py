@@ -0,0 +1,40 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academy_courses.models import Course, CourseCategory, Lesson, Module
+from academy_courses.signals import content_imported
+from academy_learning.models import Enrollment
+from academy_payments.models import PaymentProofSubmission
+from academy_projects.models import Project
+
+from .access import invalidate_access_context
+from .page_cache import bump_content_version
+
+
+# Entitlements are cached by academy_payments.entitlements, not in the context.
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+@receiver(post_save, sender=PaymentProofSubmission)
+@receiver(post_delete, sender=PaymentProofSubmission)
+def drop_access_context(sender, instance, **kwargs):
+    invalidate_access_context(instance.user_id)
+    # A concurrent request may re-cache the old context before we commit.
+    transaction.on_commit(lambda: invalidate_access_context(instance.user_id))
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=CourseCategory)
+@receiver(post_delete, sender=CourseCategory)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=Lesson)
+@receiver(post_delete, sender=Lesson)
+@receiver(post_save, sender=Project)
+@receiver(post_delete, sender=Project)
+@receiver(content_imported)
+def drop_cached_pages(sender, **kwargs):
+    bump_content_version()
+    # Pages rendered from the old rows before we commit must not survive it.
+    transaction.on_commit(bump_content_version)
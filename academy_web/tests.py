@@ -1,15 +1,23 @@
 from __future__ import annotations
 
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from unittest.mock import patch
 from django.urls import reverse
 
 from academy_audit.models import AuditLog
 from academy_courses.models import ContentStatus, Course, CourseCategory, Lesson
 from academy_learning.models import CourseProgress, Enrollment
+from academy_payments.entitlements import get_entitlements
+from academy_web.access import get_access_context
 from academy_payments.models import Entitlement, PaymentProofSubmission, ProductType, ProofStatus
-from academy_payments.services import approve_course_payment_proof
+from academy_payments.services import approve_course_payment_proof, approve_course_payment_proofs
 
 
 
@@ -19,6 +27,8 @@ class SmokeFlowTests(TestCase):
         patcher = patch('academy_learning.services._safe_send_enrollment_email', lambda *a, **kw: None)
         self.addCleanup(patcher.stop)
         patcher.start()
+        # Cached per-user data must not leak between tests that reuse ids.
+        cache.clear()
         self.User = get_user_model()
         self.password = "StrongPass123!"
 
@@ -90,6 +100,122 @@ class SmokeFlowTests(TestCase):
     def _post(self, name: str, data: dict, **kwargs):
         return self.client.post(reverse(name, kwargs=kwargs), data=data, secure=True)
 
+    def test_entitlement_set_is_cached_and_invalidated(self):
+        self.assertFalse(get_entitlements(self.student).has_course(self.paid_course))
+
+        student = self.User.objects.get(pk=self.student.pk)
+        with self.assertNumQueries(0):
+            self.assertFalse(get_entitlements(student).has_course(self.paid_course))
+
+        entitlement = Entitlement.objects.create(user=self.student, product_type=ProductType.COURSE, course=self.paid_course)
+        student = self.User.objects.get(pk=self.student.pk)
+        self.assertTrue(get_entitlements(student).has_course(self.paid_course.id))
+
+        entitlement.delete()
+        student = self.User.objects.get(pk=self.student.pk)
+        self.assertFalse(get_entitlements(student).has_course(self.paid_course))
+
+    def test_access_context_loads_in_one_query(self):
+        Enrollment.objects.create(user=self.student, course=self.free_course)
+        PaymentProofSubmission.objects.create(
+            user=self.student, product_type=ProductType.COURSE, course=self.paid_course, status=ProofStatus.PENDING,
+        )
+        with self.assertNumQueries(1):
+            access = get_access_context(self.student)
+        self.assertTrue(access.can_view_lessons(self.free_course))
+        self.assertFalse(access.can_view_lessons(self.paid_course))
+        self.assertTrue(access.has_pending_proof(self.paid_course))
+        self.assertEqual(access.latest_proof(self.paid_course).status, ProofStatus.PENDING)
+
+        student = self.User.objects.get(pk=self.student.pk)
+        with self.assertNumQueries(0):
+            get_access_context(student)
+            # The UNION query primed the shared entitlement set as well.
+            get_entitlements(student)
+
+        Entitlement.objects.create(user=self.student, product_type=ProductType.COURSE, course=self.paid_course)
+        student = self.User.objects.get(pk=self.student.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(get_access_context(student).has_course_entitlement(self.paid_course))
+
+    def test_bulk_approval_grants_enrolls_and_audits(self):
+        other = self.User.objects.create_user(email="other@example.com", password=self.password)
+        Enrollment.objects.create(user=other, course=self.paid_course, status="CANCELLED")
+        for user in (self.student, other, self.student):
+            PaymentProofSubmission.objects.create(
+                user=user, product_type=ProductType.COURSE, course=self.paid_course, amount=999,
+            )
+        self.assertFalse(get_access_context(self.student).has_course_entitlement(self.paid_course))
+
+        with patch("academy_payments.services._safe_send_approval_notifications") as notify:
+            with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(12):
+                approved = approve_course_payment_proofs(
+                    submissions=PaymentProofSubmission.objects.all(), admin_user=self.admin,
+                )
+
+        # Caches are dropped and notifications queued once the approvals commit.
+        notify.assert_called_once()
+
+        self.assertEqual(approved, 3)
+        self.assertEqual(PaymentProofSubmission.objects.filter(status=ProofStatus.APPROVED).count(), 3)
+        self.assertEqual(Entitlement.objects.filter(course=self.paid_course).count(), 2)
+        self.assertEqual(Enrollment.objects.filter(course=self.paid_course, status="ACTIVE").count(), 2)
+        self.assertEqual(CourseProgress.objects.get(user=other, course=self.paid_course).total_lessons, 1)
+        self.assertEqual(AuditLog.objects.filter(action="payment_proof.approved").count(), 3)
+        student = self.User.objects.get(pk=self.student.pk)
+        self.assertTrue(get_access_context(student).has_course_entitlement(self.paid_course))
+        self.assertEqual(approve_course_payment_proofs(submissions=PaymentProofSubmission.objects.all(), admin_user=self.admin), 0)
+
+    def test_review_queue_admin_reports_undecidable_proofs(self):
+        from academy_projects.models import Project
+
+        project = Project.objects.create(slug="proj", title="Project")
+        proof = PaymentProofSubmission.objects.create(user=self.student, product_type=ProductType.PROJECT, project=project)
+        queue_url = reverse("admin:academy_payments_paymentproofsubmission_review_queue")
+        self.client.force_login(self.admin)
+
+        page = self.client.get(queue_url, secure=True)
+        self.assertNotContains(page, 'value="approve"')
+        resp = self.client.post(queue_url, {"action": "approve", "submission": proof.id}, secure=True, follow=True)
+        self.assertContains(resp, "Submission is not a course payment proof")
+        proof.refresh_from_db()
+        self.assertEqual(proof.status, ProofStatus.PENDING)
+
+        # A decision posted from a stale page is checked against the locked row.
+        PaymentProofSubmission.objects.filter(pk=proof.pk).update(status=ProofStatus.REJECTED)
+        resp = self.client.post(queue_url, {"action": "reject", "submission": proof.id}, secure=True, follow=True)
+        self.assertContains(resp, "Already reviewed.")
+
+    def test_payment_proof_uploads_are_hashed_and_deduplicated(self):
+        import hashlib
+        import tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from django.test import override_settings
+
+        content = b"\x89PNG fake screenshot" * 100
+        self.client.login(email=self.student.email, password=self.password)
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media, PAYMENT_PROOF_MAX_UPLOAD_SIZE=4096):
+            for name in ("proof.png", "proof-again.PNG"):
+                self._post(
+                    "academy_web:course_payment_proof",
+                    slug=self.paid_course.slug,
+                    data={"proof_file": SimpleUploadedFile(name, content, content_type="image/png")},
+                )
+                PaymentProofSubmission.objects.update(status=ProofStatus.REJECTED)
+
+            first, second = PaymentProofSubmission.objects.order_by("id")
+            self.assertEqual(first.proof_sha256, hashlib.sha256(content).hexdigest())
+            self.assertEqual(first.proof_file.name, second.proof_file.name)
+
+            resp = self._post(
+                "academy_web:course_payment_proof",
+                slug=self.paid_course.slug,
+                data={"proof_file": SimpleUploadedFile("huge.png", b"x" * 5000, content_type="image/png")},
+            )
+            self.assertEqual(resp.status_code, 200)
+            self.assertContains(resp, "File is too large")
+            self.assertEqual(PaymentProofSubmission.objects.count(), 2)
+
     def test_public_pages(self):
         resp = self.client.get("/", secure=True)
         self.assertEqual(resp.status_code, 200)
@@ -103,6 +229,56 @@ class SmokeFlowTests(TestCase):
         resp = self._get("academy_web:course_detail", slug=self.free_course.slug)
         self.assertContains(resp, self.free_course.title)
 
+    def test_anonymous_pages_are_cached_until_the_catalog_changes(self):
+        url = reverse("academy_web:course_list")
+        first = self.client.get(url, secure=True)
+        self.assertEqual(first["X-Page-Cache"], "MISS")
+
+        with self.assertNumQueries(0):
+            hit = self.client.get(url, secure=True, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual((hit["X-Page-Cache"], hit["Content-Encoding"]), ("HIT", "gzip"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Course.objects.filter(pk=self.free_course.pk).update(title="Renamed")
+            Course.objects.get(pk=self.free_course.pk).save()
+        resp = self.client.get(url, secure=True)
+        self.assertEqual(resp["X-Page-Cache"], "MISS")
+        self.assertContains(resp, "Renamed")
+
+        # Signed-in users always get their own render.
+        self.client.login(email=self.student.email, password=self.password)
+        resp = self.client.get(url, secure=True)
+        self.assertNotIn("X-Page-Cache", resp)
+
+    def test_catalog_is_paginated_and_filtered_from_the_facet_index(self):
+        for n in range(12):
+            Course.objects.create(
+                slug=f"extra-{n}", title=f"Extra {n:02d}", status=ContentStatus.PUBLISHED,
+                level="Beginner", price=0, duration="6 hours",
+            )
+        url = reverse("academy_web:course_list")
+        resp = self.client.get(url, secure=True)
+        self.assertEqual(len(resp.context["courses"]), 12)
+        self.assertEqual(resp.context["total"], 14)
+        self.assertContains(resp, "page=2")
+
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, {"price": "under-1000", "page": 1}, secure=True)
+        self.assertEqual([c.slug for c in resp.context["courses"]], ["paid-course"])
+        self.assertFalse(any("GROUP BY" in q["sql"] for q in ctx.captured_queries))
+        # No paid course has a level, so the level facet offers nothing.
+        self.assertEqual(resp.context["facets"]["level"], [])
+        prices = {o["value"]: (o["count"], o["selected"]) for o in resp.context["facets"]["price"]}
+        self.assertEqual(prices, {"free": (13, False), "under-1000": (1, True)})
+        self.assertContains(resp, 'href="?price=free"')
+        self.assertContains(resp, 'href="?"')
+
+    def test_every_template_compiles_and_renders(self):
+        out = StringIO()
+        call_command("check_templates", stdout=out)
+        self.assertIn("academy_web/course_detail.html", out.getvalue())
+        self.assertNotIn("FAIL", out.getvalue())
+
     def test_language_switch_sets_cookie(self):
         resp = self.client.post(
             reverse("set_language"),
@@ -166,6 +342,39 @@ class SmokeFlowTests(TestCase):
 
         self.assertTrue(Enrollment.objects.filter(user=self.student, course=self.free_course).exists())
 
+    def test_long_lessons_ship_the_first_sections_and_load_the_rest(self):
+        module = self.free_course.modules.create(slug="m", title="M")
+        body = "".join(f"<h2>Section {n}</h2><p>Text {n}</p>" for n in range(5))
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = Lesson.objects.create(module=module, slug="long", title="Long", body=body, status=ContentStatus.PUBLISHED)
+        kwargs = {"course_slug": self.free_course.slug, "lesson_slug": lesson.slug}
+        chunks_url = reverse("academy_web:lesson_chunks", kwargs=kwargs)
+
+        self.client.login(email=self.student.email, password=self.password)
+        self.assertEqual(self.client.get(chunks_url, {"chunks": "2-3"}, secure=True).status_code, 403)
+
+        self._post("academy_web:course_enroll", data={}, slug=self.free_course.slug)
+        resp = self._get("academy_web:lesson_view", **kwargs)
+        self.assertContains(resp, "Section 1")
+        self.assertNotContains(resp, "Section 2")
+        self.assertContains(resp, 'data-next="2" data-total="5"')
+        self.assertContains(resp, f'data-revision="{lesson.body_hash}"')
+        # The chunk loader must not replace the progress socket from realtime_base.html.
+        self.assertContains(resp, "window.wsManager.connect('progress_")
+
+        revision = lesson.body_hash
+        data = self.client.get(chunks_url, {"chunks": "2-", "rev": revision}, secure=True).json()
+        self.assertEqual((data["start"], data["stop"]), (2, 5))
+        self.assertEqual(data["html"][0], "<h2>Section 2</h2><p>Text 2</p>")
+        self.assertEqual(self.client.get(chunks_url, {"chunks": "x"}, secure=True).status_code, 400)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson.body = "<h2>Rewritten</h2>" + body
+            lesson.save()
+        stale = self.client.get(chunks_url, {"chunks": "2-", "rev": revision}, secure=True)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.json()["revision"], lesson.body_hash)
+
     def test_paid_course_requires_payment_proof_then_admin_approval_unlocks(self):
         self.client.login(email=self.student.email, password=self.password)
 
@@ -16,6 +16,7 @@ urlpatterns = [
     path("courses/<slug:slug>/enroll/", views.course_enroll, name="course_enroll"),
     path("courses/<slug:slug>/payment-proof/", views.course_payment_proof, name="course_payment_proof"),
     path("courses/<slug:course_slug>/lesson/<slug:lesson_slug>/", views.lesson_view, name="lesson_view"),
+    path("courses/<slug:course_slug>/lesson/<slug:lesson_slug>/chunks/", views.lesson_chunks, name="lesson_chunks"),
     path("courses/<slug:course_slug>/lesson/<slug:lesson_slug>/complete/", views.mark_lesson_complete, name="mark_lesson_complete"),
     path("dashboard/", views.dashboard, name="dashboard"),
     path("projects/", views.projects_list, name="projects_list"),
@@ -3,24 +3,37 @@ from __future__ import annotations
 from django.contrib import messages
 from django.contrib.auth import login, logout
 from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
 from django.db import transaction
-from django.http import HttpRequest, HttpResponse
+from django.db.models import Count
+from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
-from django.utils.http import url_has_allowed_host_and_scheme
+from django.utils.http import url_has_allowed_host_and_scheme, urlencode
+from django.utils.safestring import mark_safe
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
 
+from academy_courses import catalog
 from academy_courses.models import ContentStatus, Course
+from academy_courses.rendering import lesson_render, parse_chunk_range
 from academy_learning.services import enroll_user_in_course
 from academy_payments.forms import CoursePaymentProofForm
-from academy_payments.models import PaymentProofSubmission, ProofStatus
 from academy_payments.services import submit_course_payment_proof
-from academy_payments.models import Entitlement, ProductType
+from academy_payments.uploads import HashingFileUploadHandler, max_upload_size
 from academy_projects.models import Project, ProjectStatus
 
 from .forms import LoginForm, SignupForm, ContactForm, PasswordResetRequestForm, PasswordResetConfirmForm
 from .forms_feedback import FeedbackForm
+from .page_cache import cache_anonymous_page, content_version, page_cache_timeout
 
 
+CATALOG_PAGE_SIZE = 12
+# Lesson sections shipped with the page; the rest load as the reader scrolls.
+LESSON_FIRST_CHUNKS = 2
+LESSON_CHUNK_BATCH = 4
+
+
+@cache_anonymous_page
 def home(request: HttpRequest) -> HttpResponse:
     return render(request, "academy_web/home.html")
 
@@ -78,43 +91,58 @@ def logout_view(request: HttpRequest) -> HttpResponse:
     return redirect("academy_web:home")
 
 
+@cache_anonymous_page
 def course_list(request: HttpRequest) -> HttpResponse:
-    qs = Course.objects.select_related('category', 'instructor').order_by("order", "title")
+    filters = catalog.clean_filters(request.GET)
     # Staff sees all drafts; users see only published
-    if not request.user.is_staff:
-        qs = qs.filter(status=ContentStatus.PUBLISHED)
-    courses = qs
-    return render(request, "academy_web/course_list.html", {"courses": courses})
+    statuses = None if request.user.is_staff else (ContentStatus.PUBLISHED,)
+    result = catalog.search(filters, statuses=statuses)
+
+    page = Paginator(result.ids, CATALOG_PAGE_SIZE).get_page(request.GET.get("page"))
+    by_id = Course.objects.select_related('category', 'instructor').in_bulk(page.object_list)
+    courses = [by_id[pk] for pk in page.object_list if pk in by_id]
+    for course in courses:
+        course.module_total = result.modules[course.pk]
+
+    for facet, options in result.facets.items():
+        for option in options:
+            option["query"] = _catalog_query(filters, facet, "" if option["selected"] else option["value"])
+    return render(
+        request,
+        "academy_web/course_list.html",
+        {
+            "courses": courses,
+            "page_obj": page,
+            "total": page.paginator.count,
+            "facets": result.facets,
+            "filters": filters,
+            "filter_query": _catalog_query(filters),
+        },
+    )
 
 
+def _catalog_query(filters: dict, facet: str | None = None, value: str = "") -> str:
+    """Query string for the catalog with ``facet`` set to ``value`` (back to page 1)."""
+    params = dict(filters)
+    if facet is not None:
+        params.pop(facet, None)
+        if value:
+            params[facet] = value
+    return urlencode(sorted(params.items()))
+
+
+@cache_anonymous_page
 def course_detail(request: HttpRequest, slug: str) -> HttpResponse:
-    qs = Course.objects.select_related('category', 'instructor')
+    qs = Course.objects.select_related('category', 'instructor').annotate(module_total=Count('modules'))
     if not request.user.is_staff:
         qs = qs.filter(status=ContentStatus.PUBLISHED)
     course = get_object_or_404(qs, slug=slug)
     modules = course.modules.order_by("order", "title").prefetch_related("lessons")
 
-    has_entitlement = False
-    is_enrolled = False
-    latest_submission = None
-    if request.user.is_authenticated:
-        has_entitlement = Entitlement.objects.filter(
-            user=request.user,
-            product_type=ProductType.COURSE,
-            course=course,
-        ).exists()
-
-        is_enrolled = request.user.enrollments.filter(course=course).exists()
-
-        latest_submission = (
-            PaymentProofSubmission.objects.filter(
-                user=request.user,
-                product_type=ProductType.COURSE,
-                course=course,
-            )
-            .order_by("-submitted_at")
-            .first()
-        )
+    access = request.access
+    has_entitlement = access.has_course_entitlement(course)
+    is_enrolled = access.is_enrolled(course)
+    latest_submission = access.latest_proof(course)
     return render(
         request,
         "academy_web/course_detail.html",
@@ -124,6 +152,9 @@ def course_detail(request: HttpRequest, slug: str) -> HttpResponse:
             "has_entitlement": has_entitlement,
             "is_enrolled": is_enrolled,
             "latest_submission": latest_submission,
+            # The curriculum is a cached fragment; modules are only queried on a miss.
+            "content_version": content_version(),
+            "fragment_timeout": page_cache_timeout(),
         },
     )
 
@@ -136,12 +167,7 @@ def course_enroll(request: HttpRequest, slug: str) -> HttpResponse:
 
     # Paid courses require an entitlement (granted by admin after payment proof approval).
     if (course.price or 0) > 0:
-        has_entitlement = Entitlement.objects.filter(
-            user=request.user,
-            product_type=ProductType.COURSE,
-            course=course,
-        ).exists()
-        if not has_entitlement and not request.user.is_staff:
+        if not request.access.has_course_entitlement(course) and not request.user.is_staff:
             messages.info(request, "This is a paid course. Submit payment proof to unlock it.")
             return redirect("academy_web:course_payment_proof", slug=slug)
 
@@ -154,8 +180,17 @@ def course_enroll(request: HttpRequest, slug: str) -> HttpResponse:
     return redirect("academy_web:dashboard")
 
 
+@csrf_exempt
 @login_required
 def course_payment_proof(request: HttpRequest, slug: str) -> HttpResponse:
+    # Upload handlers must be swapped before anything reads request.POST, which
+    # is why CSRF is checked in the inner view instead of by the middleware.
+    request.upload_handlers = [HashingFileUploadHandler(request)]
+    return _course_payment_proof(request, slug)
+
+
+@csrf_protect
+def _course_payment_proof(request: HttpRequest, slug: str) -> HttpResponse:
     course = get_object_or_404(Course, slug=slug, status=ContentStatus.PUBLISHED)
 
     # Free courses don't need proof.
@@ -163,22 +198,17 @@ def course_payment_proof(request: HttpRequest, slug: str) -> HttpResponse:
         return redirect("academy_web:course_detail", slug=slug)
 
     # Already unlocked.
-    if Entitlement.objects.filter(user=request.user, product_type=ProductType.COURSE, course=course).exists():
+    if request.access.has_course_entitlement(course):
         messages.info(request, "This course is already unlocked.")
         return redirect("academy_web:dashboard")
 
     # Avoid duplicate pending submissions for the same course.
-    if PaymentProofSubmission.objects.filter(
-        user=request.user,
-        product_type=ProductType.COURSE,
-        course=course,
-        status=ProofStatus.PENDING,
-    ).exists():
+    if request.access.has_pending_proof(course):
         messages.info(request, "Your payment proof is already pending review.")
         return redirect("academy_web:dashboard")
 
     if request.method == "POST":
-        form = CoursePaymentProofForm(request.POST, request.FILES)
+        form = CoursePaymentProofForm(request.POST, request.FILES, upload_error=getattr(request, "upload_rejected", None))
         if form.is_valid():
             with transaction.atomic():
                 submit_course_payment_proof(
@@ -193,7 +223,11 @@ def course_payment_proof(request: HttpRequest, slug: str) -> HttpResponse:
     else:
         form = CoursePaymentProofForm()
 
-    return render(request, "academy_web/course_payment_proof.html", {"course": course, "form": form})
+    return render(
+        request,
+        "academy_web/course_payment_proof.html",
+        {"course": course, "form": form, "max_upload_mb": max_upload_size() // (1024 * 1024)},
+    )
 
 
 @login_required
@@ -217,7 +251,7 @@ def dashboard(request: HttpRequest) -> HttpResponse:
         .order_by("-granted_at")
     )
 
-    has_pending_payment_proof = payment_proofs.filter(status=ProofStatus.PENDING).exists()
+    has_pending_payment_proof = request.access.has_pending_proof()
 
     # Use real-time dashboard template
     return render(
@@ -233,24 +267,29 @@ def dashboard(request: HttpRequest) -> HttpResponse:
     )
 
 
+@cache_anonymous_page
 def about(request: HttpRequest) -> HttpResponse:
     return render(request, "academy_web/about.html")
 
 
+@cache_anonymous_page
 def privacy(request: HttpRequest) -> HttpResponse:
     return render(request, "academy_web/privacy.html")
 
 
+@cache_anonymous_page
 def terms(request: HttpRequest) -> HttpResponse:
     return render(request, "academy_web/terms.html")
 
 
+@cache_anonymous_page
 def projects_list(request: HttpRequest) -> HttpResponse:
     """BTech Projects listing page."""
     projects = Project.objects.filter(status=ProjectStatus.PUBLISHED).order_by("title")
     return render(request, "academy_web/projects_list.html", {"projects": projects})
 
 
+@cache_anonymous_page
 def project_detail(request: HttpRequest, slug: str) -> HttpResponse:
     """BTech Project detail page."""
     project = get_object_or_404(Project, slug=slug, status=ProjectStatus.PUBLISHED)
@@ -270,21 +309,25 @@ def contact(request: HttpRequest) -> HttpResponse:
     return render(request, "academy_web/contact.html", {"form": form})
 
 
+@cache_anonymous_page
 def faq(request: HttpRequest) -> HttpResponse:
     """FAQ page."""
     return render(request, "academy_web/faq.html")
 
 
+@cache_anonymous_page
 def careers(request: HttpRequest) -> HttpResponse:
     """Careers page."""
     return render(request, "academy_web/careers.html")
 
 
+@cache_anonymous_page
 def blog(request: HttpRequest) -> HttpResponse:
     """Blog page."""
     return render(request, "academy_web/blog.html")
 
 
+@cache_anonymous_page
 def refund_policy(request: HttpRequest) -> HttpResponse:
     """Refund policy page."""
     return render(request, "academy_web/refund_policy.html")
@@ -424,13 +467,7 @@ def lesson_view(request: HttpRequest, course_slug: str, lesson_slug: str) -> Htt
     
     course = lesson.module.course
     
-    # Check if user is enrolled
-    is_enrolled = request.user.enrollments.filter(
-        course=course,
-        status='ACTIVE'
-    ).exists()
-    
-    if not is_enrolled and not request.user.is_staff:
+    if not request.access.can_view_lessons(course):
         messages.error(request, "You must be enrolled in this course to view lessons.")
         return redirect("academy_web:course_detail", slug=course_slug)
     
@@ -453,6 +490,8 @@ def lesson_view(request: HttpRequest, course_slug: str, lesson_slug: str) -> Htt
     previous_lesson = lesson_list[current_index - 1] if current_index and current_index > 0 else None
     next_lesson = lesson_list[current_index + 1] if current_index is not None and current_index < len(lesson_list) - 1 else None
     
+    rendered = lesson_render(lesson)
+    first_chunks = range(min(LESSON_FIRST_CHUNKS, len(rendered.chunks)))
     return render(
         request,
         "academy_web/lesson_view.html",
@@ -463,10 +502,46 @@ def lesson_view(request: HttpRequest, course_slug: str, lesson_slug: str) -> Htt
             "all_lessons": all_lessons,
             "previous_lesson": previous_lesson,
             "next_lesson": next_lesson,
+            "lesson_html": mark_safe("".join(rendered.chunk(i) for i in first_chunks)),
+            "chunk_total": len(rendered.chunks),
+            "chunk_next": first_chunks.stop,
+            "chunk_batch": LESSON_CHUNK_BATCH,
+            # lesson_render() has checked body_hash against the body it rendered.
+            "chunk_revision": lesson.body_hash,
         },
     )
 
 
+@login_required
+def lesson_chunks(request: HttpRequest, course_slug: str, lesson_slug: str) -> HttpResponse:
+    """Rendered sections of a lesson body, e.g. ``?chunks=2-5`` (inclusive)."""
+    from academy_courses.models import Lesson
+
+    lesson = get_object_or_404(
+        Lesson.objects.select_related('module__course'),
+        slug=lesson_slug,
+        module__course__slug=course_slug,
+    )
+    if not request.access.can_view_lessons(lesson.module.course):
+        return JsonResponse({"detail": "You must be enrolled in this course to view lessons."}, status=403)
+
+    rendered = lesson_render(lesson)
+    revision = request.GET.get("rev")
+    if revision and revision != lesson.body_hash:
+        # Chunk offsets belong to one revision; the page must reload to get the new one.
+        return JsonResponse({"detail": "The lesson has changed.", "revision": lesson.body_hash}, status=409)
+    try:
+        indexes = parse_chunk_range(request.GET.get("chunks", ""), len(rendered.chunks))
+    except ValueError as exc:
+        return JsonResponse({"detail": str(exc)}, status=400)
+    return JsonResponse({
+        "total": len(rendered.chunks),
+        "start": indexes.start,
+        "stop": indexes.stop,
+        "html": [rendered.chunk(i) for i in indexes],
+    })
+
+
 @login_required
 def mark_lesson_complete(request: HttpRequest, course_slug: str, lesson_slug: str) -> HttpResponse:
     """Mark a lesson as complete."""
@@ -485,13 +560,7 @@ def mark_lesson_complete(request: HttpRequest, course_slug: str, lesson_slug: st
     
     course = lesson.module.course
     
-    # Check enrollment
-    is_enrolled = request.user.enrollments.filter(
-        course=course,
-        status='ACTIVE'
-    ).exists()
-    
-    if not is_enrolled and not request.user.is_staff:
+    if not request.access.can_view_lessons(course):
         messages.error(request, "You must be enrolled in this course.")
         return redirect("academy_web:course_detail", slug=course_slug)
     
@@ -543,6 +612,7 @@ def mark_lesson_complete(request: HttpRequest, course_slug: str, lesson_slug: st
                 f'progress_{request.user.id}_{course.id}',
                 {
                     'type': 'progress_update',
+                    'course_id': course.id,
                     'data': {
                         'type': 'progress_update',
                         'progress': {